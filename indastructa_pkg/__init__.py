@@ -0,0 +1,40 @@
+"""
+indastructa: ASCII trees of project structures.
+
+The library API lives in indastructa_pkg.tree, indastructa_pkg.snapshot and
+indastructa_pkg.asyncscan and is re-exported here. It is imported on first
+use, so running the command line does not load it.
+"""
+
+__all__ = [
+    "Node",
+    "NodeTable",
+    "Snapshot",
+    "compile_patterns",
+    "iter_text_lines",
+    "render_json",
+    "render_text",
+    "scan",
+    "scan_async",
+    "scan_table",
+    "to_dict",
+]
+
+_SNAPSHOT_NAMES = {"Snapshot"}
+_ASYNC_NAMES = {"scan_async"}
+
+
+def __getattr__(name: str):
+    if name in _ASYNC_NAMES:
+        from indastructa_pkg import asyncscan
+
+        return getattr(asyncscan, name)
+    if name in _SNAPSHOT_NAMES:
+        from indastructa_pkg import snapshot
+
+        return getattr(snapshot, name)
+    if name in __all__:
+        from indastructa_pkg import tree
+
+        return getattr(tree, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
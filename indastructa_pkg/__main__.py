@@ -0,0 +1,8 @@
+"""
+Runs the command line tool as ``python -m indastructa_pkg``.
+"""
+
+from indastructa_pkg.cli import main
+
+if __name__ == "__main__":
+    main()
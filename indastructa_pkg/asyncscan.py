@@ -0,0 +1,320 @@
+"""
+Asynchronous scanning for filesystems where every listing is slow, such as
+object stores mounted with FUSE or SSHFS (tens to hundreds of milliseconds
+per directory).
+
+awalk_dir_structure() yields the same ``(depth, entry, is_dir, is_last)``
+tuples as walk_dir_structure, in the same order, so its results render with
+the same code. The listings are made ahead of the walk by ``concurrency``
+worker tasks, each sending one blocking listing at a time to a thread.
+Directories waiting to be listed are queued by their position in the
+output, so a free worker always takes the one the walk will reach first and
+the others keep listing further ahead. The threads also read symlink
+targets and, when the walk needs them, the stat of every directory, which
+the entries cache, so the event loop itself never waits on the filesystem.
+
+scan_async() is the awaitable counterpart of scan():
+
+    tree = await scan_async("/mnt/bucket", depth=3)
+    print(render_text(tree))
+"""
+
+import asyncio
+import os
+from concurrent.futures import Executor, ThreadPoolExecutor
+from pathlib import Path
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Tuple, Union
+
+from indastructa_pkg.cli import (
+    DirectoryLister,
+    ScanBudget,
+    _directory_key,
+    _get_sorted_directory_items,
+    _is_mount_point,
+    _label_entry,
+    _list_subdirectory,
+    _mount_point_entry,
+    _read_link,
+    _unscanned_entries,
+)
+from indastructa_pkg.matcher import PatternMatcher
+from indastructa_pkg.tree import Node, _build_tree, _prepare
+
+DEFAULT_CONCURRENCY = 32
+
+# The position of a directory in the output: the index of every directory on
+# its path. Tuples compare in the order the walk reaches the directories.
+Key = Tuple[int, ...]
+
+# The matcher for the entries of a directory, the entries, and the targets
+# of the symlinks among them.
+Listing = Tuple[PatternMatcher, List[os.DirEntry], Dict[str, str]]
+
+
+def _list_ahead(
+    directory: Union[Path, os.DirEntry],
+    matcher: PatternMatcher,
+    lister: DirectoryLister,
+    stat_dirs: bool,
+    root: bool = False,
+) -> Listing:
+    """
+    Lists a directory in a worker thread and makes the filesystem calls the
+    walk will make on its entries, so that their results are cached by then.
+    """
+    if root:
+        child_matcher, children = matcher, lister(directory, matcher)
+    else:
+        child_matcher, children = _list_subdirectory(directory, matcher, lister)
+    links = {}
+    for child in children:
+        if child.is_symlink():
+            links[child.path] = _read_link(child)
+        if stat_dirs and child.is_dir():
+            try:
+                child.stat()
+            except OSError:
+                pass
+    return child_matcher, children, links
+
+
+def _root_info(
+    root_path: Union[Path, os.DirEntry], follow_symlinks: bool, one_file_system: bool
+) -> Tuple[Optional[set], Optional[int]]:
+    """The directories walked at the start (with follow_symlinks) and st_dev."""
+    visited = {_directory_key(root_path)} if follow_symlinks else None
+    device = None
+    if one_file_system:
+        try:
+            device = root_path.stat().st_dev
+        except OSError:
+            pass
+    return visited, device
+
+
+class _Lookahead:
+    """Lists directories ahead of the walk, those it reaches first first."""
+
+    def __init__(
+        self,
+        lister: DirectoryLister,
+        max_depth: int,
+        follow_symlinks: bool,
+        device: Optional[int],
+        concurrency: int,
+        executor: Optional[Executor],
+    ) -> None:
+        self.lister = lister
+        self.max_depth = max_depth
+        self.follow_symlinks = follow_symlinks
+        self.device = device
+        self.stat_dirs = follow_symlinks or device is not None
+        self.listings: Dict[Key, asyncio.Future] = {}
+        self.links: Dict[str, str] = {}
+        # (st_dev, st_ino) of every directory queued, with follow_symlinks.
+        self.queued: set = set()
+        self.queue: asyncio.PriorityQueue = asyncio.PriorityQueue()
+        self.own_executor = executor is None
+        if executor is None:
+            executor = ThreadPoolExecutor(max_workers=concurrency)
+        self.executor = executor
+        self.workers = [asyncio.create_task(self._work()) for _ in range(concurrency)]
+
+    def listing(
+        self,
+        key: Key,
+        directory: Union[Path, os.DirEntry],
+        matcher: PatternMatcher,
+        depth: int,
+        root: bool = False,
+    ) -> asyncio.Future:
+        """Returns the future listing of a directory, queueing it if needed."""
+        future = self.listings.get(key)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            self.listings[key] = future
+            self.queue.put_nowait((key, directory, matcher, depth, root))
+        return future
+
+    def discard(self, key: Key) -> None:
+        """Drops the listing of a directory the walk will not go into."""
+        future = self.listings.pop(key, None)
+        if future is not None:
+            future.cancel()
+
+    def read_link(self, entry: os.DirEntry) -> str:
+        target = self.links.pop(entry.path, None)
+        return _read_link(entry) if target is None else target
+
+    async def _work(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            key, directory, matcher, depth, root = await self.queue.get()
+            future = self.listings.get(key)
+            if future is None or future.done():
+                continue  # discarded before it was listed
+            try:
+                listing = await loop.run_in_executor(
+                    self.executor,
+                    _list_ahead,
+                    directory,
+                    matcher,
+                    self.lister,
+                    self.stat_dirs,
+                    root,
+                )
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+                continue
+            if future.done():
+                continue
+            self.links.update(listing[2])
+            future.set_result(listing)
+            self._queue_children(key, depth, listing)
+
+    def _queue_children(self, key: Key, depth: int, listing: Listing) -> None:
+        """Queues the subdirectories the walk is expected to go into."""
+        if self.max_depth != -1 and depth + 1 >= self.max_depth:
+            return
+        matcher, children, _ = listing
+        for index, child in enumerate(children):
+            if not child.is_dir():
+                continue
+            if child.is_symlink() and not self.follow_symlinks:
+                continue
+            if _is_mount_point(child, self.device):
+                continue
+            if self.follow_symlinks:
+                directory_key = _directory_key(child)
+                if directory_key in self.queued:
+                    continue
+                self.queued.add(directory_key)
+            self.listing(key + (index,), child, matcher, depth + 1)
+
+    def close(self) -> None:
+        for worker in self.workers:
+            worker.cancel()
+        for future in self.listings.values():
+            future.cancel()
+        if self.own_executor:
+            # A listing already running in a thread cannot be interrupted;
+            # do not wait for it.
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+async def awalk_dir_structure(
+    root_path: Union[Path, os.DirEntry],
+    matcher: PatternMatcher,
+    max_depth: int = -1,
+    lister: Optional[DirectoryLister] = None,
+    follow_symlinks: bool = False,
+    one_file_system: bool = False,
+    budget: Optional[ScanBudget] = None,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    executor: Optional[Executor] = None,
+) -> AsyncIterator[Tuple[int, os.DirEntry, bool, bool]]:
+    """
+    Walks the tree like walk_dir_structure, with up to ``concurrency``
+    listings in flight at once.
+
+    The blocking calls run on ``executor``, or on a thread pool of
+    ``concurrency`` threads created for the walk. Listings made ahead are
+    kept until the walk reaches them.
+    """
+    if concurrency < 1:
+        raise ValueError(f"concurrency must be at least 1, got {concurrency}")
+    if max_depth != -1 and max_depth <= 0:
+        return
+    if lister is None:
+        lister = _get_sorted_directory_items
+
+    loop = asyncio.get_running_loop()
+    visited, device = await loop.run_in_executor(
+        executor, _root_info, root_path, follow_symlinks, one_file_system
+    )
+    lookahead = _Lookahead(
+        lister, max_depth, follow_symlinks, device, concurrency, executor
+    )
+    if visited is not None:
+        lookahead.queued.update(visited)
+    try:
+        matcher, entries, _ = await lookahead.listing((), root_path, matcher, 0, True)
+        # The frames of walk_dir_structure, with a directory's key in place of
+        # its pending listings.
+        stack = [[entries, 0, 0, (), matcher]]
+        while stack:
+            frame = stack[-1]
+            entries, index, depth, key, matcher = frame
+            if index == len(entries):
+                stack.pop()
+                continue
+            if budget is not None and not budget.charge():
+                for item in _unscanned_entries(stack, budget.exceeded):
+                    yield item
+                return
+            frame[1] = index + 1
+
+            entry = entries[index]
+            is_dir = entry.is_dir()
+            if visited is not None or entry.is_symlink():
+                entry, is_dir = _label_entry(
+                    entry, is_dir, visited, lookahead.read_link
+                )
+            if is_dir and _is_mount_point(entry, device):
+                entry, is_dir = _mount_point_entry(entry), False
+            child_key = key + (index,)
+            descend = is_dir and (max_depth == -1 or depth + 1 < max_depth)
+            if not descend:
+                lookahead.discard(child_key)
+            yield depth, entry, is_dir, index == len(entries) - 1
+            if descend:
+                child_matcher, children, _ = await lookahead.listing(
+                    child_key, entry, matcher, depth + 1
+                )
+                del lookahead.listings[child_key]
+                stack.append([children, 0, depth + 1, child_key, child_matcher])
+    finally:
+        lookahead.close()
+
+
+async def scan_async(
+    root: Union[Path, str],
+    *,
+    include: Iterable[str] = (),
+    exclude: Optional[Iterable[str]] = None,
+    depth: int = -1,
+    matcher: Optional[PatternMatcher] = None,
+    gitignore: bool = True,
+    max_entries_per_dir: Optional[int] = None,
+    follow_symlinks: bool = False,
+    one_file_system: bool = False,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    executor: Optional[Executor] = None,
+) -> Node:
+    """
+    Scans ``root`` like scan() without blocking the event loop, with up to
+    ``concurrency`` directory listings in flight (see awalk_dir_structure).
+    """
+    loop = asyncio.get_running_loop()
+    root_path, root_name, matcher, lister = await loop.run_in_executor(
+        executor,
+        _prepare,
+        root,
+        include,
+        exclude,
+        matcher,
+        gitignore,
+        max_entries_per_dir,
+    )
+    walk = awalk_dir_structure(
+        root_path,
+        matcher,
+        depth,
+        lister,
+        follow_symlinks,
+        one_file_system,
+        concurrency=concurrency,
+        executor=executor,
+    )
+    return _build_tree(root_name, [item async for item in walk])
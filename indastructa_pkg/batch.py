@@ -0,0 +1,166 @@
+"""
+Batch mode: scan many directories in one run.
+
+The command line is parsed once and the roots are scanned on a process pool,
+each into its own output file, exactly as ``indastructa <root>`` would write
+it. A root that fails is reported and does not stop the others. With
+--max-total-entries or --time-budget, every root has a budget of its own.
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from functools import partial
+from pathlib import Path
+from typing import Iterator, List, NamedTuple, Optional, TextIO
+
+from indastructa_pkg.cli import (
+    PARTIAL_EXIT_STATUS,
+    DirectoryLister,
+    _get_sorted_directory_items,
+    assemble_patterns,
+    iter_selected_output,
+    scan_budget,
+    write_output,
+)
+from indastructa_pkg.gitignore import GitIgnoreMatcher
+from indastructa_pkg.tree import compile_patterns
+
+
+class BatchResult(NamedTuple):
+    root: str
+    entries: int
+    seconds: float
+    error: Optional[str] = None
+    # The option whose limit stopped the scan, if one did.
+    stopped: Optional[str] = None
+
+
+class _CountingLister:
+    """Counts the entries of every listing made through ``lister``."""
+
+    def __init__(self, lister: DirectoryLister) -> None:
+        self.lister = lister
+        self.entries = 0
+
+    def __call__(self, path, matcher):
+        items = self.lister(path, matcher)
+        self.entries += len(items)
+        return items
+
+
+def read_roots(stream: TextIO) -> Iterator[str]:
+    """Yields the roots listed one per line, skipping blanks and # comments."""
+    for line in stream:
+        line = line.strip()
+        if line and not line.startswith("#"):
+            yield line
+
+
+def scan_root(root: str, args: argparse.Namespace) -> BatchResult:
+    """Scans one root into its output file; errors are returned, not raised."""
+    started = time.perf_counter()
+    budget = scan_budget(args)
+    lister = _CountingLister(
+        partial(_get_sorted_directory_items, max_entries=args.max_entries_per_dir)
+    )
+    try:
+        project_dir = Path(root).resolve()
+        if not project_dir.is_dir():
+            raise NotADirectoryError(f"Path is not a directory: {project_dir}")
+        exclude_patterns, include_patterns, _ = assemble_patterns(args, project_dir)
+        # Roots with the same patterns share one compiled matcher per worker.
+        matcher = GitIgnoreMatcher.for_root(
+            project_dir, compile_patterns(exclude_patterns, include_patterns)
+        )
+        lines = iter_selected_output(
+            args, project_dir, matcher, lister=lister, budget=budget
+        )
+        write_output(project_dir / args.output, lines)
+    except OSError as e:
+        error = str(e)
+    except Exception as e:  # one broken root must not stop the batch
+        error = f"{type(e).__name__}: {e}"
+    else:
+        stopped = None if budget is None else budget.exceeded
+        return BatchResult(
+            root, lister.entries, time.perf_counter() - started, stopped=stopped
+        )
+    return BatchResult(root, lister.entries, time.perf_counter() - started, error)
+
+
+def format_result(result: BatchResult) -> str:
+    if result.error is not None:
+        return f"FAILED {result.root}: {result.error}"
+    summary = f"{result.root}: {result.entries:,} entries in {result.seconds:.2f}s"
+    if result.stopped is not None:
+        return f"partial {summary} (stopped by {result.stopped})"
+    return f"ok     {summary}"
+
+
+def run_batch(args: argparse.Namespace) -> int:
+    """Scans every root given to the command line; returns the exit status."""
+    if args.watch or args.cache or args.stats or args.dry_run:
+        print(
+            "Error: --watch, --cache, --stats and --dry-run cannot be used "
+            "in batch mode",
+            file=sys.stderr,
+        )
+        return 1
+    if args.source != "filesystem" or args.output == "-":
+        print(
+            "Error: batch mode only supports --source filesystem and an output file",
+            file=sys.stderr,
+        )
+        return 1
+
+    roots: List[str] = list(args.path)
+    if args.roots_from is not None:
+        try:
+            if args.roots_from == "-":
+                roots.extend(read_roots(sys.stdin))
+            else:
+                with open(args.roots_from, "r", encoding="utf-8") as f:
+                    roots.extend(read_roots(f))
+        except OSError as e:
+            print(f"Error: cannot read {args.roots_from}: {e}", file=sys.stderr)
+            return 1
+
+    jobs = args.jobs or os.cpu_count() or 1
+    jobs = min(jobs, len(roots)) or 1
+    worker = partial(scan_root, args=args)
+    started = time.perf_counter()
+    failed = 0
+    stopped = 0
+    entries = 0
+
+    pool = ProcessPoolExecutor(max_workers=jobs) if jobs > 1 else nullcontext()
+    with pool as executor:
+        results = (
+            map(worker, roots) if executor is None else executor.map(worker, roots)
+        )
+        for result in results:
+            entries += result.entries
+            if result.error is not None:
+                failed += 1
+                print(format_result(result), file=sys.stderr)
+            elif result.stopped is not None:
+                stopped += 1
+                print(format_result(result), file=sys.stderr)
+            elif not args.quiet:
+                print(format_result(result))
+
+    if not args.quiet:
+        summary = (
+            f"Scanned {len(roots):,} roots ({entries:,} entries) in "
+            f"{time.perf_counter() - started:.2f}s, {failed:,} failed"
+        )
+        if stopped:
+            summary += f", {stopped:,} partial"
+        print(summary)
+    if failed:
+        return 1
+    return PARTIAL_EXIT_STATUS if stopped else 0
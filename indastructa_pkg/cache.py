@@ -0,0 +1,232 @@
+"""
+Persistent scan cache for incremental runs.
+
+Each directory's filtered, sorted listing is stored together with the
+directory's mtime and inode. A directory only changes its mtime when entries
+are added, removed or renamed in it, so on the next run every directory whose
+mtime and inode are unchanged is served from the cache instead of being listed.
+Listings also record the signature of the .gitignore rules they were filtered
+with, so editing a .gitignore file invalidates the directories below it.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+from indastructa_pkg.cli import (
+    DirectoryLister,
+    OmittedEntries,
+    _get_sorted_directory_items,
+)
+from indastructa_pkg.matcher import PatternMatcher
+
+CACHE_VERSION = 4
+
+# A directory modified this close to the start of the run may be modified
+# again within the same mtime tick, so its listing is not stored.
+RACY_WINDOW_NS = 2_000_000_000
+
+_KIND_DIR = "d"
+_KIND_FILE = "f"
+_KIND_OTHER = "o"
+# The summary of a listing cut down by --max-entries-per-dir, stored with
+# the number of directories and files it stands for.
+_KIND_OMITTED = "m"
+
+
+class CachedEntry:
+    """
+    A directory entry restored from the cache.
+
+    Provides the parts of the os.DirEntry interface the traversal uses, so
+    cached and freshly listed entries can be mixed in one walk.
+    """
+
+    __slots__ = ("name", "path", "_kind", "_stat")
+
+    def __init__(self, path: str, name: str, kind: str) -> None:
+        self.path = path
+        self.name = name
+        self._kind = kind
+        self._stat: Optional[os.stat_result] = None
+
+    def is_dir(self, follow_symlinks: bool = True) -> bool:
+        if not follow_symlinks and self.is_symlink():
+            return False
+        return self._kind.lower() == _KIND_DIR
+
+    def is_file(self, follow_symlinks: bool = True) -> bool:
+        if not follow_symlinks and self.is_symlink():
+            return False
+        return self._kind.lower() == _KIND_FILE
+
+    def is_symlink(self) -> bool:
+        return self._kind.isupper()
+
+    def stat(self, follow_symlinks: bool = True) -> os.stat_result:
+        if not follow_symlinks:
+            return os.stat(self.path, follow_symlinks=False)
+        if self._stat is None:
+            self._stat = os.stat(self.path)
+        return self._stat
+
+    def __fspath__(self) -> str:
+        return self.path
+
+    def __repr__(self) -> str:
+        return f"<CachedEntry {self.name!r}>"
+
+
+def _entry_kind(entry: os.DirEntry) -> str:
+    """The kind of what an entry points to; upper case for symlinks."""
+    if entry.is_dir():
+        kind = _KIND_DIR
+    elif entry.is_file():
+        kind = _KIND_FILE
+    else:
+        kind = _KIND_OTHER
+    return kind.upper() if entry.is_symlink() else kind
+
+
+def _stored_entry(entry: os.DirEntry) -> list:
+    if isinstance(entry, OmittedEntries):
+        return [entry.name, _KIND_OMITTED, entry.directories, entry.files]
+    return [entry.name, _entry_kind(entry)]
+
+
+def _restore_entry(path: str, item: list) -> os.DirEntry:
+    name, kind = item[0], item[1]
+    if kind == _KIND_OMITTED:
+        return OmittedEntries(path, item[2], item[3])
+    return CachedEntry(os.path.join(path, name), name, kind)
+
+
+def patterns_fingerprint(
+    matcher: PatternMatcher, max_depth: int, max_entries: Optional[int] = None
+) -> str:
+    """Identifies the settings a cached listing is only valid for."""
+    settings = {
+        "exclude": sorted(matcher.exclude_patterns),
+        "include": sorted(matcher.include_patterns),
+        "depth": max_depth,
+        "max_entries": max_entries,
+    }
+    encoded = json.dumps(settings, sort_keys=True).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class ScanCache:
+    """
+    Serves directory listings from disk when a directory has not changed.
+
+    Use ``list_directory`` as the traversal's lister, then call ``save``.
+    Only the directories visited during the run are written back, so entries
+    for deleted directories are dropped.
+    """
+
+    def __init__(
+        self,
+        cache_file: Path,
+        root: Path,
+        fingerprint: str,
+        base_lister: Optional[DirectoryLister] = None,
+    ) -> None:
+        self.base_lister = base_lister or _get_sorted_directory_items
+        self.cache_file = cache_file
+        self.root = os.fspath(root)
+        self.fingerprint = fingerprint
+        self.hits = 0
+        self.misses = 0
+        self._stored: Dict[str, list] = {}
+        self._visited: Dict[str, list] = {}
+        self._lock = threading.Lock()
+        self._racy_after_ns = time.time_ns() - RACY_WINDOW_NS
+
+    @classmethod
+    def load(
+        cls,
+        cache_file: Path,
+        root: Path,
+        matcher: PatternMatcher,
+        max_depth: int,
+        base_lister: Optional[DirectoryLister] = None,
+        max_entries: Optional[int] = None,
+    ) -> "ScanCache":
+        """Opens the cache file, ignoring it if it is unreadable or stale."""
+        fingerprint = patterns_fingerprint(matcher, max_depth, max_entries)
+        cache = cls(cache_file, root, fingerprint, base_lister)
+        try:
+            with cache_file.open("r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return cache
+
+        if (
+            isinstance(data, dict)
+            and data.get("version") == CACHE_VERSION
+            and data.get("fingerprint") == cache.fingerprint
+            and data.get("root") == cache.root
+        ):
+            cache._stored = data.get("directories", {})
+        return cache
+
+    def _key(self, path: str) -> str:
+        if path == self.root:
+            return ""
+        return path[len(self.root) + 1 :]
+
+    def list_directory(
+        self, root_path: Union[Path, os.DirEntry], matcher: PatternMatcher
+    ) -> List[os.DirEntry]:
+        """Drop-in replacement for _get_sorted_directory_items."""
+        path = os.fspath(root_path)
+        try:
+            stat = root_path.stat()
+        except OSError:
+            return self.base_lister(root_path, matcher)
+
+        key = self._key(path)
+        record = self._stored.get(key)
+        if (
+            record is not None
+            and record[0] == stat.st_mtime_ns
+            and record[1] == stat.st_ino
+            and record[3] == matcher.rules_signature
+        ):
+            with self._lock:
+                self.hits += 1
+                self._visited[key] = record
+            return [_restore_entry(path, item) for item in record[2]]
+
+        items = self.base_lister(root_path, matcher)
+        with self._lock:
+            self.misses += 1
+            if stat.st_mtime_ns < self._racy_after_ns:
+                self._visited[key] = [
+                    stat.st_mtime_ns,
+                    stat.st_ino,
+                    [_stored_entry(item) for item in items],
+                    matcher.rules_signature,
+                ]
+        return items
+
+    def save(self) -> None:
+        """
+        Writes the listings seen during this run to the cache file.
+
+        The file is rewritten in place rather than replaced, so that saving the
+        cache does not change the mtime of the directory it lives in. A file
+        left truncated by a crash is simply ignored by the next ``load``.
+        """
+        data = {
+            "version": CACHE_VERSION,
+            "fingerprint": self.fingerprint,
+            "root": self.root,
+            "directories": self._visited,
+        }
+        with self.cache_file.open("w", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
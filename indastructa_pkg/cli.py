@@ -1,12 +1,42 @@
-import argparse
-import fnmatch
+import heapq
+import io
+import os
+import time
+from contextlib import ExitStack, nullcontext
+from functools import partial
+from itertools import chain
 from pathlib import Path
-from typing import Set, List
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    TextIO,
+    Tuple,
+    Union,
+)
 import sys
 
+from indastructa_pkg.gitignore import GitIgnoreMatcher
+from indastructa_pkg.matcher import PatternMatcher
+
+if TYPE_CHECKING:
+    import argparse
+    from concurrent.futures import Executor
+
+    from indastructa_pkg.sizes import DirectoryTotals
+    from indastructa_pkg.stats import ScanStats
+
 # --- Global Constants ---
 PROJECT_DIR: Path = Path.cwd()
 OUTPUT_FILENAME: Path = Path("project_structure.txt")
+CACHE_FILENAME: Path = Path(".indastructa_cache.json")
+WRITE_BUFFER_SIZE: int = 1 << 20
+# Exit status of a run whose output is partial (--max-total-entries, --time-budget).
+PARTIAL_EXIT_STATUS: int = 3
 
 # Base set of files and directories to ignore.
 EXCLUDE_SET: Set[str] = {
@@ -48,6 +78,7 @@ Examples:
     indastructa -o structure.txt     # Custom output (default: {OUTPUT_FILENAME.name})
     indastructa --quiet              # Suppress console output
     indastructa --dry-run            # Preview only, no file created
+    indastructa --format ndjson -o - # One JSON record per entry, streamed to stdout
 
   Filtering:
     indastructa --depth 2            # Limit scan depth (default: unlimited)
@@ -58,6 +89,26 @@ Examples:
     indastructa --include ".env,.secrets,*.log"
                                      # Force include multiple patterns
 
+  Performance:
+    indastructa --jobs 8             # List directories in parallel (network filesystems)
+    indastructa --cache              # Reuse listings of unchanged directories
+    indastructa --watch -q           # Keep the output file up to date as files change
+    indastructa --source git-index   # List tracked files from .git/index (no directory walk)
+    indastructa --follow-symlinks    # Walk symlinked directories (loops are detected)
+    indastructa --one-file-system    # Stay on the filesystem of the scanned directory
+    indastructa --max-entries-per-dir 100
+                                     # Summarize huge directories after 100 entries
+    indastructa --stats -q           # Print counters and phase timings to stderr
+    indastructa --sizes              # Sizes of files, totals of directories (like du)
+    indastructa --time-budget 60 -q  # Stop after 60 s, keep what was scanned (exit status 3)
+    indastructa --roots-from repos.txt -q
+                                     # Batch mode: scan many roots on a process pool
+    indastructa --diff old_structure.txt
+                                     # Paths added, removed or changed since a saved file
+    indastructa --snapshot build.idx # Save the scan as a compact binary snapshot
+    indastructa --from-snapshot build.idx --format ndjson
+                                     # Render a snapshot without touching the filesystem
+
   Combined:
     indastructa ./src --depth 3 --exclude "*.pyc" --include ".env" -q -o out.txt
 
@@ -101,116 +152,829 @@ def get_patterns_from_ignore_files(
 
 
 def is_excluded(
-    path: Path, exclude_patterns: Set[str], include_patterns: Set[str]
+    path: Union[Path, os.DirEntry],
+    exclude_patterns: Set[str],
+    include_patterns: Set[str],
+    stats: Optional["ScanStats"] = None,
 ) -> bool:
     """
     Checks if a given path should be excluded based on include and exclude patterns.
     Include patterns have higher priority.
+
+    This compiles the patterns on every call; build a PatternMatcher once when
+    checking many paths against the same patterns.
+    """
+    if stats is not None:
+        stats.pattern_evaluations += 1
+    return PatternMatcher(exclude_patterns, include_patterns).is_excluded(path.name)
+
+
+def _entry_sort_key(entry: os.DirEntry) -> tuple:
+    """Sorts directories (and anything that is not a regular file) first, then by name."""
+    return entry.is_file(), entry.name.lower()
+
+
+class OmittedEntries:
+    """
+    Stands in for the entries left out of a directory by --max-entries-per-dir.
+
+    It is listed after the entries that are shown, and its name is the summary
+    line, so it renders (and caches) like a file.
     """
-    for pattern in include_patterns:
-        if fnmatch.fnmatch(path.name, pattern):
-            return False
 
-    for pattern in exclude_patterns:
-        if fnmatch.fnmatch(path.name, pattern):
+    __slots__ = ("name", "path", "directories", "files")
+
+    def __init__(self, parent_path: str, directories: int, files: int) -> None:
+        self.directories = directories
+        self.files = files
+        parts = []
+        if directories:
+            plural = "directory" if directories == 1 else "directories"
+            parts.append(f"{directories:,} more {plural}")
+        if files:
+            parts.append(f"{files:,} more {'file' if files == 1 else 'files'}")
+        self.name = f"... {' and '.join(parts)}"
+        self.path = os.path.join(parent_path, self.name)
+
+    def is_dir(self, follow_symlinks: bool = True) -> bool:
+        return False
+
+    def is_file(self, follow_symlinks: bool = True) -> bool:
+        return True
+
+    def is_symlink(self) -> bool:
+        return False
+
+    def __fspath__(self) -> str:
+        return self.path
+
+    def __repr__(self) -> str:
+        return f"<OmittedEntries {self.name!r}>"
+
+
+class UnscannedEntries(OmittedEntries):
+    """
+    Stands in for the entries of a directory that a scan stopped by
+    --max-total-entries or --time-budget did not reach, e.g.
+    ``... 2 more directories and 5 more files not scanned (--time-budget reached)``.
+    """
+
+    __slots__ = ("limit",)
+
+    def __init__(
+        self, parent_path: str, directories: int, files: int, limit: str
+    ) -> None:
+        super().__init__(parent_path, directories, files)
+        self.limit = limit
+        self.name = f"{self.name} not scanned ({limit} reached)"
+        self.path = os.path.join(parent_path, self.name)
+
+    def __repr__(self) -> str:
+        return f"<UnscannedEntries {self.name!r}>"
+
+
+class ScanBudget:
+    """
+    The limits of --max-total-entries and --time-budget for one scan.
+
+    The walk charges it for every entry before yielding it. Once a limit is
+    reached, the walk marks what it did not reach and stops, and ``exceeded``
+    names the option whose limit it was.
+    """
+
+    __slots__ = ("max_entries", "deadline", "entries", "exceeded")
+
+    def __init__(
+        self, max_entries: Optional[int] = None, seconds: Optional[float] = None
+    ) -> None:
+        self.max_entries = max_entries
+        self.deadline = None if seconds is None else time.monotonic() + seconds
+        self.entries = 0
+        self.exceeded: Optional[str] = None
+
+    def charge(self) -> bool:
+        """Counts one more entry; returns False if that is over a limit."""
+        if self.max_entries is not None and self.entries >= self.max_entries:
+            self.exceeded = "--max-total-entries"
+        elif self.deadline is not None and time.monotonic() >= self.deadline:
+            self.exceeded = "--time-budget"
+        else:
+            self.entries += 1
             return True
+        return False
+
+
+class LabeledEntry:
+    """
+    An entry shown with more than its name: a symlink with its target, or a
+    directory that --follow-symlinks already walked.
+
+    The walk yields it in place of the original entry, whose interface it
+    keeps; ``label`` is the text of its line.
+    """
+
+    __slots__ = ("entry", "name", "path", "label", "target")
+
+    def __init__(self, entry: os.DirEntry, label: str, target: Optional[str]) -> None:
+        self.entry = entry
+        self.name = entry.name
+        self.path = entry.path
+        self.label = label
+        self.target = target
+
+    def is_dir(self, follow_symlinks: bool = True) -> bool:
+        return self.entry.is_dir(follow_symlinks=follow_symlinks)
 
-    return False
+    def is_file(self, follow_symlinks: bool = True) -> bool:
+        return self.entry.is_file(follow_symlinks=follow_symlinks)
+
+    def is_symlink(self) -> bool:
+        return self.target is not None
+
+    def stat(self, follow_symlinks: bool = True) -> os.stat_result:
+        return self.entry.stat(follow_symlinks=follow_symlinks)
+
+    def __fspath__(self) -> str:
+        return self.path
+
+    def __repr__(self) -> str:
+        return f"<LabeledEntry {self.label!r}>"
+
+
+def entry_label(entry: os.DirEntry) -> str:
+    """The text shown for an entry: its ``label`` if it has one, else its name."""
+    return getattr(entry, "label", None) or entry.name
+
+
+def _read_link(entry: os.DirEntry) -> str:
+    try:
+        return os.readlink(entry.path)
+    except OSError:
+        return "?"
+
+
+def _directory_key(path: Union[Path, os.DirEntry]) -> Optional[Tuple[int, int]]:
+    """The (st_dev, st_ino) of a directory, following symlinks."""
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return st.st_dev, st.st_ino
+
+
+def _is_mount_point(entry: os.DirEntry, device: Optional[int]) -> bool:
+    """
+    Whether a directory is on another filesystem than ``device``, the root's.
+
+    The stat is the one DirEntry caches, which --follow-symlinks and
+    --metadata use as well, so it is made at most once per directory.
+    """
+    if device is None:
+        return False
+    try:
+        return entry.stat().st_dev != device
+    except OSError:
+        return False
+
+
+def _mount_point_entry(entry: os.DirEntry) -> LabeledEntry:
+    """The entry of a mount point --one-file-system shows but does not walk."""
+    if type(entry) is LabeledEntry:
+        return LabeledEntry(entry.entry, f"{entry.label} (mount point)", entry.target)
+    return LabeledEntry(entry, f"{entry.name}/ (mount point)", None)
+
+
+def _label_entry(
+    entry: os.DirEntry,
+    is_dir: bool,
+    visited: Optional[set],
+    read_link: Callable[[os.DirEntry], str] = _read_link,
+) -> Tuple[os.DirEntry, bool]:
+    """
+    Decides how the walk shows a symlink or, with ``visited`` (the
+    directories walked so far, when following symlinks), a directory.
+
+    Returns the entry to yield and whether to descend into it, which is also
+    whether it is shown as a directory. ``read_link`` returns a link's target.
+    """
+    is_link = entry.is_symlink()
+    if not is_link and (visited is None or not is_dir):
+        return entry, is_dir
+    target = read_link(entry) if is_link else None
+    label = f"{entry.name} -> {target}" if is_link else entry.name
+    if not is_dir:
+        return LabeledEntry(entry, label, target), False
+    if visited is None:
+        # Symlinks are shown, not followed.
+        return LabeledEntry(entry, label, target), False
+    key = _directory_key(entry)
+    if key in visited:
+        suffix = "" if is_link else "/"
+        return LabeledEntry(entry, f"{label}{suffix} (already shown)", target), False
+    visited.add(key)
+    if is_link:
+        return LabeledEntry(entry, label, target), True
+    return entry, True
+
+
+def _sort_entries(
+    items: list,
+    max_entries: Optional[int] = None,
+    parent_path: Union[Path, os.DirEntry, str] = "",
+) -> list:
+    """
+    Sorts directory entries for output, in place when nothing is left out.
+
+    With ``max_entries``, only that many entries are kept, picked with a heap
+    so the whole directory is never sorted, followed by an OmittedEntries
+    summarizing the rest.
+    """
+    if max_entries is None or len(items) <= max_entries:
+        items.sort(key=_entry_sort_key)
+        return items
+    shown = heapq.nsmallest(max_entries, items, key=_entry_sort_key)
+    hidden_directories = sum(entry.is_dir() for entry in items) - sum(
+        entry.is_dir() for entry in shown
+    )
+    hidden_files = len(items) - len(shown) - hidden_directories
+    shown.append(
+        OmittedEntries(os.fspath(parent_path), hidden_directories, hidden_files)
+    )
+    return shown
 
 
 def _get_sorted_directory_items(
-    root_path: Path, exclude_patterns: Set[str], include_patterns: Set[str]
-) -> List[Path]:
-    """Gets, filters, and sorts items in a directory."""
+    root_path: Union[Path, os.DirEntry],
+    matcher: PatternMatcher,
+    stats: Optional["ScanStats"] = None,
+    max_entries: Optional[int] = None,
+) -> List[os.DirEntry]:
+    """
+    Gets, filters, and sorts items in a directory.
+
+    Uses os.scandir so the file type comes from the directory listing itself
+    (d_type) instead of a separate stat call. DirEntry caches the result of any
+    stat it does need (symlinks, filesystems without d_type), so each entry is
+    stat'ed at most once no matter how often is_file()/is_dir() are called.
+
+    With ``stats``, each step is timed and counted (see --stats). With
+    ``max_entries``, larger directories are cut down (see _sort_entries).
+    """
+    if stats is not None:
+        return _get_sorted_directory_items_with_stats(
+            root_path, matcher, stats, max_entries
+        )
     try:
-        all_path_items = root_path.iterdir()
-        filtered_items = [
-            path
-            for path in all_path_items
-            if not is_excluded(path, exclude_patterns, include_patterns)
-        ]
-        return sorted(filtered_items, key=lambda p: (p.is_file(), p.name.lower()))
+        with os.scandir(root_path) as entries:
+            filtered_items = [entry for entry in entries if not matcher.excludes(entry)]
     except (FileNotFoundError, PermissionError):
         return []
+    return _sort_entries(filtered_items, max_entries, root_path)
+
+
+def _get_sorted_directory_items_with_stats(
+    root_path: Union[Path, os.DirEntry],
+    matcher: PatternMatcher,
+    stats: "ScanStats",
+    max_entries: Optional[int] = None,
+) -> List[os.DirEntry]:
+    """_get_sorted_directory_items, split into timed listing, matching and sorting."""
+    wall, cpu = time.perf_counter(), time.thread_time()
+    permission_error = False
+    try:
+        with os.scandir(root_path) as it:
+            entries = list(it)
+    except FileNotFoundError:
+        entries = []
+    except PermissionError:
+        entries = []
+        permission_error = True
+    now_wall, now_cpu = time.perf_counter(), time.thread_time()
+    stats.add_time("listing", now_wall - wall, now_cpu - cpu)
+
+    wall, cpu = now_wall, now_cpu
+    filtered_items = []
+    excluded_items = []
+    for entry in entries:
+        (excluded_items if matcher.excludes(entry) else filtered_items).append(entry)
+    now_wall, now_cpu = time.perf_counter(), time.thread_time()
+    stats.add_time("matching", now_wall - wall, now_cpu - cpu)
+
+    wall, cpu = now_wall, now_cpu
+    filtered_items = _sort_entries(filtered_items, max_entries, root_path)
+    stats.add_time("sorting", time.perf_counter() - wall, time.thread_time() - cpu)
+
+    excluded = {}
+    for entry in excluded_items:
+        source = stats.exclusion_source(entry.name)
+        excluded[source] = excluded.get(source, 0) + 1
+    pattern_sets = 1 + len(getattr(matcher, "ignore_files", ()))
+    stats.add_listing(len(entries), excluded, permission_error, pattern_sets)
+    return filtered_items
+
+
+# Signature of _get_sorted_directory_items and anything that can stand in for it.
+DirectoryLister = Callable[
+    [Union[Path, os.DirEntry], PatternMatcher], List[os.DirEntry]
+]
+
+
+def _new_frame(
+    entries: List[os.DirEntry],
+    depth: int,
+    matcher: PatternMatcher,
+    max_depth: int,
+    executor: Optional["Executor"],
+    lister: DirectoryLister,
+    follow_symlinks: bool = False,
+    device: Optional[int] = None,
+) -> list:
+    """
+    Builds a traversal frame: [sorted entries, index of the next entry, depth,
+    pending listings, matcher]. With an executor, the listings of all subdirectories
+    that will be descended into are submitted to it right away.
+    """
+    pending = None
+    if executor is not None and (max_depth == -1 or depth + 1 < max_depth):
+        pending = [
+            executor.submit(_list_subdirectory, entry, matcher, lister)
+            if entry.is_dir()
+            and (follow_symlinks or not entry.is_symlink())
+            and not _is_mount_point(entry, device)
+            else None
+            for entry in entries
+        ]
+    return [entries, 0, depth, pending, matcher]
+
+
+def _unscanned_entries(stack: List[list], limit: str) -> Iterator[tuple]:
+    """
+    Yields the walk tuples that close a stopped walk: for every open directory,
+    innermost first, a summary of the entries it did not reach.
+    """
+    for entries, index, depth, _, _ in reversed(stack):
+        rest = entries[index:]
+        if not rest:
+            continue
+        directories = files = 0
+        for entry in rest:
+            if isinstance(entry, OmittedEntries):
+                directories += entry.directories
+                files += entry.files
+            elif entry.is_dir():
+                directories += 1
+            else:
+                files += 1
+        parent_path = os.path.dirname(rest[0].path)
+        yield (
+            depth,
+            UnscannedEntries(parent_path, directories, files, limit),
+            False,
+            True,
+        )
+
+
+def _list_subdirectory(
+    entry: os.DirEntry, matcher: PatternMatcher, lister: DirectoryLister
+) -> Tuple[PatternMatcher, List[os.DirEntry]]:
+    """Lists a subdirectory with the rules that apply inside it."""
+    child_matcher = matcher.for_directory(entry)
+    return child_matcher, lister(entry, child_matcher)
+
+
+def walk_dir_structure(
+    root_path: Union[Path, os.DirEntry],
+    matcher: PatternMatcher,
+    max_depth: int = -1,
+    current_depth: int = 0,
+    executor: Optional["Executor"] = None,
+    lister: Optional[DirectoryLister] = None,
+    follow_symlinks: bool = False,
+    one_file_system: bool = False,
+    budget: Optional[ScanBudget] = None,
+) -> Iterator[Tuple[int, os.DirEntry, bool, bool]]:
+    """
+    Walks the tree depth-first in output order without recursion.
+
+    Yields ``(depth, entry, is_dir, is_last)`` for every entry that is not
+    excluded. An explicit stack holds one sorted listing per open directory,
+    so trees of any depth are handled. Each subdirectory is listed with
+    ``matcher.for_directory(subdirectory)``, which lets per-directory rules
+    such as nested .gitignore files apply to it and everything below it.
+
+    With an ``executor``, sibling directories are listed concurrently while the
+    entries are still yielded in the same order as the serial walk. ``lister``
+    replaces _get_sorted_directory_items, e.g. with a cached listing.
+
+    Symlinks are yielded as LabeledEntry objects showing their target and are
+    not descended into (``is_dir`` is False). With ``follow_symlinks``, links
+    to directories are walked, and every directory's (st_dev, st_ino) is
+    remembered so that each real directory is walked once: a directory seen
+    again, e.g. through a symlink loop, is yielded but not descended into.
+
+    With ``one_file_system``, a directory whose st_dev differs from the root's
+    is a mount point: it is yielded, labeled as one, but not descended into.
+
+    With a ``budget``, every entry is charged to it. When a limit is reached,
+    the walk ends with an UnscannedEntries in every directory left unfinished,
+    and the listings still queued are dropped.
+    """
+    if max_depth != -1 and current_depth >= max_depth:
+        return
+
+    if lister is None:
+        lister = _get_sorted_directory_items
+
+    visited = None
+    if follow_symlinks:
+        visited = {_directory_key(root_path)}
+    device = None
+    if one_file_system:
+        try:
+            device = root_path.stat().st_dev
+        except OSError:
+            pass
+
+    stack = [
+        _new_frame(
+            lister(root_path, matcher),
+            current_depth,
+            matcher,
+            max_depth,
+            executor,
+            lister,
+            follow_symlinks,
+            device,
+        )
+    ]
+    try:
+        while stack:
+            frame = stack[-1]
+            entries, index, depth, pending, matcher = frame
+            if index == len(entries):
+                stack.pop()
+                continue
+            if budget is not None and not budget.charge():
+                yield from _unscanned_entries(stack, budget.exceeded)
+                return
+            frame[1] = index + 1
+
+            entry = entries[index]
+            is_dir = entry.is_dir()
+            if visited is not None or entry.is_symlink():
+                entry, is_dir = _label_entry(entry, is_dir, visited)
+                if not is_dir and pending is not None and pending[index] is not None:
+                    pending[index].cancel()
+                    pending[index] = None
+            if is_dir and _is_mount_point(entry, device):
+                entry, is_dir = _mount_point_entry(entry), False
+            yield depth, entry, is_dir, index == len(entries) - 1
+            if is_dir and (max_depth == -1 or depth + 1 < max_depth):
+                if pending is not None:
+                    child_matcher, children = pending[index].result()
+                    pending[index] = None
+                else:
+                    child_matcher, children = _list_subdirectory(entry, matcher, lister)
+                stack.append(
+                    _new_frame(
+                        children,
+                        depth + 1,
+                        child_matcher,
+                        max_depth,
+                        executor,
+                        lister,
+                        follow_symlinks,
+                        device,
+                    )
+                )
+    finally:
+        # Drop listings that were queued but will never be rendered.
+        for frame in stack:
+            for future in frame[3] or ():
+                if future is not None:
+                    future.cancel()
+
+
+def iter_dir_structure(
+    root_path: Union[Path, os.DirEntry],
+    matcher: PatternMatcher,
+    prefix: str = "",
+    max_depth: int = -1,
+    current_depth: int = 0,
+    executor: Optional["Executor"] = None,
+    lister: Optional[DirectoryLister] = None,
+    follow_symlinks: bool = False,
+    one_file_system: bool = False,
+    budget: Optional[ScanBudget] = None,
+) -> Iterator[str]:
+    """
+    Yields the lines of the directory tree one at a time, in output order.
+
+    Only the sorted listings of the directories on the current path are held
+    in memory. A directory whose subtree yields no lines (empty or cut off by
+    ``max_depth``) is followed by an empty line, as format_dir_structure has
+    always rendered it.
+    """
+    walk = walk_dir_structure(
+        root_path,
+        matcher,
+        max_depth,
+        current_depth,
+        executor,
+        lister,
+        follow_symlinks,
+        one_file_system,
+        budget,
+    )
+    return _iter_tree_lines(walk, prefix, current_depth)
+
+
+def _iter_tree_lines(
+    walk: Iterable[Tuple[int, os.DirEntry, bool, bool]],
+    prefix: str = "",
+    current_depth: int = 0,
+    annotate: Optional[Callable[[os.DirEntry], str]] = None,
+) -> Iterator[str]:
+    """
+    Renders the ``(depth, entry, is_dir, is_last)`` tuples of a walk as lines.
+
+    ``annotate`` returns text appended to an entry's line, e.g. its size.
+    """
+    # prefixes[level] is the indentation shared by every line at that level,
+    # built once per directory from its parent's prefix.
+    prefixes = [prefix]
+    open_dir_level = None
+    for depth, entry, is_dir, is_last in walk:
+        level = depth - current_depth
+        if open_dir_level is not None and level <= open_dir_level:
+            yield ""
+        open_dir_level = level if is_dir else None
+
+        line_prefix = prefixes[level]
+        connector = "  +-- " if is_last else "  |-- "
+        label = entry_label(entry)
+        note = "" if annotate is None else annotate(entry)
+        yield f"{line_prefix}{connector}{label}{'/' if is_dir else ''}{note}"
+        if is_dir:
+            del prefixes[level + 1 :]
+            prefixes.append(line_prefix + ("      " if is_last else "  |   "))
+
+    if open_dir_level is not None:
+        yield ""
 
 
 def format_dir_structure(
-    root_path: Path,
-    exclude_patterns: Set[str],
-    include_patterns: Set[str],
+    root_path: Union[Path, os.DirEntry],
+    exclude_patterns: Optional[Set[str]] = None,
+    include_patterns: Optional[Set[str]] = None,
     prefix: str = "",
     max_depth: int = -1,
     current_depth: int = 0,
+    matcher: Optional[PatternMatcher] = None,
+    follow_symlinks: bool = False,
+    one_file_system: bool = False,
 ) -> str:
     """
-    Recursively builds a string representation of a directory structure.
+    Builds a string representation of a directory structure.
+
+    Pass either the raw exclude/include pattern sets or a prebuilt ``matcher``.
+    For large trees prefer iter_dir_structure, which does not hold the whole
+    result in memory.
     """
-    if max_depth != -1 and current_depth >= max_depth:
-        return ""
-
-    sorted_items = _get_sorted_directory_items(
-        root_path, exclude_patterns, include_patterns
-    )
-
-    parts = []
-    # Process all items except the last one
-    for item in sorted_items[:-1]:
-        item_display_name = f"{item.name}{'/' if item.is_dir() else ''}"
-        parts.append(f"{prefix}  |-- {item_display_name}")
-        if item.is_dir():
-            parts.append(
-                format_dir_structure(
-                    item,
-                    exclude_patterns,
-                    include_patterns,
-                    prefix + "  |   ",
-                    max_depth,
-                    current_depth + 1,
-                )
-            )
+    if matcher is None:
+        matcher = PatternMatcher(exclude_patterns or (), include_patterns or ())
 
-    # Process the last item separately
-    if sorted_items:
-        last_item = sorted_items[-1]
-        item_display_name = f"{last_item.name}{'/' if last_item.is_dir() else ''}"
-        parts.append(f"{prefix}  +-- {item_display_name}")
-        if last_item.is_dir():
-            parts.append(
-                format_dir_structure(
-                    last_item,
-                    exclude_patterns,
-                    include_patterns,
-                    prefix + "      ",
-                    max_depth,
-                    current_depth + 1,
-                )
+    return "\n".join(
+        iter_dir_structure(
+            root_path,
+            matcher,
+            prefix,
+            max_depth,
+            current_depth,
+            follow_symlinks=follow_symlinks,
+            one_file_system=one_file_system,
+        )
+    )
+
+
+def iter_output_lines(
+    project_dir: Path,
+    matcher: PatternMatcher,
+    max_depth: int = -1,
+    executor: Optional["Executor"] = None,
+    lister: Optional[DirectoryLister] = None,
+    follow_symlinks: bool = False,
+    one_file_system: bool = False,
+    budget: Optional[ScanBudget] = None,
+) -> Iterator[str]:
+    """Yields every line of the output file: the root header, then the tree."""
+    yield f"{project_dir.name}/"
+    has_lines = False
+    for line in iter_dir_structure(
+        project_dir,
+        matcher,
+        max_depth=max_depth,
+        executor=executor,
+        lister=lister,
+        follow_symlinks=follow_symlinks,
+        one_file_system=one_file_system,
+        budget=budget,
+    ):
+        has_lines = True
+        yield line
+    if not has_lines:
+        yield ""
+
+
+class ReplacingFile(io.RawIOBase):
+    """
+    A write-only file that replaces ``path`` only if its content changes.
+
+    Written bytes are compared with the existing file as they arrive. At the
+    first difference a temporary file is created next to ``path``, the
+    matching prefix is copied into it, and everything else goes there too.
+    ``commit()`` fsyncs the temporary file and renames it over ``path``, so
+    readers see either the old file or the new one, never a truncated mix.
+    If the content is the same, the old file is read in full but it and its
+    directory are left untouched. Closing without ``commit()`` discards the
+    temporary file.
+    """
+
+    def __init__(self, path: Path) -> None:
+        super().__init__()
+        self.path = Path(os.path.realpath(path))
+        self.size = 0
+        self._temp: Optional[io.BufferedWriter] = None
+        self._temp_name: Optional[str] = None
+        try:
+            self._old: Optional[io.BufferedReader] = open(
+                self.path, "rb", buffering=WRITE_BUFFER_SIZE
             )
+        except FileNotFoundError:
+            self._old = None
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        length = len(data)
+        if self._old is not None:
+            if self._old.read(length) == data:
+                self.size += length
+                return length
+            self._diverge()
+        elif self._temp is None:
+            self._open_temp()
+        self._temp.write(data)
+        self.size += length
+        return length
+
+    def _open_temp(self) -> None:
+        import tempfile
+
+        fd, self._temp_name = tempfile.mkstemp(
+            prefix=f".{self.path.name}.", suffix=".tmp", dir=self.path.parent
+        )
+        self._temp = open(fd, "wb")
 
-    return "\n".join(parts)
+    def _diverge(self) -> None:
+        """Moves the bytes that matched so far into a new temporary file."""
+        old, self._old = self._old, None
+        try:
+            self._open_temp()
+            old.seek(0)
+            remaining = self.size
+            while remaining:
+                chunk = old.read(min(remaining, WRITE_BUFFER_SIZE))
+                self._temp.write(chunk)
+                remaining -= len(chunk)
+        finally:
+            old.close()
 
+    def commit(self) -> bool:
+        """Puts the new content in place; returns False if it was unchanged."""
+        if self._old is not None:
+            if not self._old.read(1):
+                self._old.close()
+                self._old = None
+                return False
+            self._diverge()  # the new content is a prefix of the old one
+        elif self._temp is None:
+            self._open_temp()
 
-def write_structure_to_file(output_file: Path, content: str) -> None:
-    """Writes the directory structure to a file."""
+        self._temp.flush()
+        os.fsync(self._temp.fileno())
+        self._temp.close()
+        try:
+            mode = os.stat(self.path).st_mode & 0o7777
+        except FileNotFoundError:
+            umask = os.umask(0)
+            os.umask(umask)
+            mode = 0o666 & ~umask
+        os.chmod(self._temp_name, mode)
+        os.replace(self._temp_name, self.path)
+        self._temp_name = None
+        return True
+
+    def close(self) -> None:
+        if self._old is not None:
+            self._old.close()
+        if self._temp is not None:
+            self._temp.close()
+        if self._temp_name is not None:
+            os.unlink(self._temp_name)
+            self._temp_name = None
+        super().close()
+
+
+def write_output(
+    output_file: Path,
+    content: Union[str, Iterable[str]],
+    echo: Optional[TextIO] = None,
+    stats: Optional["ScanStats"] = None,
+) -> bool:
+    """
+    Writes ``content`` to ``output_file`` through a ReplacingFile.
+
+    ``content`` is either the complete text or an iterable of lines, which are
+    written (each followed by a newline) as they are produced. Lines are also
+    copied to ``echo`` when given. With ``stats``, rendering and writing are
+    timed and the bytes written are counted. Returns False when the file
+    already had this content and was left alone; OSError is raised as is.
+    """
+    raw = ReplacingFile(output_file)
+    buffered = io.BufferedWriter(raw, WRITE_BUFFER_SIZE)
+    with io.TextIOWrapper(buffered, encoding="utf-8") as f:
+        if isinstance(content, str):
+            f.write(content)
+            if echo is not None:
+                echo.write(content)
+        elif stats is not None:
+            for batch in stats.batches(content):
+                with stats.phase("writing"):
+                    text = "".join(f"{line}\n" for line in batch)
+                    f.write(text)
+                    if echo is not None:
+                        echo.write(text)
+        else:
+            for line in content:
+                f.write(line)
+                f.write("\n")
+                if echo is not None:
+                    echo.write(line)
+                    echo.write("\n")
+        f.flush()
+        changed = raw.commit()
+    if stats is not None:
+        stats.bytes_written += raw.size
+    return changed
+
+
+def write_structure_to_file(
+    output_file: Path,
+    content: Union[str, Iterable[str]],
+    echo: Optional[TextIO] = None,
+    stats: Optional["ScanStats"] = None,
+) -> bool:
+    """
+    Writes the directory structure to a file, see write_output.
+
+    Returns False if the file already held this structure.
+    """
     try:
-        output_file.write_text(content, encoding="utf-8")
+        return write_output(output_file, content, echo=echo, stats=stats)
     except IOError as e:
         print(f"Error writing to file {output_file}: {e}", file=sys.stderr)
         sys.exit(1)
 
 
-def parse_cli_args() -> argparse.Namespace:
+def parse_cli_args() -> "argparse.Namespace":
     """Parses command-line arguments."""
-    parser = argparse.ArgumentParser(
+    import argparse
+
+    class ArgumentParser(argparse.ArgumentParser):
+        def format_help(self) -> str:
+            # The examples are only built when the help is shown.
+            self.epilog = get_cli_examples()
+            return super().format_help()
+
+    parser = ArgumentParser(
         description="Generate ASCII tree representation of a project structure.",
         add_help=True,
         formatter_class=argparse.RawTextHelpFormatter,
-        epilog=get_cli_examples(),
     )
     parser.add_argument(
         "path",
-        nargs="?",
+        nargs="*",
+        help="The path to the directory to scan. Defaults to the current directory.\n"
+        "Several paths are scanned in batch mode, each into its own output file.",
+    )
+    parser.add_argument(
+        "--roots-from",
         default=None,
-        help="The path to the directory to scan. Defaults to the current directory.",
+        metavar="FILE",
+        help="Batch mode: read the directories to scan from FILE, one per line\n"
+        "(- for stdin).",
     )
     parser.add_argument("--depth", type=int, default=-1, help="Maximum depth to scan.")
     parser.add_argument(
@@ -227,17 +991,133 @@ def parse_cli_args() -> argparse.Namespace:
         default=[],
         help="Files or directories to force include, even if they are in .gitignore.",
     )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=None,
+        help="Number of directories to list in parallel (useful on network filesystems).\n"
+        "In batch mode, the number of roots scanned in parallel processes\n"
+        "(default: one per CPU).",
+    )
+    parser.add_argument(
+        "--max-entries-per-dir",
+        type=int,
+        default=None,
+        metavar="N",
+        help="Show at most N entries per directory and summarize the rest.",
+    )
+    parser.add_argument(
+        "--max-total-entries",
+        type=int,
+        default=None,
+        metavar="N",
+        help="Stop the scan after N entries. What was scanned is written, with\n"
+        "a '... not scanned' line wherever the tree was cut off, and the\n"
+        f"exit status is {PARTIAL_EXIT_STATUS}.",
+    )
+    parser.add_argument(
+        "--time-budget",
+        type=float,
+        default=None,
+        metavar="SECONDS",
+        help="Stop the scan after SECONDS, like --max-total-entries.",
+    )
+    parser.add_argument(
+        "--follow-symlinks",
+        action="store_true",
+        help="Descend into symlinked directories, walking each real directory\n"
+        "once. By default symlinks are shown as 'name -> target'.",
+    )
+    parser.add_argument(
+        "--one-file-system",
+        action="store_true",
+        help="Do not descend into directories on other filesystems (mount\n"
+        "points), like du -x. They are shown as 'name/ (mount point)'.",
+    )
+    parser.add_argument(
+        "--source",
+        choices=("filesystem", "git-index"),
+        default="filesystem",
+        help="Where to read the tree from: the working tree (default) or the\n"
+        "tracked files recorded in the repository's .git/index.",
+    )
+    parser.add_argument(
+        "--cache",
+        nargs="?",
+        const=str(CACHE_FILENAME.name),
+        default=None,
+        metavar="FILE",
+        help="Reuse listings of unchanged directories from a cache file\n"
+        f"(default file: {CACHE_FILENAME.name}).",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Keep running and update the output whenever the tree changes.",
+    )
+    parser.add_argument(
+        "--watch-interval",
+        type=float,
+        default=None,
+        metavar="SECONDS",
+        help="How often --watch polls for changes (default: 0.25).",
+    )
+    parser.add_argument(
+        "--format",
+        choices=("text", "json", "ndjson"),
+        default="text",
+        help="Output format: the ASCII tree (default), one JSON document, or\n"
+        "one JSON record per line, streamed as the tree is walked.",
+    )
+    parser.add_argument(
+        "--sizes",
+        action="store_true",
+        help="Show each file's size and each directory's total size and file\n"
+        "count (hard links are counted once).",
+    )
+    parser.add_argument(
+        "--metadata",
+        action="store_true",
+        help="Add size and mtime to --format json/ndjson records.",
+    )
+    parser.add_argument(
+        "--diff",
+        nargs="+",
+        metavar="FILE",
+        help="Print the paths added, removed or changed in type since a saved\n"
+        "structure file, instead of writing one. With two files, compare\n"
+        "them without scanning. Snapshots (--snapshot) are read too.",
+    )
+    parser.add_argument(
+        "--snapshot",
+        metavar="FILE",
+        help="Save the scan to FILE as a compact binary snapshot instead of\n"
+        "writing the output file (with --metadata: sizes and mtimes too).",
+    )
+    parser.add_argument(
+        "--from-snapshot",
+        metavar="FILE",
+        help="Render a snapshot in --format without scanning; written to\n"
+        "stdout unless -o is given.",
+    )
     parser.add_argument(
         "-o",
         "--output",
-        default=str(OUTPUT_FILENAME.name),
-        help="Name of the output file.",
+        default=None,
+        help=f"Name of the output file (default: {OUTPUT_FILENAME.name}, or\n"
+        "project_structure.json/.ndjson for those formats). Use - for stdout.",
     )
     parser.add_argument(
         "--dry-run",
         action="store_true",
         help="Perform a trial run without writing the output file.",
     )
+    parser.add_argument(
+        "--stats",
+        action="store_true",
+        help="Print counters and per-phase timings to stderr after the tree.",
+    )
     parser.add_argument(
         "-q",
         "--quiet",
@@ -247,64 +1127,544 @@ def parse_cli_args() -> argparse.Namespace:
     return parser.parse_args()
 
 
+def split_pattern_args(values: List[List[str]]) -> List[str]:
+    """
+    Flattens the list of lists that argparse creates for --exclude/--include
+    (action='append') and splits each value on commas.
+    """
+    return [
+        item.strip() for sublist in values for arg in sublist for item in arg.split(",")
+    ]
+
+
+def assemble_patterns(
+    args: "argparse.Namespace", project_dir: Path
+) -> Tuple[Set[str], Set[str], List[Tuple[str, Set[str]]]]:
+    """
+    Collects the exclude and include patterns for one scanned directory.
+
+    Also returns where the exclusions come from, as ``(source, patterns)``
+    pairs in the order --stats credits them.
+    """
+    # .gitignore files (root and nested) are applied with full gitignore
+    # semantics by GitIgnoreMatcher; .dockerignore patterns match entry names.
+    ignore_files = [".dockerignore"]
+    ignore_patterns = get_patterns_from_ignore_files(project_dir, ignore_files)
+    docker_patterns = {p.strip("/") for p in ignore_patterns}
+    exclude_list = set(split_pattern_args(args.exclude))
+    include_list = set(split_pattern_args(args.include))
+
+    default_patterns = EXCLUDE_SET | {
+        args.output,
+        CACHE_FILENAME.name,
+        Path(__file__).name,
+    }
+    if args.cache:
+        default_patterns.add((project_dir / args.cache).name)
+
+    exclude_patterns = default_patterns | docker_patterns | exclude_list
+    sources = [
+        ("defaults", default_patterns),
+        (".dockerignore", docker_patterns),
+        ("--exclude", exclude_list),
+    ]
+    return exclude_patterns, include_list, sources
+
+
 def main() -> None:
     """The main entry point for the script."""
     args = parse_cli_args()
+    started = time.perf_counter()
 
-    if args.path is None:
-        project_dir = Path.cwd()
-    else:
-        project_dir = Path(args.path).resolve()
+    batch = args.roots_from is not None or len(args.path) > 1
+    if not batch:
+        if not args.path:
+            project_dir = Path.cwd()
+        else:
+            project_dir = Path(args.path[0]).resolve()
 
-    if not project_dir.exists():
-        print(f"Error: Provided path does not exist: {project_dir}", file=sys.stderr)
+        if not project_dir.exists():
+            print(
+                f"Error: Provided path does not exist: {project_dir}", file=sys.stderr
+            )
+            sys.exit(1)
+
+        if not project_dir.is_dir():
+            print(f"Error: Path is not a directory: {project_dir}", file=sys.stderr)
+            sys.exit(1)
+
+    if args.jobs is not None and args.jobs < 1:
+        print(f"Error: --jobs must be at least 1, got {args.jobs}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.watch_interval is not None and args.watch_interval <= 0:
+        print("Error: --watch-interval must be greater than 0", file=sys.stderr)
         sys.exit(1)
 
-    if not project_dir.is_dir():
-        print(f"Error: Path is not a directory: {project_dir}", file=sys.stderr)
+    if args.max_entries_per_dir is not None and args.max_entries_per_dir < 1:
+        print(
+            "Error: --max-entries-per-dir must be at least 1, "
+            f"got {args.max_entries_per_dir}",
+            file=sys.stderr,
+        )
         sys.exit(1)
 
+    if args.max_total_entries is not None and args.max_total_entries < 1:
+        print(
+            "Error: --max-total-entries must be at least 1, "
+            f"got {args.max_total_entries}",
+            file=sys.stderr,
+        )
+        sys.exit(1)
+
+    if args.time_budget is not None and args.time_budget <= 0:
+        print("Error: --time-budget must be greater than 0", file=sys.stderr)
+        sys.exit(1)
+
+    if args.sizes and args.max_entries_per_dir is not None:
+        # The totals would leave out every entry the summaries stand for.
+        print(
+            "Error: --sizes cannot be used with --max-entries-per-dir",
+            file=sys.stderr,
+        )
+        sys.exit(1)
+
+    if args.sizes and args.format != "text":
+        print(
+            "Error: --sizes requires --format text (use --metadata for sizes in "
+            "json/ndjson)",
+            file=sys.stderr,
+        )
+        sys.exit(1)
+
+    if args.metadata and args.format == "text" and args.snapshot is None:
+        print(
+            "Error: --metadata requires --format json, --format ndjson or --snapshot",
+            file=sys.stderr,
+        )
+        sys.exit(1)
+
+    if (args.max_total_entries is not None or args.time_budget is not None) and (
+        args.watch or args.diff is not None
+    ):
+        print(
+            "Error: --max-total-entries and --time-budget cannot be used with "
+            "--watch or --diff",
+            file=sys.stderr,
+        )
+        sys.exit(1)
+
+    if args.diff is not None:
+        if len(args.diff) > 2:
+            print("Error: --diff takes one or two files", file=sys.stderr)
+            sys.exit(1)
+        if batch or args.watch or args.sizes or args.format != "text":
+            print(
+                "Error: --diff cannot be used with several roots, --watch, "
+                "--sizes or --format",
+                file=sys.stderr,
+            )
+            sys.exit(1)
+        if len(args.diff) == 2:
+            _print_diff(args)
+            return
+
+    if args.snapshot is not None or args.from_snapshot is not None:
+        if batch or args.watch or args.sizes or args.diff is not None:
+            print(
+                "Error: --snapshot and --from-snapshot cannot be used with several "
+                "roots, --watch, --sizes or --diff",
+                file=sys.stderr,
+            )
+            sys.exit(1)
+        if args.snapshot is not None and args.from_snapshot is not None:
+            print(
+                "Error: --snapshot and --from-snapshot cannot be used together",
+                file=sys.stderr,
+            )
+            sys.exit(1)
+        if args.from_snapshot is not None:
+            _render_snapshot(args)
+            return
+
+    if args.output is None:
+        if args.format == "text":
+            args.output = OUTPUT_FILENAME.name
+        else:
+            from indastructa_pkg.formats import FILE_EXTENSIONS
+
+            extension = FILE_EXTENSIONS[args.format]
+            args.output = OUTPUT_FILENAME.with_suffix(extension).name
+
+    if batch:
+        from indastructa_pkg.batch import run_batch
+
+        sys.exit(run_batch(args))
+
+    if args.jobs is None:
+        args.jobs = 1
+
+    use_git_index = args.source == "git-index"
+    if use_git_index and (args.cache or args.watch):
+        print(
+            "Error: --cache and --watch cannot be used with --source git-index",
+            file=sys.stderr,
+        )
+        sys.exit(1)
+
+    budget = scan_budget(args)
+
     # --- Assemble all exclusion and inclusion patterns ---
-    final_exclude_patterns = EXCLUDE_SET.copy()
-    final_include_patterns = set()
+    setup_wall, setup_cpu = time.perf_counter(), time.thread_time()
+    exclude_patterns, include_patterns, sources = assemble_patterns(args, project_dir)
+    matcher = PatternMatcher(exclude_patterns, include_patterns)
+    if args.cache:
+        cache_file = project_dir / args.cache
 
-    ignore_files = [".gitignore", ".dockerignore"]
-    ignore_patterns = get_patterns_from_ignore_files(project_dir, ignore_files)
-    final_exclude_patterns.update(p.strip("/") for p in ignore_patterns)
+    stats = None
+    listing_options = {}
+    if args.max_entries_per_dir is not None:
+        listing_options["max_entries"] = args.max_entries_per_dir
+    if args.stats:
+        from indastructa_pkg.stats import ScanStats
 
-    # Flatten the list of lists that argparse creates with action='append'
-    flat_excludes = [item for sublist in args.exclude for item in sublist]
-    if flat_excludes:
-        exclude_list = [
-            item.strip() for arg in flat_excludes for item in arg.split(",")
-        ]
-        final_exclude_patterns.update(exclude_list)
+        # Exclusions are credited to the first set that explains them.
+        stats = ScanStats(
+            [(source, PatternMatcher(patterns)) for source, patterns in sources]
+        )
+        listing_options["stats"] = stats
+    lister = None
+    if listing_options:
+        lister = partial(_get_sorted_directory_items, **listing_options)
+    base_lister = lister
 
-    flat_includes = [item for sublist in args.include for item in sublist]
-    if flat_includes:
-        include_list = [
-            item.strip() for arg in flat_includes for item in arg.split(",")
-        ]
-        final_include_patterns.update(include_list)
+    cache = None
+    if use_git_index:
+        from indastructa_pkg.gitindex import GitIndexError, GitIndexTree
+
+        # The index only holds tracked files, so .gitignore rules do not apply.
+        try:
+            tree = GitIndexTree.from_repository(project_dir)
+        except GitIndexError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(1)
+        lister = partial(tree.list_directory, max_entries=args.max_entries_per_dir)
 
-    final_exclude_patterns.add(args.output)
-    final_exclude_patterns.add(Path(__file__).name)
+    if stats is not None:
+        stats.add_time(
+            "ignore_files",
+            time.perf_counter() - setup_wall,
+            time.thread_time() - setup_cpu,
+        )
+    if not use_git_index:
+        # Times its own .gitignore loads, including the nested ones the walk
+        # finds, under ignore_files.
+        matcher = GitIgnoreMatcher.for_root(project_dir, matcher, stats)
+
+    if args.cache:
+        from indastructa_pkg.cache import ScanCache
+
+        cache = ScanCache.load(
+            cache_file,
+            project_dir,
+            matcher,
+            args.depth,
+            base_lister,
+            args.max_entries_per_dir,
+        )
+        lister = cache.list_directory
 
     # --- Generation and Writing ---
-    structure_text = format_dir_structure(
+    if args.jobs > 1 and not use_git_index:
+        from concurrent.futures import ThreadPoolExecutor
+
+        pool = ThreadPoolExecutor(max_workers=args.jobs)
+    else:
+        pool = nullcontext()
+
+    with pool as executor:
+        if args.watch:
+            _watch(args, project_dir, matcher, executor, lister, stats)
+        elif args.diff is not None:
+            _print_diff(args, project_dir, matcher, executor, lister)
+        elif args.snapshot is not None:
+            _save_snapshot(args, project_dir, matcher, executor, lister, budget)
+        else:
+            _generate_output(
+                args, project_dir, matcher, executor, lister, stats, budget
+            )
+
+    if cache is not None:
+        try:
+            cache.save()
+        except OSError as e:
+            print(f"Warning: could not write cache {cache_file}: {e}", file=sys.stderr)
+        if not args.quiet and args.output != "-":
+            print(f"Scan cache: {cache.hits} hits, {cache.misses} misses")
+
+    if stats is not None:
+        print(stats.format(time.perf_counter() - started), file=sys.stderr)
+
+    if budget is not None and budget.exceeded is not None:
+        print(
+            f"Warning: scan stopped by {budget.exceeded} after "
+            f"{budget.entries:,} entries; the output is partial",
+            file=sys.stderr,
+        )
+        sys.exit(PARTIAL_EXIT_STATUS)
+
+
+def scan_budget(args: "argparse.Namespace") -> Optional[ScanBudget]:
+    """The budget of --max-total-entries and --time-budget, starting now."""
+    if args.max_total_entries is None and args.time_budget is None:
+        return None
+    return ScanBudget(args.max_total_entries, args.time_budget)
+
+
+def _watch(
+    args: "argparse.Namespace",
+    project_dir: Path,
+    matcher: PatternMatcher,
+    executor: Optional["Executor"] = None,
+    lister: Optional[DirectoryLister] = None,
+    stats: Optional["ScanStats"] = None,
+) -> None:
+    """Regenerates the output every time the tree changes, until Ctrl+C."""
+    from indastructa_pkg.watch import DirectoryWatcher, watch_directory
+
+    # Replacing the output file changes the mtime of its directory, so every
+    # update is followed by one rescan whose result is unchanged; stay quiet.
+    updated = [False]
+
+    def regenerate(watch_lister: DirectoryLister) -> None:
+        updated[0] = _generate_output(
+            args, project_dir, matcher, executor, watch_lister, stats
+        )
+
+    def report(changed: List[str]) -> None:
+        if not args.quiet and updated[0]:
+            print(f"Changes detected in {len(changed)} directories, structure updated.")
+
+    if not args.quiet:
+        print(f"Watching {project_dir} for changes (press Ctrl+C to stop)...")
+
+    options = {}
+    if args.watch_interval is not None:
+        options["interval"] = args.watch_interval
+        options["debounce"] = 2 * args.watch_interval
+
+    try:
+        watch_directory(
+            regenerate, DirectoryWatcher(lister), on_update=report, **options
+        )
+    except KeyboardInterrupt:
+        if not args.quiet:
+            print("Stopped watching.")
+
+
+def _print_diff(
+    args: "argparse.Namespace",
+    project_dir: Optional[Path] = None,
+    matcher: Optional[PatternMatcher] = None,
+    executor: Optional["Executor"] = None,
+    lister: Optional[DirectoryLister] = None,
+) -> None:
+    """Prints the changes since the --diff file, or between the two files."""
+    from indastructa_pkg.diff import diff_structures, diff_with_tree, summarize
+    from indastructa_pkg.snapshot import Snapshot, SnapshotError, is_snapshot
+
+    with ExitStack() as stack:
+        files = []
+        for name in args.diff:
+            try:
+                if is_snapshot(name):
+                    snapshot = stack.enter_context(Snapshot.open(name))
+                    files.append(snapshot.iter_lines())
+                else:
+                    files.append(stack.enter_context(open(name, "r", encoding="utf-8")))
+            except (OSError, SnapshotError) as e:
+                print(f"Error: cannot read {name}: {e}", file=sys.stderr)
+                sys.exit(1)
+        try:
+            if project_dir is None:
+                changes = diff_structures(*files)
+            else:
+                changes = diff_with_tree(
+                    files[0],
+                    project_dir,
+                    matcher,
+                    args.depth,
+                    executor,
+                    lister,
+                    args.follow_symlinks,
+                    args.one_file_system,
+                )
+        except (OSError, UnicodeDecodeError) as e:
+            print(f"Error: cannot read {' or '.join(args.diff)}: {e}", file=sys.stderr)
+            sys.exit(1)
+
+    lines = map(str, changes)
+    if not args.quiet:
+        lines = chain(lines, [summarize(changes)])
+    _write_to_stdout(lines)
+
+
+def _save_snapshot(
+    args: "argparse.Namespace",
+    project_dir: Path,
+    matcher: PatternMatcher,
+    executor: Optional["Executor"] = None,
+    lister: Optional[DirectoryLister] = None,
+    budget: Optional[ScanBudget] = None,
+) -> None:
+    """Saves the scan to the --snapshot file."""
+    from indastructa_pkg.snapshot import write_snapshot
+
+    walk = walk_dir_structure(
         project_dir,
-        final_exclude_patterns,
-        final_include_patterns,
-        max_depth=args.depth,
+        matcher,
+        args.depth,
+        executor=executor,
+        lister=lister,
+        follow_symlinks=args.follow_symlinks,
+        one_file_system=args.one_file_system,
+        budget=budget,
     )
+    try:
+        entries, size = write_snapshot(
+            args.snapshot, project_dir.name, walk, args.metadata
+        )
+    except (OSError, ValueError) as e:
+        print(f"Error writing snapshot {args.snapshot}: {e}", file=sys.stderr)
+        sys.exit(1)
+    if not args.quiet:
+        print(
+            f"Snapshot of {entries:,} entries ({size:,} bytes) saved to: {args.snapshot}"
+        )
 
-    output_content = f"{project_dir.name}/\n{structure_text}\n"
 
-    if not args.dry_run:
-        output_filename = project_dir / args.output
-        write_structure_to_file(output_filename, output_content)
-        if not args.quiet:
-            print(f"Project structure successfully saved to: {output_filename}")
+def _render_snapshot(args: "argparse.Namespace") -> None:
+    """Writes the --from-snapshot file in --format to -o or stdout."""
+    from indastructa_pkg.snapshot import Snapshot, SnapshotError
+
+    try:
+        snapshot = Snapshot.open(args.from_snapshot)
+    except (OSError, SnapshotError) as e:
+        print(f"Error: cannot read {args.from_snapshot}: {e}", file=sys.stderr)
+        sys.exit(1)
+    with snapshot:
+        lines = snapshot.iter_lines(args.format, args.metadata)
+        if args.output is None or args.output == "-":
+            _write_to_stdout(lines)
+        else:
+            write_structure_to_file(Path(args.output), lines)
+
+
+def _write_lines(
+    stream: TextIO, lines: Iterable[str], stats: Optional["ScanStats"] = None
+) -> None:
+    """Writes each line, followed by a newline, to ``stream``."""
+    if stats is None:
+        for line in lines:
+            stream.write(f"{line}\n")
+        return
+    for batch in stats.batches(lines):
+        with stats.phase("writing"):
+            stream.write("".join(f"{line}\n" for line in batch))
+
+
+def _write_to_stdout(lines: Iterable[str], stats: Optional["ScanStats"] = None) -> None:
+    """Writes the lines to stdout, stopping quietly if the reader goes away."""
+    try:
+        _write_lines(sys.stdout, lines, stats)
+        sys.stdout.flush()
+    except BrokenPipeError:
+        # The reader went away (e.g. `| head`); stop quietly.
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+
+
+def iter_selected_output(
+    args: "argparse.Namespace",
+    project_dir: Path,
+    matcher: PatternMatcher,
+    executor: Optional["Executor"] = None,
+    lister: Optional[DirectoryLister] = None,
+    totals: Optional["DirectoryTotals"] = None,
+    budget: Optional[ScanBudget] = None,
+) -> Iterator[str]:
+    """
+    Yields the output lines in the format chosen with --format. With
+    --sizes, the size of the whole tree is added to ``totals``. The scan
+    stops where ``budget`` runs out.
+    """
+    if args.sizes:
+        from indastructa_pkg.sizes import iter_sized_output_lines
+
+        return iter_sized_output_lines(
+            project_dir,
+            matcher,
+            args.depth,
+            executor,
+            lister,
+            totals,
+            args.follow_symlinks,
+            args.one_file_system,
+            budget,
+        )
+    if args.format == "text":
+        return iter_output_lines(
+            project_dir,
+            matcher,
+            max_depth=args.depth,
+            executor=executor,
+            lister=lister,
+            follow_symlinks=args.follow_symlinks,
+            one_file_system=args.one_file_system,
+            budget=budget,
+        )
+    from indastructa_pkg.formats import iter_formatted_lines
+
+    return iter_formatted_lines(
+        args.format,
+        project_dir,
+        matcher,
+        args.depth,
+        executor,
+        lister,
+        args.metadata,
+        args.follow_symlinks,
+        args.one_file_system,
+        budget,
+    )
+
+
+def _generate_output(
+    args: "argparse.Namespace",
+    project_dir: Path,
+    matcher: PatternMatcher,
+    executor: Optional["Executor"] = None,
+    lister: Optional[DirectoryLister] = None,
+    stats: Optional["ScanStats"] = None,
+    budget: Optional[ScanBudget] = None,
+) -> bool:
+    """
+    Streams the tree to the output file and/or the console. Returns False if
+    the output file already held this tree and was left untouched.
+    """
+    totals = None
+    if args.sizes:
+        from indastructa_pkg.sizes import DirectoryTotals
+
+        totals = DirectoryTotals()
+    output_lines = iter_selected_output(
+        args, project_dir, matcher, executor, lister, totals, budget
+    )
+
+    if args.output == "-":
+        # Nothing but the output itself goes to stdout, so it can be piped.
+        _write_to_stdout(output_lines, stats)
+        return True
 
     if not args.quiet:
         if args.dry_run:
@@ -313,8 +1673,33 @@ def main() -> None:
                 "The following structure would be generated, but not saved to a file:"
             )
         print("\n--- Project Structure ---")
-        print(output_content)
+
+    echo = None if args.quiet else sys.stdout
+    changed = True
+    if args.dry_run:
+        if echo is not None:
+            _write_lines(echo, output_lines, stats)
+    else:
+        output_filename = project_dir / args.output
+        changed = write_structure_to_file(
+            output_filename, output_lines, echo=echo, stats=stats
+        )
+
+    if not args.quiet:
+        print()
+        if totals is not None:
+            print(f"Total: {totals}")
+        if not args.dry_run and changed:
+            print(f"Project structure successfully saved to: {output_filename}")
+        elif not args.dry_run:
+            print(f"Project structure unchanged: {output_filename}")
+    return changed
 
 
 if __name__ == "__main__":
-    main()
+    # Run as ``python -m indastructa_pkg.cli``, this module is __main__, and the
+    # modules it imports lazily would load indastructa_pkg.cli again, with
+    # classes of their own. Run everything from that one copy instead.
+    from indastructa_pkg.cli import main as package_main
+
+    package_main()
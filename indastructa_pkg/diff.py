@@ -0,0 +1,192 @@
+"""
+Structure diff for ``--diff``: what was added, removed or changed type
+between a saved structure file and the current tree, or two saved files.
+
+Both trees are read as streams of lines in output order, which is the order
+_get_sorted_directory_items lists a directory in (directories first, then
+files, by lower-cased name), depth first. In that order every entry's path of
+sort keys is greater than the one before it, so the two streams are merged in
+one linear pass like two sorted lists, and neither tree is ever held in
+memory, only the differences.
+
+A directory replaced by a file (or the reverse) sorts on opposite sides of
+the directories/files boundary, so the merge sees it as a removal and an
+addition; the two are paired into one type change before printing.
+"""
+
+import re
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+)
+
+from indastructa_pkg.cli import DirectoryLister, iter_output_lines
+from indastructa_pkg.matcher import PatternMatcher
+
+if TYPE_CHECKING:
+    from concurrent.futures import Executor
+
+FILE = "file"
+DIRECTORY = "directory"
+SYMLINK = "symlink"
+
+_ALREADY_SHOWN = " (already shown)"
+_MOUNT_POINT = " (mount point)"
+# "(12 KiB)" after a file, "(3 files, 12 KiB)" after a directory (--sizes).
+_SIZE_NOTE = re.compile(r" \((?:[\d,]+ files?, )?[\d.]+ (?:B|[KMGTP]iB)\)$")
+
+
+class Entry(NamedTuple):
+    # One (is_file, lower-cased name, name) sort key per path component.
+    keys: Tuple[Tuple[int, str, str], ...]
+    kind: str
+
+
+class Change(NamedTuple):
+    status: str  # "+", "-" or "~"
+    path: str
+    kind: str
+    old_kind: Optional[str] = None
+
+    def __str__(self) -> str:
+        if self.status == "~":
+            return f"~ {self.path} ({self.old_kind} -> {self.kind})"
+        suffix = "/" if self.kind == DIRECTORY else ""
+        return f"{self.status} {self.path}{suffix}"
+
+
+def _parse_label(label: str) -> Tuple[str, str, bool]:
+    """Returns the name, kind and whether it sorts with the directories."""
+    for note in (_ALREADY_SHOWN, _MOUNT_POINT):
+        if label.endswith(note):
+            label = label[: -len(note)]
+    label = _SIZE_NOTE.sub("", label)
+    name, arrow, target = label.partition(" -> ")
+    if arrow:
+        return name, SYMLINK, target.endswith("/")
+    if name.endswith("/"):
+        return name[:-1], DIRECTORY, True
+    return name, FILE, False
+
+
+def parse_structure(lines: Iterable[str]) -> Iterator[Entry]:
+    """
+    Yields the entries of a structure in text format, below its root line.
+
+    Summary lines of --max-entries-per-dir and size notes are skipped. The
+    target of an unfollowed symlink is not in the text, so a link sorts with
+    the entry before it, which is where the listing puts it.
+    """
+    lines = iter(lines)
+    next(lines, None)  # the root directory
+    keys: List[Tuple[int, str, str]] = []
+    for line in lines:
+        connector = line.find("-- ")
+        if connector < 3:
+            continue  # the blank line after an empty directory
+        depth = (connector - 3) // 6
+        name, kind, sorts_as_dir = _parse_label(line[connector + 3 :].rstrip("\n"))
+        if name.startswith("... "):
+            continue
+        if kind == SYMLINK and not sorts_as_dir:
+            # keys[depth], if any, is the previous entry in the same directory.
+            rank = keys[depth][0] if len(keys) > depth else 0
+        else:
+            rank = 0 if sorts_as_dir else 1
+        del keys[depth:]
+        keys.append((rank, name.lower(), name))
+        yield Entry(tuple(keys), kind)
+
+
+def _path(entry: Entry) -> str:
+    return "/".join(key[2] for key in entry.keys)
+
+
+def _merge(old: Iterator[Entry], new: Iterator[Entry]) -> Iterator[Change]:
+    o = next(old, None)
+    n = next(new, None)
+    while o is not None or n is not None:
+        if n is None or (o is not None and o.keys < n.keys):
+            yield Change("-", _path(o), o.kind)
+            o = next(old, None)
+        elif o is None or n.keys < o.keys:
+            yield Change("+", _path(n), n.kind)
+            n = next(new, None)
+        else:
+            if o.kind != n.kind:
+                yield Change("~", _path(n), n.kind, o.kind)
+            o = next(old, None)
+            n = next(new, None)
+
+
+def diff_structures(old: Iterable[str], new: Iterable[str]) -> List[Change]:
+    """
+    Compares two structures given as lines in text format and returns the
+    changes in output order.
+
+    A removal and an addition of the same path are reported once, as a
+    type change, or not at all when the kind is the same (an entry the two
+    listings ordered differently, e.g. names that only differ in case).
+    """
+    changes: List[Optional[Change]] = list(
+        _merge(parse_structure(old), parse_structure(new))
+    )
+    unpaired: Dict[str, int] = {}
+    for index, change in enumerate(changes):
+        if change.status == "~":
+            continue
+        other = unpaired.pop(change.path, None)
+        if other is None or changes[other].status == change.status:
+            unpaired[change.path] = index
+            continue
+        first = changes[other]
+        old_kind, kind = (
+            (first.kind, change.kind)
+            if first.status == "-"
+            else (change.kind, first.kind)
+        )
+        changes[other] = (
+            Change("~", change.path, kind, old_kind) if kind != old_kind else None
+        )
+        changes[index] = None
+    return [change for change in changes if change is not None]
+
+
+def summarize(changes: Iterable[Change]) -> str:
+    """Returns e.g. ``3 added, 1 removed, 0 changed type``."""
+    counts = {"+": 0, "-": 0, "~": 0}
+    for change in changes:
+        counts[change.status] += 1
+    return (
+        f"{counts['+']:,} added, {counts['-']:,} removed, {counts['~']:,} changed type"
+    )
+
+
+def diff_with_tree(
+    snapshot: Iterable[str],
+    project_dir: Path,
+    matcher: PatternMatcher,
+    max_depth: int = -1,
+    executor: Optional["Executor"] = None,
+    lister: Optional[DirectoryLister] = None,
+    follow_symlinks: bool = False,
+    one_file_system: bool = False,
+) -> List[Change]:
+    """Compares a saved structure with the tree as it is now."""
+    current = iter_output_lines(
+        project_dir,
+        matcher,
+        max_depth=max_depth,
+        executor=executor,
+        lister=lister,
+        follow_symlinks=follow_symlinks,
+        one_file_system=one_file_system,
+    )
+    return diff_structures(snapshot, current)
@@ -0,0 +1,165 @@
+"""
+Machine-readable output formats: JSON and NDJSON.
+
+Both are produced from the same walk as the ASCII tree, one record per entry:
+
+    {"path": "src/main.py", "type": "file", "depth": 2}
+
+``path`` is relative to the scanned directory and always uses ``/``;
+``type`` is ``directory``, ``file``, ``symlink`` or ``other``, and symlinks
+(followed or not) carry their ``target``; ``depth`` counts from 1 for the
+entries of the scanned directory, like ``--depth``. With metadata, records
+also carry ``size`` (files only) and ``mtime`` (seconds since the epoch).
+A directory cut down by --max-entries-per-dir ends with an ``omitted``
+record counting what was left out. A scan stopped by
+--max-total-entries or --time-budget ends every unfinished directory with an
+``omitted`` record whose ``stopped`` names the option.
+
+The records are generated lazily, so NDJSON is written in constant memory
+and JSON only adds the enclosing document around the same stream.
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterator, Optional, Union
+
+from indastructa_pkg.cli import (
+    DirectoryLister,
+    LabeledEntry,
+    OmittedEntries,
+    ScanBudget,
+    UnscannedEntries,
+    walk_dir_structure,
+)
+from indastructa_pkg.matcher import PatternMatcher
+
+if TYPE_CHECKING:
+    from concurrent.futures import Executor
+
+FORMATS = ("text", "json", "ndjson")
+FILE_EXTENSIONS = {"text": ".txt", "json": ".json", "ndjson": ".ndjson"}
+
+# ASCII-only output: names that are not valid UTF-8 come back from the
+# filesystem as lone surrogates, which can only be written escaped.
+_ENCODER = json.JSONEncoder(separators=(",", ":"))
+
+
+def _entry_type(entry: os.DirEntry, is_dir: bool) -> str:
+    if is_dir:
+        return "directory"
+    if type(entry) is LabeledEntry:
+        # A symlink that is not followed, or a directory already listed.
+        return "symlink" if entry.target is not None else "directory"
+    if entry.is_file():
+        return "file"
+    return "other"
+
+
+def iter_records(
+    root_path: Union[Path, str],
+    matcher: PatternMatcher,
+    max_depth: int = -1,
+    executor: Optional["Executor"] = None,
+    lister: Optional[DirectoryLister] = None,
+    metadata: bool = False,
+    follow_symlinks: bool = False,
+    one_file_system: bool = False,
+    budget: Optional[ScanBudget] = None,
+) -> Iterator[dict]:
+    """Yields one record per entry, in the same order as the ASCII tree."""
+    prefix_len = len(os.fspath(root_path)) + 1
+    for depth, entry, is_dir, _ in walk_dir_structure(
+        root_path,
+        matcher,
+        max_depth,
+        executor=executor,
+        lister=lister,
+        follow_symlinks=follow_symlinks,
+        one_file_system=one_file_system,
+        budget=budget,
+    ):
+        if isinstance(entry, OmittedEntries):
+            parent = os.path.dirname(entry.path)[prefix_len:]
+            record = {
+                "path": parent.replace(os.sep, "/"),
+                "type": "omitted",
+                "depth": depth + 1,
+                "directories": entry.directories,
+                "files": entry.files,
+            }
+            if isinstance(entry, UnscannedEntries):
+                record["stopped"] = entry.limit
+            yield record
+            continue
+
+        record = {
+            "path": entry.path[prefix_len:].replace(os.sep, "/"),
+            "type": _entry_type(entry, is_dir),
+            "depth": depth + 1,
+        }
+        if type(entry) is LabeledEntry and entry.target is not None:
+            record["target"] = entry.target
+        if metadata:
+            try:
+                stat = entry.stat()
+            except OSError:
+                pass
+            else:
+                if record["type"] == "file":
+                    record["size"] = stat.st_size
+                record["mtime"] = stat.st_mtime
+        yield record
+
+
+def iter_ndjson_lines(records: Iterator[dict]) -> Iterator[str]:
+    """Yields one JSON document per record."""
+    dumps = _ENCODER.encode
+    for record in records:
+        yield dumps(record)
+
+
+def iter_json_lines(root_name: str, records: Iterator[dict]) -> Iterator[str]:
+    """
+    Yields the lines of a single JSON document holding all records:
+    ``{"root": ..., "entries": [...]}``, one record per line.
+    """
+    dumps = _ENCODER.encode
+    yield f'{{"root":{dumps(root_name)},"entries":['
+    previous = None
+    for record in records:
+        if previous is not None:
+            yield f"{previous},"
+        previous = dumps(record)
+    if previous is not None:
+        yield previous
+    yield "]}"
+
+
+def iter_formatted_lines(
+    output_format: str,
+    project_dir: Path,
+    matcher: PatternMatcher,
+    max_depth: int = -1,
+    executor: Optional["Executor"] = None,
+    lister: Optional[DirectoryLister] = None,
+    metadata: bool = False,
+    follow_symlinks: bool = False,
+    one_file_system: bool = False,
+    budget: Optional[ScanBudget] = None,
+) -> Iterator[str]:
+    """Yields the output lines of ``--format json`` or ``--format ndjson``."""
+    records = iter_records(
+        project_dir,
+        matcher,
+        max_depth,
+        executor,
+        lister,
+        metadata,
+        follow_symlinks,
+        one_file_system,
+        budget,
+    )
+    if output_format == "ndjson":
+        return iter_ndjson_lines(records)
+    return iter_json_lines(project_dir.name, records)
@@ -0,0 +1,344 @@
+"""
+Gitignore rules with git's own semantics.
+
+Each ``.gitignore`` is compiled once, when the walk enters its directory, and
+applies to everything below that directory: anchored patterns, ``**``,
+negation with ``!``, directory-only rules with a trailing ``/``, and deeper
+files taking precedence over the ones above them. Ignored directories are
+dropped from the listing, so their subtrees are never scanned.
+"""
+
+import os
+import re
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple, Union
+
+from indastructa_pkg.matcher import PatternMatcher
+
+if TYPE_CHECKING:
+    from indastructa_pkg.stats import ScanStats
+
+GITIGNORE_FILENAME = ".gitignore"
+
+_WILDCARD_CHARS = frozenset("*?[\\")
+
+
+def _translate_class(pattern: str, start: int) -> Tuple[Optional[str], int]:
+    """Translates a ``[...]`` class starting at ``start``; None if unterminated."""
+    i = start + 1
+    negate = i < len(pattern) and pattern[i] in "!^"
+    if negate:
+        i += 1
+    # A ']' right after the opening bracket is part of the set.
+    if i < len(pattern) and pattern[i] == "]":
+        i += 1
+    end = pattern.find("]", i)
+    if end == -1:
+        return None, start
+    body = pattern[start + 1 + negate : end].replace("\\", "\\\\")
+    return f"[{'^' if negate else ''}{body}]", end + 1
+
+
+def translate_pattern(pattern: str, basename: bool = False) -> str:
+    """
+    Translates the body of a gitignore pattern (no ``!``, no trailing ``/``)
+    into a regex matched against the path relative to the .gitignore directory,
+    or against the entry name alone when ``basename`` is set.
+    """
+    anchored = "/" in pattern
+    pattern = pattern.lstrip("/") if anchored else pattern
+    parts = [] if anchored or basename else ["(?:.*/)?"]
+
+    i, n = 0, len(pattern)
+    while i < n:
+        if pattern.startswith("**/", i) and (i == 0 or pattern[i - 1] == "/"):
+            parts.append("(?:.*/)?")
+            i += 3
+        elif pattern == "**" or (i == n - 2 and pattern.endswith("/**")):
+            # "dir/**" matches everything inside dir; a bare "**" matches all.
+            parts.append(".*")
+            i = n
+        elif pattern[i] == "*":
+            while i < n and pattern[i] == "*":
+                i += 1
+            parts.append("[^/]*")
+        elif pattern[i] == "?":
+            parts.append("[^/]")
+            i += 1
+        elif pattern[i] == "[":
+            char_class, i = _translate_class(pattern, i)
+            if char_class is None:
+                parts.append(re.escape("["))
+                i += 1
+            else:
+                parts.append(char_class)
+        elif pattern[i] == "\\" and i + 1 < n:
+            parts.append(re.escape(pattern[i + 1]))
+            i += 2
+        else:
+            parts.append(re.escape(pattern[i]))
+            i += 1
+    return "".join(parts)
+
+
+def parse_line(line: str) -> Optional[Tuple[str, bool, bool]]:
+    """
+    Parses one line of a .gitignore file.
+
+    Returns ``(pattern, negated, directory_only)`` with the ``!`` and the
+    trailing ``/`` removed from the pattern, or None for blank lines and
+    comments.
+    """
+    line = line.rstrip("\r\n")
+    # Trailing spaces are ignored unless escaped with a backslash.
+    stripped = line.rstrip(" ")
+    if stripped.endswith("\\") and len(stripped) < len(line):
+        stripped += " "
+    line = stripped
+    if not line or line.startswith("#"):
+        return None
+
+    negated = line.startswith("!")
+    if negated:
+        line = line[1:]
+    elif line.startswith("\\!") or line.startswith("\\#"):
+        line = line[1:]
+
+    directory_only = line.endswith("/")
+    line = line.rstrip("/")
+    if not line:
+        return None
+    return line, negated, directory_only
+
+
+def _basename_pattern(pattern: str) -> Optional[str]:
+    """
+    Returns the part of ``pattern`` matched against the entry name, if the
+    pattern looks at nothing else: no slash, or only a leading ``**/``.
+    """
+    if pattern.startswith("**/"):
+        pattern = pattern[3:]
+    if "/" in pattern or pattern == "**":
+        return None
+    return pattern
+
+
+class _RuleSet:
+    """
+    The rules of one .gitignore file that apply to one entry type.
+
+    Rules are bucketed so that an entry is only tested against the rules that
+    can match it: literal names, ``*.ext`` and literal paths are dict
+    lookups, the other rules on the entry name share one regex, and the other
+    rules on the path are grouped by their first path component. Everything
+    is keyed by rule index, since the last matching rule is the one that
+    applies.
+    """
+
+    __slots__ = ("names", "extensions", "paths", "name_regex", "path_regexes")
+
+    def __init__(self, rules: List[Tuple[int, str]]) -> None:
+        self.names: Dict[str, int] = {}
+        self.extensions: Dict[str, int] = {}
+        self.paths: Dict[str, int] = {}
+        name_rules = []
+        path_rules: Dict[str, list] = {}
+        for index, pattern in rules:
+            basename = _basename_pattern(pattern)
+            if basename is None:
+                pattern = pattern.lstrip("/") if "/" in pattern else pattern
+                if _WILDCARD_CHARS.isdisjoint(pattern):
+                    self.paths[pattern] = index
+                    continue
+                # Rules starting with a wildcard go to the "" bucket.
+                first = pattern.partition("/")[0]
+                if not _WILDCARD_CHARS.isdisjoint(first):
+                    first = ""
+                path_rules.setdefault(first, []).append(
+                    (index, translate_pattern("/" + pattern))
+                )
+            elif _WILDCARD_CHARS.isdisjoint(basename):
+                self.names[basename] = index
+            elif (
+                basename.startswith("*.")
+                and _WILDCARD_CHARS.isdisjoint(basename[2:])
+                and "." not in basename[2:]
+            ):
+                self.extensions[basename[2:]] = index
+            else:
+                name_rules.append((index, translate_pattern(basename, True)))
+        self.name_regex = self._compile(name_rules)
+        self.path_regexes = {
+            first: self._compile(bucket) for first, bucket in path_rules.items()
+        }
+
+    @staticmethod
+    def _compile(rules: List[Tuple[int, str]]) -> Optional[Tuple]:
+        if not rules:
+            return None
+        # Latest rule first, so the first alternative that matches is the
+        # last matching rule. Group 0 is the whole match, hence the padding.
+        rules = rules[::-1]
+        regex = re.compile("|".join(f"({rule})" for _, rule in rules), re.DOTALL)
+        return regex.fullmatch, (-1,) + tuple(index for index, _ in rules)
+
+    @staticmethod
+    def _regex_match(compiled: Optional[Tuple], subject: str) -> int:
+        if compiled is None:
+            return -1
+        fullmatch, indexes = compiled
+        found = fullmatch(subject)
+        return -1 if found is None else indexes[found.lastindex]
+
+    def last_match(self, relative: str, name: str) -> int:
+        """Returns the index of the last rule matching the entry, or -1."""
+        last = max(self.names.get(name, -1), self.paths.get(relative, -1))
+        if self.extensions:
+            _, dot, extension = name.rpartition(".")
+            if dot:
+                last = max(last, self.extensions.get(extension, -1))
+        last = max(last, self._regex_match(self.name_regex, name))
+        if self.path_regexes:
+            first = relative.partition("/")[0]
+            for bucket in (first, ""):
+                last = max(
+                    last, self._regex_match(self.path_regexes.get(bucket), relative)
+                )
+        return last
+
+
+class IgnoreFile:
+    """The compiled rules of a single .gitignore file."""
+
+    __slots__ = ("base", "_prefix_len", "_file_rules", "_dir_rules", "_negated")
+
+    def __init__(self, base: str, lines: List[str]) -> None:
+        self.base = base
+        self._prefix_len = len(base) + 1
+        rules = [rule for rule in map(parse_line, lines) if rule is not None]
+        self._negated = [negated for _, negated, _ in rules]
+        self._file_rules = _RuleSet(
+            [
+                (i, pattern)
+                for i, (pattern, _, dir_only) in enumerate(rules)
+                if not dir_only
+            ]
+        )
+        self._dir_rules = _RuleSet(
+            [(i, pattern) for i, (pattern, _, _) in enumerate(rules)]
+        )
+
+    def match(self, path: str, is_dir: bool) -> Optional[bool]:
+        """
+        Returns True if the path is ignored, False if a negated rule
+        re-includes it, and None if no rule matches.
+        """
+        relative = path[self._prefix_len :]
+        if os.sep != "/":
+            relative = relative.replace(os.sep, "/")
+        rules = self._dir_rules if is_dir else self._file_rules
+        last = rules.last_match(relative, relative.rpartition("/")[2])
+        if last < 0:
+            return None
+        return not self._negated[last]
+
+
+def _read_lines(path: str) -> Optional[List[str]]:
+    try:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            return f.readlines()
+    except OSError:
+        return None
+
+
+class GitIgnoreMatcher:
+    """
+    A PatternMatcher extended with the .gitignore files of the directories
+    above the one being listed.
+
+    ``--include`` patterns still win over everything, and built-in and
+    ``--exclude`` patterns are applied before any gitignore rule, so a
+    negated gitignore rule only re-includes what gitignore itself excluded.
+    """
+
+    __slots__ = ("base", "ignore_files", "rules_signature", "stats")
+
+    def __init__(
+        self,
+        base: PatternMatcher,
+        ignore_files: Tuple[IgnoreFile, ...] = (),
+        rules_signature: str = "",
+        stats: Optional["ScanStats"] = None,
+    ) -> None:
+        self.base = base
+        # Deepest .gitignore first: it has the highest precedence.
+        self.ignore_files = ignore_files
+        self.rules_signature = rules_signature
+        # With --stats, loading .gitignore files is timed as ignore_files.
+        self.stats = stats
+
+    @classmethod
+    def for_root(
+        cls,
+        root: Union[Path, str],
+        base: PatternMatcher,
+        stats: Optional["ScanStats"] = None,
+    ) -> "GitIgnoreMatcher":
+        return cls(base, stats=stats).for_directory(root)
+
+    @property
+    def exclude_patterns(self) -> frozenset:
+        return self.base.exclude_patterns
+
+    @property
+    def include_patterns(self) -> frozenset:
+        return self.base.include_patterns
+
+    def for_directory(
+        self, directory: Union[Path, os.DirEntry, str]
+    ) -> "GitIgnoreMatcher":
+        """Adds the directory's own .gitignore, if it has one."""
+        if self.stats is not None:
+            with self.stats.phase("ignore_files"):
+                return self._add_ignore_file(directory)
+        return self._add_ignore_file(directory)
+
+    def _add_ignore_file(
+        self, directory: Union[Path, os.DirEntry, str]
+    ) -> "GitIgnoreMatcher":
+        base_dir = os.fspath(directory)
+        lines = _read_lines(os.path.join(base_dir, GITIGNORE_FILENAME))
+        if lines is None:
+            return self
+
+        import hashlib  # only needed once a .gitignore is found
+
+        digest = hashlib.sha1(self.rules_signature.encode("utf-8"))
+        digest.update(base_dir.encode("utf-8", "surrogateescape"))
+        digest.update("".join(lines).encode("utf-8", "surrogateescape"))
+        return GitIgnoreMatcher(
+            self.base,
+            (IgnoreFile(base_dir, lines),) + self.ignore_files,
+            digest.hexdigest(),
+            self.stats,
+        )
+
+    def is_excluded(self, name: str) -> bool:
+        return self.base.is_excluded(name)
+
+    def excludes(self, entry: os.DirEntry) -> bool:
+        name = entry.name
+        if self.base.is_included(name):
+            return False
+        if self.base.is_excluded(name):
+            return True
+        if not self.ignore_files:
+            return False
+
+        # Git does not follow symlinks: a link to a directory is a file here.
+        is_dir = entry.is_dir(follow_symlinks=False)
+        for ignore_file in self.ignore_files:
+            ignored = ignore_file.match(entry.path, is_dir)
+            if ignored is not None:
+                return ignored
+        return False
@@ -0,0 +1,111 @@
+import fnmatch
+import os
+import re
+from typing import Callable, Iterable, Optional, Set, Tuple, Union
+
+_WILDCARD_CHARS = frozenset("*?[")
+
+
+def _has_wildcards(pattern: str) -> bool:
+    return not _WILDCARD_CHARS.isdisjoint(pattern)
+
+
+def _split_patterns(
+    patterns: Iterable[str],
+) -> Tuple[Set[str], Set[str], Optional[Callable]]:
+    """
+    Splits fnmatch patterns into three buckets that are cheap to test:
+
+    - literal names (no wildcards), checked with a set lookup;
+    - plain extensions (``*.ext`` with no other wildcard or dot in ``ext``),
+      checked with a set lookup on the text after the last dot;
+    - everything else, merged into a single compiled regex.
+    """
+    literals: Set[str] = set()
+    extensions: Set[str] = set()
+    wildcards = []
+    for pattern in patterns:
+        pattern = os.path.normcase(pattern)
+        if not _has_wildcards(pattern):
+            literals.add(pattern)
+        elif (
+            pattern.startswith("*.")
+            and len(pattern) > 2
+            and "." not in pattern[2:]
+            and not _has_wildcards(pattern[2:])
+        ):
+            extensions.add(pattern[2:])
+        else:
+            wildcards.append(fnmatch.translate(pattern))
+
+    regex_match = None
+    if wildcards:
+        regex_match = re.compile("|".join(sorted(set(wildcards)))).match
+    return literals, extensions, regex_match
+
+
+class PatternMatcher:
+    """
+    Decides whether a file or directory name is excluded.
+
+    Semantics are those of ``fnmatch.fnmatch`` applied to the entry name:
+    a name matching any include pattern is kept, otherwise a name matching
+    any exclude pattern is excluded. The patterns are compiled once, so the
+    cost per name barely depends on how many patterns are loaded.
+    """
+
+    __slots__ = (
+        "exclude_patterns",
+        "include_patterns",
+        "_include",
+        "_exclude",
+        "_normcase",
+    )
+
+    # PatternMatcher has no per-directory rules (see GitIgnoreMatcher).
+    rules_signature = ""
+
+    def __init__(
+        self,
+        exclude_patterns: Iterable[str] = (),
+        include_patterns: Iterable[str] = (),
+    ) -> None:
+        self.exclude_patterns: frozenset = frozenset(exclude_patterns)
+        self.include_patterns: frozenset = frozenset(include_patterns)
+        self._include = _split_patterns(self.include_patterns)
+        self._exclude = _split_patterns(self.exclude_patterns)
+        # fnmatch normalizes case (and separators) on Windows only.
+        self._normcase = os.path.normcase("A") != "A"
+
+    @staticmethod
+    def _matches(name: str, compiled: Tuple) -> bool:
+        literals, extensions, regex_match = compiled
+        if name in literals:
+            return True
+        if extensions:
+            _, dot, extension = name.rpartition(".")
+            if dot and extension in extensions:
+                return True
+        return regex_match is not None and regex_match(name) is not None
+
+    def is_included(self, name: str) -> bool:
+        """Returns True if ``name`` matches an include pattern."""
+        if self._normcase:
+            name = os.path.normcase(name)
+        return self._matches(name, self._include)
+
+    def is_excluded(self, name: str) -> bool:
+        """Returns True if ``name`` should be left out of the tree."""
+        if self._normcase:
+            name = os.path.normcase(name)
+        if self._matches(name, self._include):
+            return False
+        return self._matches(name, self._exclude)
+
+    def excludes(self, entry: os.DirEntry) -> bool:
+        """Returns True if a directory entry should be left out of the tree."""
+        return self.is_excluded(entry.name)
+
+    def for_directory(self, directory: Union[str, os.PathLike]) -> "PatternMatcher":
+        """Returns the matcher for the entries of ``directory``."""
+        return self
@@ -0,0 +1,179 @@
+"""
+Sizes and file counts for ``--sizes``.
+
+Totals are added up during the walk that renders the tree: every file is
+stat'ed once, without following symlinks (os.DirEntry keeps the result),
+and its size is added to the innermost open directory, which passes its
+total on to its parent when it is closed. A directory's line is only known
+once its subtree has been walked, so the lines of a top-level directory are
+held back until it is complete; everything else streams as before.
+
+Sizes are apparent sizes of regular files. A file with several hard links
+is counted once per (st_dev, st_ino); symlinks and special files are shown
+without a size and not counted.
+"""
+
+import os
+import stat
+from operator import attrgetter
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable, Iterator, List, Optional, Set, Tuple
+
+from indastructa_pkg.cli import (
+    DirectoryLister,
+    OmittedEntries,
+    ScanBudget,
+    _iter_tree_lines,
+    entry_label,
+    walk_dir_structure,
+)
+from indastructa_pkg.matcher import PatternMatcher
+
+if TYPE_CHECKING:
+    from concurrent.futures import Executor
+
+_UNITS = ("KiB", "MiB", "GiB", "TiB", "PiB")
+
+
+def format_size(size: int) -> str:
+    """Formats a byte count: ``512 B``, ``4.1 KiB``, ``38.2 MiB``."""
+    if size < 1024:
+        return f"{size} B"
+    value = float(size)
+    for unit in _UNITS:
+        value /= 1024
+        if value < 1024 or unit == _UNITS[-1]:
+            return f"{value:.1f} {unit}"
+
+
+class DirectoryTotals:
+    """The number of files and bytes below a directory."""
+
+    __slots__ = ("files", "size")
+
+    def __init__(self, files: int = 0, size: int = 0) -> None:
+        self.files = files
+        self.size = size
+
+    def __str__(self) -> str:
+        noun = "file" if self.files == 1 else "files"
+        return f"{self.files:,} {noun}, {format_size(self.size)}"
+
+
+class _SizedEntry:
+    """An entry whose line is annotated with ``note``."""
+
+    __slots__ = ("name", "note")
+
+    def __init__(self, name: str, note: str = "") -> None:
+        self.name = name
+        self.note = note
+
+
+def _file_size(entry: os.DirEntry, seen: Set[Tuple[int, int]]) -> Tuple[int, bool]:
+    """
+    Returns the size of a regular file and whether it counts towards the
+    totals; (-1, False) for anything else.
+    """
+    if isinstance(entry, OmittedEntries):
+        return -1, False
+    try:
+        st = entry.stat(follow_symlinks=False)
+    except OSError:
+        return -1, False
+    if not stat.S_ISREG(st.st_mode):
+        return -1, False
+    if st.st_nlink > 1:
+        key = (st.st_dev, st.st_ino)
+        if key in seen:
+            return st.st_size, False
+        seen.add(key)
+    return st.st_size, True
+
+
+def _sized_walk(
+    walk: Iterable[Tuple[int, os.DirEntry, bool, bool]],
+    max_depth: int,
+    totals: DirectoryTotals,
+) -> Iterator[Tuple[int, _SizedEntry, bool, bool]]:
+    """
+    Re-yields the walk with every entry annotated, once the totals of the
+    directories above it are known. Entries below ``max_depth`` are counted
+    but not yielded.
+    """
+    seen: Set[Tuple[int, int]] = set()
+    # One [depth, entry, totals] per directory on the current path.
+    open_dirs: List[list] = []
+    pending: List[Tuple[int, _SizedEntry, bool, bool]] = []
+
+    def close(depth: int) -> None:
+        while open_dirs and open_dirs[-1][0] >= depth:
+            _, sized, dir_totals = open_dirs.pop()
+            sized.note = f" ({dir_totals})"
+            parent = open_dirs[-1][2] if open_dirs else totals
+            parent.files += dir_totals.files
+            parent.size += dir_totals.size
+
+    for depth, entry, is_dir, is_last in walk:
+        close(depth)
+        if not open_dirs and pending:
+            yield from pending
+            pending.clear()
+
+        if is_dir:
+            sized = _SizedEntry(entry_label(entry))
+            open_dirs.append([depth, sized, DirectoryTotals()])
+        else:
+            size, counted = _file_size(entry, seen)
+            sized = _SizedEntry(
+                entry_label(entry), f" ({format_size(size)})" if size >= 0 else ""
+            )
+            if counted:
+                owner = open_dirs[-1][2] if open_dirs else totals
+                owner.files += 1
+                owner.size += size
+        if max_depth == -1 or depth < max_depth:
+            pending.append((depth, sized, is_dir, is_last))
+
+    close(0)
+    yield from pending
+
+
+def iter_sized_output_lines(
+    project_dir: Path,
+    matcher: PatternMatcher,
+    max_depth: int = -1,
+    executor: Optional["Executor"] = None,
+    lister: Optional[DirectoryLister] = None,
+    totals: Optional[DirectoryTotals] = None,
+    follow_symlinks: bool = False,
+    one_file_system: bool = False,
+    budget: Optional[ScanBudget] = None,
+) -> Iterator[str]:
+    """
+    Yields the lines of the output file with sizes, like iter_output_lines.
+
+    The whole tree is walked even with ``max_depth``, so the totals of the
+    deepest directories shown include everything below them. The total of
+    the scanned directory itself is added to ``totals``.
+    """
+    if totals is None:
+        totals = DirectoryTotals()
+    walk = walk_dir_structure(
+        project_dir,
+        matcher,
+        executor=executor,
+        lister=lister,
+        follow_symlinks=follow_symlinks,
+        one_file_system=one_file_system,
+        budget=budget,
+    )
+    yield f"{project_dir.name}/"
+    has_lines = False
+    for line in _iter_tree_lines(
+        _sized_walk(walk, max_depth, totals), annotate=attrgetter("note")
+    ):
+        has_lines = True
+        yield line
+    if not has_lines:
+        yield ""
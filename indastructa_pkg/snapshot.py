@@ -0,0 +1,419 @@
+"""
+Binary snapshots for ``--snapshot``: a scan saved so that it can be opened
+again without parsing, and rendered without touching the filesystem.
+
+A snapshot holds the rows of the walk in output order, column by column, in
+little-endian arrays aligned to 8 bytes:
+
+    header       magic, version, options, and the sizes of what follows
+    root name    UTF-8
+    flags        u8 per row: type, "walked into" and "last in directory" bits
+    depth        u32 per row
+    shared       u8 per row: bytes the name shares with the previous name
+    ends         u32 per row: end of the rest of the name in ``suffixes``
+    suffixes     the names, each without its shared prefix
+    labels       u32 rows, u32 ends and the text of the few rows shown with
+                 a label (symlinks, directories already shown), followed by
+                 NUL and the link's target for symlinks
+    size, mtime  i64 and f64 per row, only with metadata
+
+Every offset follows from the counts in the header, so opening a snapshot
+maps the file and slices it, whatever its size. Names are front-coded
+against the previous row, which in output order is usually a sibling with a
+common prefix, and are decoded while walking.
+"""
+
+import io
+import math
+import mmap
+import os
+import re
+import struct
+import sys
+from array import array
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Tuple, Union
+
+from indastructa_pkg.cli import (
+    WRITE_BUFFER_SIZE,
+    OmittedEntries,
+    ReplacingFile,
+    _iter_tree_lines,
+)
+from indastructa_pkg.formats import _entry_type, iter_json_lines, iter_ndjson_lines
+
+MAGIC = b"IDXSNAP\0"
+VERSION = 1
+
+FILE, DIRECTORY, SYMLINK, OTHER, OMITTED = range(5)
+_TYPES = ("file", "directory", "symlink", "other", "omitted")
+_KIND_MASK = 7
+_OPEN = 8  # the walk went into it (is_dir)
+_LAST = 16
+
+_HAS_METADATA = 1
+
+# magic, version, options, root name bytes, rows, suffix bytes, labels,
+# label bytes
+_HEADER = struct.Struct("<8sHHIQQQQ")
+_MAX_SHARED = 255
+_OMITTED_COUNT = re.compile(r"([\d,]+) more (director|file)")
+# The end of the name of an UnscannedEntries.
+_STOPPED = re.compile(r" not scanned \((--[a-z-]+) reached\)$")
+
+
+class SnapshotError(Exception):
+    """Raised when a file is not a readable snapshot."""
+
+
+def _padded(size: int) -> int:
+    return (size + 7) & ~7
+
+
+def _little_endian(column: array) -> bytes:
+    if sys.byteorder != "little":
+        column = array(column.typecode, column)
+        column.byteswap()
+    return column.tobytes()
+
+
+def write_snapshot(
+    path: Union[Path, str],
+    root_name: str,
+    walk: Iterable[Tuple[int, os.DirEntry, bool, bool]],
+    metadata: bool = False,
+) -> Tuple[int, int]:
+    """
+    Saves the ``(depth, entry, is_dir, is_last)`` tuples of a walk to
+    ``path`` and returns the number of rows and of bytes.
+
+    The file is replaced atomically and left untouched if it already holds
+    the same snapshot. With ``metadata``, the size of files and the mtime of
+    every entry are stored too.
+    """
+    flags = array("B")
+    depths = array("I")
+    shared = array("B")
+    ends = array("I")
+    suffixes = bytearray()
+    label_rows = array("I")
+    label_ends = array("I")
+    labels = bytearray()
+    sizes = array("q")
+    mtimes = array("d")
+
+    previous = b""
+    for depth, entry, is_dir, is_last in walk:
+        if isinstance(entry, OmittedEntries):
+            kind = OMITTED
+        else:
+            kind = _TYPES.index(_entry_type(entry, is_dir))
+        flags.append(kind | (_OPEN if is_dir else 0) | (_LAST if is_last else 0))
+        depths.append(depth)
+
+        name = entry.name.encode("utf-8", "surrogateescape")
+        common = 0
+        limit = min(len(name), len(previous), _MAX_SHARED)
+        while common < limit and name[common] == previous[common]:
+            common += 1
+        shared.append(common)
+        suffixes += name[common:]
+        ends.append(len(suffixes))
+        previous = name
+
+        label = getattr(entry, "label", None)
+        if label is not None:
+            target = getattr(entry, "target", None)
+            if target is not None:
+                label = f"{label}\0{target}"
+            label_rows.append(len(flags) - 1)
+            labels += label.encode("utf-8", "surrogateescape")
+            label_ends.append(len(labels))
+
+        if metadata:
+            size, mtime = -1, math.nan
+            if kind != OMITTED:
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    pass
+                else:
+                    size = stat.st_size if kind == FILE else -1
+                    mtime = stat.st_mtime
+            sizes.append(size)
+            mtimes.append(mtime)
+
+    if len(suffixes) > 0xFFFFFFFF or len(labels) > 0xFFFFFFFF:
+        raise ValueError("names do not fit in a snapshot (over 4 GiB)")
+
+    root = root_name.encode("utf-8", "surrogateescape")
+    sections = [
+        _HEADER.pack(
+            MAGIC,
+            VERSION,
+            _HAS_METADATA if metadata else 0,
+            len(root),
+            len(flags),
+            len(suffixes),
+            len(label_rows),
+            len(labels),
+        ),
+        root,
+        flags.tobytes(),
+        _little_endian(depths),
+        shared.tobytes(),
+        _little_endian(ends),
+        bytes(suffixes),
+        _little_endian(label_rows),
+        _little_endian(label_ends),
+        bytes(labels),
+    ]
+    if metadata:
+        sections += [_little_endian(sizes), _little_endian(mtimes)]
+
+    raw = ReplacingFile(Path(path))
+    with io.BufferedWriter(raw, WRITE_BUFFER_SIZE) as f:
+        for section in sections:
+            f.write(section)
+            f.write(bytes(_padded(len(section)) - len(section)))
+        f.flush()
+        raw.commit()
+    return len(flags), raw.size
+
+
+class SnapshotEntry:
+    """One row of a snapshot, as yielded by Snapshot.walk()."""
+
+    __slots__ = ("name", "kind", "label", "target", "size", "mtime")
+
+    def __init__(
+        self,
+        name: str,
+        kind: int,
+        label: Optional[str] = None,
+        target: Optional[str] = None,
+        size: Optional[int] = None,
+        mtime: Optional[float] = None,
+    ) -> None:
+        self.name = name
+        self.kind = kind
+        self.label = label
+        self.target = target
+        self.size = size
+        self.mtime = mtime
+
+    @property
+    def type(self) -> str:
+        return _TYPES[self.kind]
+
+    def __repr__(self) -> str:
+        return f"<SnapshotEntry {self.type} {self.name!r}>"
+
+
+class Snapshot:
+    """
+    A snapshot file, memory-mapped.
+
+    Opening only reads the header; rows are decoded by walk(), records()
+    and the renderers as they are iterated. Use it as a context manager, or
+    call close(), to unmap the file.
+    """
+
+    def __init__(self, buffer) -> None:
+        self._views: List[memoryview] = []
+        self._mmap: Optional[mmap.mmap] = None
+        try:
+            self._load(self._view(memoryview(buffer)))
+        except BaseException:
+            self.close()
+            raise
+
+    def _load(self, data: memoryview) -> None:
+        if len(data) < _HEADER.size or bytes(data[:8]) != MAGIC:
+            raise SnapshotError("not an indastructa snapshot")
+        (
+            _,
+            version,
+            options,
+            root_size,
+            count,
+            suffix_size,
+            label_count,
+            label_size,
+        ) = _HEADER.unpack_from(data)
+        if version != VERSION:
+            raise SnapshotError(f"unsupported snapshot version {version}")
+        self.has_metadata = bool(options & _HAS_METADATA)
+        self._data = data
+        self._offset = _HEADER.size
+
+        root = self._bytes(root_size).tobytes()
+        self.root_name = root.decode("utf-8", "surrogateescape")
+        self.flags = self._column("B", count)
+        self.depth = self._column("I", count)
+        self.shared = self._column("B", count)
+        self.ends = self._column("I", count)
+        self.suffixes = self._column("B", suffix_size)
+        self.label_rows = self._column("I", label_count)
+        self.label_ends = self._column("I", label_count)
+        self.labels = self._column("B", label_size)
+        self.sizes = self._column("q", count) if self.has_metadata else None
+        self.mtimes = self._column("d", count) if self.has_metadata else None
+
+    @classmethod
+    def open(cls, path: Union[Path, str]) -> "Snapshot":
+        with open(path, "rb") as f:
+            try:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:  # an empty file cannot be mapped
+                raise SnapshotError("not an indastructa snapshot") from None
+        try:
+            snapshot = cls(mapped)
+        except BaseException:
+            mapped.close()
+            raise
+        snapshot._mmap = mapped
+        return snapshot
+
+    def _view(self, view: memoryview) -> memoryview:
+        self._views.append(view)
+        return view
+
+    def _bytes(self, size: int) -> memoryview:
+        start = self._offset
+        end = start + size
+        if end > len(self._data):
+            raise SnapshotError("snapshot is truncated")
+        self._offset = start + _padded(size)
+        return self._view(self._data[start:end])
+
+    def _column(self, typecode: str, count: int):
+        itemsize = array(typecode).itemsize
+        raw = self._bytes(count * itemsize)
+        if typecode == "B":
+            return raw
+        if sys.byteorder != "little":
+            column = array(typecode, raw.tobytes())
+            column.byteswap()
+            return column
+        return self._view(raw.cast(typecode))
+
+    def close(self) -> None:
+        for view in reversed(self._views):
+            view.release()
+        self._views.clear()
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+    def __enter__(self) -> "Snapshot":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self.flags)
+
+    def walk(self) -> Iterator[Tuple[int, SnapshotEntry, bool, bool]]:
+        """Yields ``(depth, entry, is_dir, is_last)`` like the original walk."""
+        flags, depth, shared, ends = self.flags, self.depth, self.shared, self.ends
+        suffixes, label_rows = self.suffixes, self.label_rows
+        sizes, mtimes = self.sizes, self.mtimes
+        next_label = 0
+        name = b""
+        start = 0
+        for index in range(len(flags)):
+            end = ends[index]
+            name = name[: shared[index]] + suffixes[start:end].tobytes()
+            start = end
+            label = target = None
+            if next_label < len(label_rows) and label_rows[next_label] == index:
+                label_start = self.label_ends[next_label - 1] if next_label else 0
+                text = (
+                    self.labels[label_start : self.label_ends[next_label]]
+                    .tobytes()
+                    .decode("utf-8", "surrogateescape")
+                )
+                label, has_target, target = text.partition("\0")
+                target = target if has_target else None
+                next_label += 1
+            flag = flags[index]
+            size = mtime = None
+            if sizes is not None:
+                size = sizes[index] if sizes[index] >= 0 else None
+                mtime = mtimes[index] if not math.isnan(mtimes[index]) else None
+            entry = SnapshotEntry(
+                name.decode("utf-8", "surrogateescape"),
+                flag & _KIND_MASK,
+                label,
+                target,
+                size,
+                mtime,
+            )
+            yield depth[index], entry, bool(flag & _OPEN), bool(flag & _LAST)
+
+    def records(self, metadata: bool = False) -> Iterator[dict]:
+        """Yields the records of ``--format ndjson``, see formats.iter_records."""
+        # paths[level] is the path of the last directory walked at that level.
+        paths = [""]
+        for depth, entry, is_dir, _ in self.walk():
+            parent = paths[depth]
+            if entry.kind == OMITTED:
+                directories, files = 0, 0
+                for count, noun in _OMITTED_COUNT.findall(entry.name):
+                    if noun == "file":
+                        files = int(count.replace(",", ""))
+                    else:
+                        directories = int(count.replace(",", ""))
+                record = {
+                    "path": parent.rstrip("/"),
+                    "type": "omitted",
+                    "depth": depth + 1,
+                    "directories": directories,
+                    "files": files,
+                }
+                stopped = _STOPPED.search(entry.name)
+                if stopped is not None:
+                    record["stopped"] = stopped.group(1)
+                yield record
+                continue
+
+            path = parent + entry.name
+            record = {"path": path, "type": entry.type, "depth": depth + 1}
+            if entry.target is not None:
+                record["target"] = entry.target
+            if metadata and entry.mtime is not None:
+                if entry.size is not None:
+                    record["size"] = entry.size
+                record["mtime"] = entry.mtime
+            yield record
+            if is_dir:
+                del paths[depth + 1 :]
+                paths.append(path + "/")
+
+    def iter_lines(self, output_format: str = "text", metadata: bool = False):
+        """Yields the lines of the output file in ``output_format``."""
+        if output_format == "ndjson":
+            return iter_ndjson_lines(self.records(metadata))
+        if output_format == "json":
+            return iter_json_lines(self.root_name, self.records(metadata))
+        return self._iter_text_lines()
+
+    def _iter_text_lines(self) -> Iterator[str]:
+        yield f"{self.root_name}/"
+        has_lines = False
+        for line in _iter_tree_lines(self.walk()):
+            has_lines = True
+            yield line
+        if not has_lines:
+            yield ""
+
+
+def is_snapshot(path: Union[Path, str]) -> bool:
+    """Tells whether ``path`` starts like a snapshot."""
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
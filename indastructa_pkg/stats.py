@@ -0,0 +1,139 @@
+"""
+Counters and phase timings collected for ``--stats``.
+
+Nothing here is touched unless a ScanStats is passed in: the listing and
+writing code only takes its instrumented path when it has one.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from indastructa_pkg.matcher import PatternMatcher
+
+PHASES = ("ignore_files", "listing", "matching", "sorting", "rendering", "writing")
+
+# Lines produced (and then written) between two clock readings; reading the
+# clocks for every line would cost more than rendering it.
+BATCH_SIZE = 1024
+
+GITIGNORE_SOURCE = ".gitignore"
+
+
+class ScanStats:
+    """
+    Collects what a run did and where its time went.
+
+    ``sources`` lists the pattern sets an exclusion can come from, in the
+    order they are checked; an exclusion none of them explains was made by
+    a .gitignore rule. Phases timed on worker threads (``--jobs``) are summed
+    over the threads.
+    """
+
+    def __init__(self, sources: Iterable[Tuple[str, PatternMatcher]] = ()) -> None:
+        self.sources: List[Tuple[str, PatternMatcher]] = list(sources)
+        self.directories_listed = 0
+        self.entries_seen = 0
+        self.excluded: Dict[str, int] = {}
+        # One per entry and pattern set it is checked against: the compiled
+        # patterns plus every .gitignore in effect for its directory.
+        self.pattern_evaluations = 0
+        self.permission_errors = 0
+        self.bytes_written = 0
+        self.wall: Dict[str, float] = dict.fromkeys(PHASES, 0.0)
+        self.cpu: Dict[str, float] = dict.fromkeys(PHASES, 0.0)
+        self._lock = threading.Lock()
+        # Time the main thread spends listing is nested inside rendering,
+        # since the tree is walked lazily while its lines are produced.
+        self._main_thread = threading.get_ident()
+        self._nested_wall = 0.0
+        self._nested_cpu = 0.0
+
+    def add_time(self, phase: str, wall: float, cpu: float) -> None:
+        with self._lock:
+            self.wall[phase] += wall
+            self.cpu[phase] += cpu
+            if phase != "rendering" and threading.get_ident() == self._main_thread:
+                self._nested_wall += wall
+                self._nested_cpu += cpu
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        wall, cpu = time.perf_counter(), time.thread_time()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - wall, time.thread_time() - cpu)
+
+    def add_listing(
+        self,
+        entries_seen: int,
+        excluded: Dict[str, int],
+        permission_error: bool = False,
+        pattern_sets: int = 1,
+    ) -> None:
+        """
+        Adds the counters of one directory listing, whose entries were matched
+        against ``pattern_sets`` sets of patterns.
+        """
+        with self._lock:
+            self.directories_listed += 1
+            self.entries_seen += entries_seen
+            self.pattern_evaluations += entries_seen * pattern_sets
+            self.permission_errors += permission_error
+            for source, count in excluded.items():
+                self.excluded[source] = self.excluded.get(source, 0) + count
+
+    def exclusion_source(self, name: str) -> str:
+        """Names the pattern set that excluded an entry."""
+        for source, matcher in self.sources:
+            if matcher.is_excluded(name):
+                return source
+        return GITIGNORE_SOURCE
+
+    def batches(self, lines: Iterable[str]) -> Iterator[List[str]]:
+        """
+        Yields ``lines`` in batches, timing how long producing them takes.
+
+        Listing done on the main thread while a batch is produced is already
+        counted in its own phase, so only the rest counts as rendering.
+        """
+        iterator = iter(lines)
+        while True:
+            nested_wall, nested_cpu = self._nested_wall, self._nested_cpu
+            wall, cpu = time.perf_counter(), time.thread_time()
+            batch = list(islice(iterator, BATCH_SIZE))
+            wall = time.perf_counter() - wall - (self._nested_wall - nested_wall)
+            cpu = time.thread_time() - cpu - (self._nested_cpu - nested_cpu)
+            self.add_time("rendering", max(wall, 0.0), max(cpu, 0.0))
+            if not batch:
+                return
+            yield batch
+
+    def format(self, total_wall: Optional[float] = None) -> str:
+        """Returns the human-readable summary printed by --stats."""
+        lines = [
+            "--- Scan Statistics ---",
+            f"Directories listed:   {self.directories_listed:,}",
+            f"Entries seen:         {self.entries_seen:,}",
+            f"Entries excluded:     {sum(self.excluded.values()):,}",
+        ]
+        sources = [source for source, _ in self.sources] + [GITIGNORE_SOURCE]
+        for source in sources:
+            lines.append(f"  {source + ':':<20}{self.excluded.get(source, 0):,}")
+        lines += [
+            f"Pattern evaluations:  {self.pattern_evaluations:,}",
+            f"Permission errors:    {self.permission_errors:,}",
+            f"Bytes written:        {self.bytes_written:,}",
+            f"{'Phase':<22}{'wall':>10}{'cpu':>10}",
+        ]
+        for phase in PHASES:
+            lines.append(
+                f"  {phase:<20}{self.wall[phase] * 1000:>8.1f}ms"
+                f"{self.cpu[phase] * 1000:>8.1f}ms"
+            )
+        if total_wall is not None:
+            lines.append(f"  {'total':<20}{total_wall * 1000:>8.1f}ms")
+        return "\n".join(lines)
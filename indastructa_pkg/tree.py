@@ -0,0 +1,480 @@
+"""
+Library API: scan a directory into a tree of nodes, then render it.
+
+    from indastructa_pkg import render_text, scan
+
+    tree = scan("src", exclude={"*.pyc"}, depth=2)
+    print(render_text(tree))
+
+scan() applies the same rules as the command line (built-in exclusions,
+include/exclude patterns, .gitignore files) without parsing arguments,
+printing or writing files. Compiled patterns are reused by every call with
+the same pattern sets, so scanning many trees in one process only pays for
+the directory listings.
+
+scan_table() builds the same tree as a NodeTable: a few flat arrays and one
+name buffer instead of an object per entry, for trees kept in memory with
+millions of entries.
+"""
+
+import json
+import os
+from array import array
+from functools import lru_cache, partial
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from indastructa_pkg.cli import (
+    EXCLUDE_SET,
+    DirectoryLister,
+    OmittedEntries,
+    _get_sorted_directory_items,
+    _iter_tree_lines,
+    walk_dir_structure,
+)
+from indastructa_pkg.gitignore import GitIgnoreMatcher
+from indastructa_pkg.matcher import PatternMatcher
+
+if TYPE_CHECKING:
+    from concurrent.futures import Executor
+
+
+class Node:
+    """
+    One entry of a scanned tree.
+
+    ``children`` is a list for directories and None for everything else. A
+    directory cut short by ``max_entries_per_dir`` ends with a node whose
+    ``omitted`` flag is set and whose name is the summary line. ``label`` is
+    the text shown instead of the name, e.g. ``name -> target`` for a
+    symlink, and None for most nodes.
+    """
+
+    __slots__ = ("name", "children", "omitted", "label")
+
+    def __init__(
+        self,
+        name: str,
+        children: Optional[List["Node"]] = None,
+        omitted: bool = False,
+        label: Optional[str] = None,
+    ) -> None:
+        self.name = name
+        self.children = children
+        self.omitted = omitted
+        self.label = label
+
+    @property
+    def is_dir(self) -> bool:
+        return self.children is not None
+
+    def __iter__(self) -> Iterator["Node"]:
+        return iter(self.children or ())
+
+    def __repr__(self) -> str:
+        kind = "directory" if self.is_dir else "file"
+        return f"<Node {kind} {self.name!r}>"
+
+
+def _prepare(
+    root: Union[Path, str],
+    include: Iterable[str],
+    exclude: Optional[Iterable[str]],
+    matcher: Optional[PatternMatcher],
+    gitignore: bool,
+    max_entries_per_dir: Optional[int],
+) -> Tuple[Path, str, PatternMatcher, Optional[DirectoryLister]]:
+    """Returns the root, its name, the matcher and the lister of a scan."""
+    root_path = Path(root)
+    if not root_path.is_dir():
+        raise NotADirectoryError(f"Path is not a directory: {root_path}")
+    if matcher is None:
+        matcher = compile_patterns(exclude, include)
+    if gitignore:
+        matcher = GitIgnoreMatcher.for_root(root_path, matcher)
+    lister = None
+    if max_entries_per_dir is not None:
+        lister = partial(_get_sorted_directory_items, max_entries=max_entries_per_dir)
+    root_name = root_path.resolve().name or os.fspath(root_path)
+    return root_path, root_name, matcher, lister
+
+
+def _walk(
+    root: Union[Path, str],
+    include: Iterable[str],
+    exclude: Optional[Iterable[str]],
+    depth: int,
+    matcher: Optional[PatternMatcher],
+    gitignore: bool,
+    max_entries_per_dir: Optional[int],
+    executor: Optional["Executor"],
+    follow_symlinks: bool,
+    one_file_system: bool,
+) -> Tuple[str, Iterator[Tuple[int, os.DirEntry, bool, bool]]]:
+    """Returns the root's name and the walk scan() and scan_table() build from."""
+    root_path, root_name, matcher, lister = _prepare(
+        root, include, exclude, matcher, gitignore, max_entries_per_dir
+    )
+    return root_name, walk_dir_structure(
+        root_path,
+        matcher,
+        depth,
+        executor=executor,
+        lister=lister,
+        follow_symlinks=follow_symlinks,
+        one_file_system=one_file_system,
+    )
+
+
+@lru_cache(maxsize=128)
+def _compile(exclude: frozenset, include: frozenset) -> PatternMatcher:
+    return PatternMatcher(exclude, include)
+
+
+def compile_patterns(
+    exclude: Optional[Iterable[str]] = None, include: Iterable[str] = ()
+) -> PatternMatcher:
+    """
+    Returns the compiled matcher for a set of patterns.
+
+    ``exclude`` defaults to the built-in exclusions (EXCLUDE_SET); pass
+    ``EXCLUDE_SET | {...}`` to extend them rather than replace them. The
+    most recently used pattern sets stay compiled.
+    """
+    if exclude is None:
+        exclude = EXCLUDE_SET
+    return _compile(frozenset(exclude), frozenset(include))
+
+
+def scan(
+    root: Union[Path, str],
+    *,
+    include: Iterable[str] = (),
+    exclude: Optional[Iterable[str]] = None,
+    depth: int = -1,
+    matcher: Optional[PatternMatcher] = None,
+    gitignore: bool = True,
+    max_entries_per_dir: Optional[int] = None,
+    executor: Optional["Executor"] = None,
+    follow_symlinks: bool = False,
+    one_file_system: bool = False,
+) -> Node:
+    """
+    Scans ``root`` and returns it as a tree of nodes.
+
+    Entries are filtered with ``matcher``, or with ``compile_patterns(exclude,
+    include)`` when no matcher is given, and with the .gitignore files of the
+    tree unless ``gitignore`` is False. ``depth`` limits the scan like
+    ``--depth``. Children are sorted like the text output: directories first,
+    then by name. Symlinks are only descended into with ``follow_symlinks``,
+    and mount points not at all with ``one_file_system`` (see
+    walk_dir_structure).
+    """
+    root_name, entries = _walk(
+        root,
+        include,
+        exclude,
+        depth,
+        matcher,
+        gitignore,
+        max_entries_per_dir,
+        executor,
+        follow_symlinks,
+        one_file_system,
+    )
+    return _build_tree(root_name, entries)
+
+
+def _build_tree(
+    root_name: str, entries: Iterable[Tuple[int, object, bool, bool]]
+) -> Node:
+    tree = Node(root_name, [])
+    # parents[level] is the directory whose entries are at that level.
+    parents = [tree]
+    for level, entry, is_dir, _ in entries:
+        label = getattr(entry, "label", None)
+        if is_dir:
+            node = Node(entry.name, [], label=label)
+            parents[level].children.append(node)
+            del parents[level + 1 :]
+            parents.append(node)
+        else:
+            omitted = isinstance(entry, OmittedEntries) or getattr(
+                entry, "omitted", False
+            )
+            parents[level].children.append(
+                Node(entry.name, omitted=omitted, label=label)
+            )
+    return tree
+
+
+FILE, DIRECTORY, OMITTED = 0, 1, 2
+_KIND_MASK = 3
+_LAST = 4
+
+
+class TableEntry:
+    """A view of one row of a NodeTable; it holds no data of its own."""
+
+    __slots__ = ("table", "index")
+
+    def __init__(self, table: "NodeTable", index: int) -> None:
+        self.table = table
+        self.index = index
+
+    @property
+    def name(self) -> str:
+        return self.table.name(self.index)
+
+    @property
+    def is_dir(self) -> bool:
+        return self.table.kind(self.index) == DIRECTORY
+
+    @property
+    def omitted(self) -> bool:
+        return self.table.kind(self.index) == OMITTED
+
+    @property
+    def label(self) -> Optional[str]:
+        return self.table.labels.get(self.index)
+
+    @property
+    def depth(self) -> int:
+        return self.table.depth[self.index]
+
+    @property
+    def parent(self) -> int:
+        return self.table.parent[self.index]
+
+    def __repr__(self) -> str:
+        return f"<TableEntry {self.index} {self.name!r}>"
+
+
+class NodeTable:
+    """
+    A scanned tree stored column by column, in depth-first output order.
+
+    Row ``i`` is described by ``parent[i]`` (the row of its directory, -1
+    for the root's entries), ``flags[i]`` (FILE, DIRECTORY or OMITTED, plus
+    a bit for the last entry of its directory), ``depth[i]`` (0 for the
+    root's entries) and its name: UTF-8 bytes ``names[offsets[i]:offsets[i +
+    1]]``. A row costs 17 bytes plus its name, against several hundred for
+    a Node. The few rows shown with a label (symlinks) keep it in ``labels``.
+    """
+
+    __slots__ = (
+        "root_name",
+        "parent",
+        "flags",
+        "depth",
+        "offsets",
+        "names",
+        "labels",
+    )
+
+    def __init__(self, root_name: str) -> None:
+        self.root_name = root_name
+        self.parent = array("i")
+        self.flags = array("B")
+        self.depth = array("I")
+        self.offsets = array("Q", [0])
+        self.names = bytearray()
+        self.labels: Dict[int, str] = {}
+
+    def append(
+        self,
+        name: str,
+        kind: int,
+        depth: int,
+        parent: int,
+        is_last: bool,
+        label: Optional[str] = None,
+    ) -> int:
+        """Adds the next row in depth-first order and returns its index."""
+        if label is not None:
+            self.labels[len(self.parent)] = label
+        self.names += name.encode("utf-8", "surrogateescape")
+        self.offsets.append(len(self.names))
+        self.parent.append(parent)
+        self.flags.append(kind | _LAST if is_last else kind)
+        self.depth.append(depth)
+        return len(self.parent) - 1
+
+    @classmethod
+    def from_walk(
+        cls, root_name: str, entries: Iterable[Tuple[int, object, bool, bool]]
+    ) -> "NodeTable":
+        """Builds a table from ``(depth, entry, is_dir, is_last)`` tuples."""
+        table = cls(root_name)
+        # parents[level] is the row of the directory whose entries are at
+        # that level.
+        parents = [-1]
+        for level, entry, is_dir, is_last in entries:
+            if is_dir:
+                kind = DIRECTORY
+            elif isinstance(entry, OmittedEntries) or getattr(entry, "omitted", False):
+                kind = OMITTED
+            else:
+                kind = FILE
+            index = table.append(
+                entry.name,
+                kind,
+                level,
+                parents[level],
+                is_last,
+                getattr(entry, "label", None),
+            )
+            if is_dir:
+                del parents[level + 1 :]
+                parents.append(index)
+        return table
+
+    @classmethod
+    def from_tree(cls, tree: Node) -> "NodeTable":
+        return cls.from_walk(tree.name, walk(tree))
+
+    def to_tree(self) -> Node:
+        """Builds the equivalent tree of Node objects."""
+        return _build_tree(self.root_name, self.walk())
+
+    def __len__(self) -> int:
+        return len(self.parent)
+
+    def __getitem__(self, index: int) -> TableEntry:
+        if not -len(self) <= index < len(self):
+            raise IndexError("NodeTable index out of range")
+        return TableEntry(self, index % len(self))
+
+    def __iter__(self) -> Iterator[TableEntry]:
+        return (TableEntry(self, index) for index in range(len(self)))
+
+    def name(self, index: int) -> str:
+        start, end = self.offsets[index], self.offsets[index + 1]
+        return self.names[start:end].decode("utf-8", "surrogateescape")
+
+    def kind(self, index: int) -> int:
+        return self.flags[index] & _KIND_MASK
+
+    def walk(self) -> Iterator[Tuple[int, TableEntry, bool, bool]]:
+        """Yields ``(depth, entry, is_dir, is_last)`` like walk()."""
+        flags, depth = self.flags, self.depth
+        for index in range(len(self.parent)):
+            flag = flags[index]
+            yield (
+                depth[index],
+                TableEntry(self, index),
+                flag & _KIND_MASK == DIRECTORY,
+                bool(flag & _LAST),
+            )
+
+    @property
+    def nbytes(self) -> int:
+        """The memory held by the columns and the name buffer."""
+        columns = (self.parent, self.flags, self.depth, self.offsets)
+        return len(self.names) + sum(c.itemsize * len(c) for c in columns)
+
+
+def scan_table(
+    root: Union[Path, str],
+    *,
+    include: Iterable[str] = (),
+    exclude: Optional[Iterable[str]] = None,
+    depth: int = -1,
+    matcher: Optional[PatternMatcher] = None,
+    gitignore: bool = True,
+    max_entries_per_dir: Optional[int] = None,
+    executor: Optional["Executor"] = None,
+    follow_symlinks: bool = False,
+    one_file_system: bool = False,
+) -> NodeTable:
+    """Like scan(), but stores the tree in a NodeTable."""
+    root_name, entries = _walk(
+        root,
+        include,
+        exclude,
+        depth,
+        matcher,
+        gitignore,
+        max_entries_per_dir,
+        executor,
+        follow_symlinks,
+        one_file_system,
+    )
+    return NodeTable.from_walk(root_name, entries)
+
+
+def walk(tree: Node) -> Iterator[Tuple[int, Node, bool, bool]]:
+    """
+    Yields ``(depth, node, is_dir, is_last)`` for every node below ``tree``,
+    depth-first in output order, like walk_dir_structure.
+    """
+    stack = [(tree.children or [], 0, 0)]
+    while stack:
+        children, index, depth = stack.pop()
+        if index == len(children):
+            continue
+        stack.append((children, index + 1, depth))
+        node = children[index]
+        is_dir = node.children is not None
+        yield depth, node, is_dir, index == len(children) - 1
+        if is_dir:
+            stack.append((node.children, 0, depth + 1))
+
+
+def iter_text_lines(tree: Union[Node, NodeTable]) -> Iterator[str]:
+    """Yields the lines of the ASCII tree, exactly as the output file has them."""
+    if isinstance(tree, NodeTable):
+        yield f"{tree.root_name}/"
+        entries = tree.walk()
+    else:
+        yield f"{tree.name}/"
+        entries = walk(tree)
+    has_lines = False
+    for line in _iter_tree_lines(entries):
+        has_lines = True
+        yield line
+    if not has_lines:
+        yield ""
+
+
+def render_text(tree: Union[Node, NodeTable]) -> str:
+    """Renders the tree as the ASCII text written to the output file."""
+    return "\n".join(iter_text_lines(tree)) + "\n"
+
+
+def to_dict(tree: Union[Node, NodeTable]) -> dict:
+    """
+    Converts the tree to nested dicts: ``{"name", "type", "children"}`` for
+    directories, ``{"name", "type"}`` for the rest, plus ``label`` when set.
+    """
+    if isinstance(tree, NodeTable):
+        tree = tree.to_tree()
+    result = {"name": tree.name, "type": "directory", "children": []}
+    stack = [(tree, result["children"])]
+    while stack:
+        node, children = stack.pop()
+        for child in node.children:
+            if child.children is None:
+                kind = "omitted" if child.omitted else "file"
+                converted = {"name": child.name, "type": kind}
+            else:
+                converted = {"name": child.name, "type": "directory", "children": []}
+                stack.append((child, converted["children"]))
+            if child.label is not None:
+                converted["label"] = child.label
+            children.append(converted)
+    return result
+
+
+def render_json(tree: Union[Node, NodeTable], indent: Optional[int] = None) -> str:
+    """Renders the tree as one nested JSON document (see to_dict)."""
+    return json.dumps(to_dict(tree), indent=indent)
@@ -0,0 +1,182 @@
+"""
+Watch mode: keeps the structure file up to date as the tree changes.
+
+Changes are detected by polling the mtime of every directory seen in the last
+scan, which only needs the standard library. A directory's mtime changes when
+entries are added, removed or renamed in it, so after a change only the
+directories whose mtime moved are listed again; every other listing is reused
+from the previous scan.
+"""
+
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+from indastructa_pkg.cli import DirectoryLister, _get_sorted_directory_items
+from indastructa_pkg.matcher import PatternMatcher
+
+WATCH_INTERVAL = 0.25
+WATCH_DEBOUNCE = 0.5
+
+# Same reasoning as the scan cache: a listing taken within this window of the
+# directory's last modification may have missed a change made in the same
+# mtime tick, so it is verified once the window has passed.
+RACY_WINDOW_NS = 2_000_000_000
+
+_MISSING = (-1, -1)
+
+
+class _Listing:
+    __slots__ = ("mtime_ns", "ino", "entries", "listed_ns", "matcher")
+
+    def __init__(
+        self,
+        mtime_ns: int,
+        ino: int,
+        entries: List[os.DirEntry],
+        listed_ns: int,
+        matcher: PatternMatcher,
+    ) -> None:
+        self.mtime_ns = mtime_ns
+        self.ino = ino
+        self.entries = entries
+        self.listed_ns = listed_ns
+        # The rules the directory was listed with, nested .gitignore files
+        # included; a racy listing is checked again with the same rules.
+        self.matcher = matcher
+
+    def is_racy(self) -> bool:
+        return self.mtime_ns >= self.listed_ns - RACY_WINDOW_NS
+
+
+def _signature(entries: List[os.DirEntry]) -> List[Tuple[str, bool, bool]]:
+    return [(entry.name, entry.is_dir(), entry.is_file()) for entry in entries]
+
+
+class DirectoryWatcher:
+    """
+    Remembers the listing of every directory seen by the last scan.
+
+    ``list_directory`` is used as the traversal's lister: it returns the
+    remembered listing while a directory and the rules that apply to it are
+    unchanged and lists it again otherwise. ``changed_directories`` polls the
+    remembered directories.
+    """
+
+    def __init__(self, base_lister: Optional[DirectoryLister] = None) -> None:
+        self.base_lister = base_lister or _get_sorted_directory_items
+        self._listings: Dict[str, _Listing] = {}
+        self._seen: Dict[str, _Listing] = {}
+        self._lock = threading.Lock()
+
+    def begin_scan(self) -> None:
+        self._seen = {}
+
+    def end_scan(self) -> None:
+        # Directories that were not reached this time are no longer watched.
+        self._listings = self._seen
+
+    def list_directory(
+        self, root_path: Union[Path, os.DirEntry], matcher: PatternMatcher
+    ) -> List[os.DirEntry]:
+        """Drop-in replacement for _get_sorted_directory_items."""
+        path = os.fspath(root_path)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return self.base_lister(root_path, matcher)
+
+        listing = self._listings.get(path)
+        if (
+            listing is None
+            or listing.mtime_ns != stat.st_mtime_ns
+            or listing.ino != stat.st_ino
+            or listing.matcher.rules_signature != matcher.rules_signature
+        ):
+            listing = _Listing(
+                stat.st_mtime_ns,
+                stat.st_ino,
+                self.base_lister(root_path, matcher),
+                time.time_ns(),
+                matcher,
+            )
+        with self._lock:
+            self._seen[path] = listing
+        return listing.entries
+
+    def snapshot(self) -> Dict[str, Tuple[int, int]]:
+        """Returns the current (mtime, inode) of every watched directory."""
+        result = {}
+        for path in self._listings:
+            try:
+                stat = os.stat(path)
+                result[path] = (stat.st_mtime_ns, stat.st_ino)
+            except OSError:
+                result[path] = _MISSING
+        return result
+
+    def changed_directories(self) -> List[str]:
+        """Returns the watched directories that changed since they were listed."""
+        changed = []
+        now_ns = time.time_ns()
+        for path, (mtime_ns, ino) in self.snapshot().items():
+            listing = self._listings[path]
+            if mtime_ns != listing.mtime_ns or ino != listing.ino:
+                changed.append(path)
+            elif listing.is_racy() and now_ns - listing.listed_ns > RACY_WINDOW_NS:
+                # Check a racy listing once; keep it if nothing was missed.
+                fresh = self.base_lister(path, listing.matcher)
+                if _signature(fresh) != _signature(listing.entries):
+                    changed.append(path)
+                else:
+                    listing.listed_ns = now_ns
+        return changed
+
+
+def watch_directory(
+    regenerate: Callable[[DirectoryLister], None],
+    watcher: Optional[DirectoryWatcher] = None,
+    interval: float = WATCH_INTERVAL,
+    debounce: float = WATCH_DEBOUNCE,
+    on_update: Optional[Callable[[List[str]], None]] = None,
+    stop_event: Optional[threading.Event] = None,
+) -> None:
+    """
+    Calls ``regenerate`` once, then again every time the tree changes.
+
+    ``regenerate`` receives the lister to scan with. After a change is seen,
+    the directories keep being polled until they have been quiet for
+    ``debounce`` seconds, so a burst of changes (e.g. a ``git checkout``)
+    triggers a single rescan. Runs until ``stop_event`` is set.
+    """
+    if watcher is None:
+        watcher = DirectoryWatcher()
+    if stop_event is None:
+        stop_event = threading.Event()
+
+    def rescan() -> None:
+        watcher.begin_scan()
+        regenerate(watcher.list_directory)
+        watcher.end_scan()
+
+    rescan()
+    while not stop_event.wait(interval):
+        changed = watcher.changed_directories()
+        if not changed:
+            continue
+
+        previous = watcher.snapshot()
+        quiet_since = time.monotonic()
+        while time.monotonic() - quiet_since < debounce:
+            if stop_event.wait(interval):
+                return
+            current = watcher.snapshot()
+            if current != previous:
+                previous = current
+                quiet_since = time.monotonic()
+
+        rescan()
+        if on_update is not None:
+            on_update(changed)
@@ -0,0 +1,396 @@
+"""
+Benchmarks indastructa on repeatable synthetic trees.
+
+Each scenario generates a tree (or reuses one generated earlier with the same
+settings), then times the phases of a scan separately:
+
+- traversal:      listing every directory with os.scandir, unfiltered;
+- ignore_loading: reading .dockerignore and compiling the .gitignore files;
+- matching:       applying the include/exclude rules to every entry;
+- sorting:        sorting the remaining entries of every directory;
+- rendering:      producing the tree lines from the sorted listings;
+- writing:        writing the lines to the output file;
+
+and end to end: ``format_dir_structure``, ``main()`` and the legacy
+``is_excluded`` helper. Phases run on data from the phase before them, so
+they measure only their own work. Results are written as JSON, and
+``--compare`` prints the change against an earlier results file.
+
+Runs offline with the standard library only:
+
+    python -m scripts.benchmark --entries 100000 --output results.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+from unittest.mock import patch
+
+from indastructa_pkg import cli
+from indastructa_pkg.gitignore import GitIgnoreMatcher
+from indastructa_pkg.matcher import PatternMatcher
+
+RESULTS_VERSION = 1
+SPEC_FILENAME = ".benchmark_spec.json"
+
+# name -> (fanout, depth, exclude patterns, root .gitignore lines, nested every N dirs)
+SCENARIOS: Dict[str, tuple] = {
+    "wide": (500, 1, 0, 0, 0),
+    "deep": (2, 12, 0, 0, 0),
+    "balanced": (10, 4, 0, 0, 0),
+    "many-patterns": (10, 4, 500, 0, 0),
+    "large-gitignore": (10, 4, 0, 2000, 10),
+}
+
+PHASES = (
+    "traversal",
+    "ignore_loading",
+    "matching",
+    "sorting",
+    "rendering",
+    "writing",
+    "format_dir_structure",
+    "main",
+    "is_excluded",
+)
+
+_STEMS = ("main", "utils", "test", "index", "config", "model", "view", "data")
+_EXTENSIONS = (".py", ".txt", ".md", ".json", ".log", ".pyc", ".tmp", ".js")
+
+# Number of names the legacy is_excluded helper is timed on: it compiles the
+# patterns on every call, so the whole tree would take too long.
+IS_EXCLUDED_SAMPLE = 1000
+
+
+def exclude_patterns(count: int) -> List[str]:
+    """Returns ``count`` --exclude patterns of the kinds users pass."""
+    kinds = ("*.gen{0}", "build_{0}", "tmp_{0}_*", "*_{0}.bak", "cache[0-9]_{0}")
+    return [kinds[i % len(kinds)].format(i) for i in range(count)]
+
+
+def gitignore_lines(count: int) -> List[str]:
+    """Returns ``count`` .gitignore lines mixing anchored, ``**`` and ``!`` rules."""
+    kinds = (
+        "*.tmp{0}",
+        "/out_{0}/",
+        "**/gen_{0}",
+        "docs/**/draft_{0}.md",
+        "!keep_{0}.log",
+        "d{0}/*.pyc",
+    )
+    lines = ["*.log", "*.pyc"]
+    lines += [kinds[i % len(kinds)].format(i) for i in range(max(count - 2, 0))]
+    return lines[:count]
+
+
+def generate_tree(
+    root: Path,
+    entries: int,
+    fanout: int,
+    depth: int,
+    gitignore: int = 0,
+    nested_every: int = 0,
+    seed: int = 0,
+) -> Path:
+    """
+    Creates a synthetic tree of about ``entries`` files and directories.
+
+    Directories are laid out ``fanout`` wide and ``depth`` deep, and the files
+    are spread over them round-robin with names drawn from ``seed``, so the
+    same arguments always produce the same tree. A tree already generated in
+    ``root`` with the same arguments is reused.
+    """
+    spec = {
+        "entries": entries,
+        "fanout": fanout,
+        "depth": depth,
+        "gitignore": gitignore,
+        "nested_every": nested_every,
+        "seed": seed,
+    }
+    spec_file = root / SPEC_FILENAME
+    try:
+        if json.loads(spec_file.read_text(encoding="utf-8")) == spec:
+            return root
+    except (OSError, ValueError):
+        pass
+
+    if root.exists():
+        _remove_tree(root)
+    root.mkdir(parents=True)
+
+    # At most a quarter of the entries are directories.
+    max_directories = max(entries // 4, 1)
+    directories = [root]
+    level = [root]
+    for _ in range(depth):
+        next_level = []
+        for parent in level:
+            for i in range(fanout):
+                if len(directories) + len(next_level) >= max_directories:
+                    break
+                directory = parent / f"d{i}"
+                directory.mkdir()
+                next_level.append(directory)
+        directories.extend(next_level)
+        level = next_level
+
+    rng = random.Random(seed)
+    for i in range(max(entries - len(directories) + 1, 0)):
+        name = f"{rng.choice(_STEMS)}_{i}{rng.choice(_EXTENSIONS)}"
+        (directories[i % len(directories)] / name).touch()
+
+    if gitignore:
+        (root / ".gitignore").write_text("\n".join(gitignore_lines(gitignore)) + "\n")
+    if nested_every:
+        for directory in directories[1::nested_every]:
+            (directory / ".gitignore").write_text("*.tmp\n!main_*.tmp\n/d1/\n")
+
+    spec_file.write_text(json.dumps(spec), encoding="utf-8")
+    return root
+
+
+def _remove_tree(root: Path) -> None:
+    # Bottom-up, without recursion, so deep trees can be removed too.
+    for dirpath, dirnames, filenames in os.walk(root, topdown=False):
+        for name in filenames:
+            os.unlink(os.path.join(dirpath, name))
+        for name in dirnames:
+            os.rmdir(os.path.join(dirpath, name))
+    os.rmdir(root)
+
+
+def _timed(func: Callable, repeat: int) -> tuple:
+    """Runs ``func`` ``repeat`` times; returns (timings, last result)."""
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return timings, result
+
+
+def _summary(timings: List[float]) -> dict:
+    return {
+        "min": min(timings),
+        "median": statistics.median(timings),
+        "runs": timings,
+    }
+
+
+def benchmark_scenario(
+    root: Path, patterns: List[str], output_dir: Path, repeat: int
+) -> Dict[str, dict]:
+    """Times every phase of a scan of ``root``."""
+    results: Dict[str, dict] = {}
+    base_excludes = cli.EXCLUDE_SET | set(patterns) | {SPEC_FILENAME}
+
+    def traverse() -> Dict[str, List[os.DirEntry]]:
+        listings = {}
+        stack = [os.fspath(root)]
+        while stack:
+            path = stack.pop()
+            with os.scandir(path) as it:
+                entries = list(it)
+            listings[path] = entries
+            stack.extend(entry.path for entry in entries if entry.is_dir())
+        return listings
+
+    timings, listings = _timed(traverse, repeat)
+    results["traversal"] = _summary(timings)
+
+    def load_ignores() -> Dict[str, PatternMatcher]:
+        excludes = set(base_excludes)
+        docker = cli.get_patterns_from_ignore_files(root, [".dockerignore"])
+        excludes.update(p.strip("/") for p in docker)
+        matchers = {}
+        root_matcher = GitIgnoreMatcher.for_root(root, PatternMatcher(excludes))
+        matchers[os.fspath(root)] = root_matcher
+        # Listings are keyed parent-first, so every parent is compiled first.
+        for path in sorted(listings, key=len):
+            matcher = matchers[path]
+            for entry in listings[path]:
+                if entry.is_dir():
+                    matchers[entry.path] = matcher.for_directory(entry.path)
+        return matchers
+
+    timings, matchers = _timed(load_ignores, repeat)
+    results["ignore_loading"] = _summary(timings)
+
+    def match() -> Dict[str, List[os.DirEntry]]:
+        return {
+            path: [entry for entry in entries if not matchers[path].excludes(entry)]
+            for path, entries in listings.items()
+        }
+
+    timings, filtered = _timed(match, repeat)
+    results["matching"] = _summary(timings)
+
+    def sort() -> Dict[str, List[os.DirEntry]]:
+        return {
+            path: sorted(entries, key=cli._entry_sort_key)
+            for path, entries in filtered.items()
+        }
+
+    timings, ordered = _timed(sort, repeat)
+    results["sorting"] = _summary(timings)
+
+    def lister(directory, matcher) -> List[os.DirEntry]:
+        return ordered.get(os.fspath(directory), [])
+
+    root_matcher = matchers[os.fspath(root)]
+    timings, lines = _timed(
+        lambda: list(cli.iter_output_lines(root, root_matcher, lister=lister)),
+        repeat,
+    )
+    results["rendering"] = _summary(timings)
+
+    output_file = output_dir / cli.OUTPUT_FILENAME.name
+    timings, _ = _timed(lambda: cli.write_structure_to_file(output_file, lines), repeat)
+    results["writing"] = _summary(timings)
+
+    timings, _ = _timed(
+        lambda: cli.format_dir_structure(root, matcher=root_matcher), repeat
+    )
+    results["format_dir_structure"] = _summary(timings)
+
+    argv = [
+        "indastructa",
+        os.fspath(root),
+        "--quiet",
+        "-o",
+        os.fspath(output_file),
+        "--exclude",
+        ",".join([SPEC_FILENAME, *patterns]),
+    ]
+    with patch.object(sys, "argv", argv):
+        timings, _ = _timed(cli.main, repeat)
+    results["main"] = _summary(timings)
+
+    names = [entry.name for entries in listings.values() for entry in entries]
+    sample = [Path(name) for name in names[:IS_EXCLUDED_SAMPLE]]
+    excludes = set(base_excludes)
+    timings, _ = _timed(
+        lambda: [cli.is_excluded(path, excludes, set()) for path in sample], repeat
+    )
+    results["is_excluded"] = _summary(timings)
+    results["is_excluded"]["calls"] = len(sample)
+    return results
+
+
+def run(
+    scenarios: List[str], entries: int, repeat: int, workdir: Path, seed: int = 0
+) -> dict:
+    """Generates the trees and benchmarks every scenario."""
+    report = {
+        "version": RESULTS_VERSION,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "entries": entries,
+        "repeat": repeat,
+        "scenarios": {},
+    }
+    for name in scenarios:
+        fanout, depth, pattern_count, gitignore, nested_every = SCENARIOS[name]
+        root = generate_tree(
+            workdir / f"{name}-{entries}",
+            entries,
+            fanout,
+            depth,
+            gitignore,
+            nested_every,
+            seed,
+        )
+        with tempfile.TemporaryDirectory() as output_dir:
+            report["scenarios"][name] = benchmark_scenario(
+                root, exclude_patterns(pattern_count), Path(output_dir), repeat
+            )
+    return report
+
+
+def format_report(report: dict, baseline: Optional[dict] = None) -> str:
+    """Formats the median of every phase, with the change against ``baseline``."""
+    lines = []
+    for name, phases in report["scenarios"].items():
+        lines.append(f"{name} ({report['entries']:,} entries)")
+        previous = (baseline or {}).get("scenarios", {}).get(name, {})
+        for phase in PHASES:
+            median = phases[phase]["median"]
+            line = f"  {phase:<22}{median * 1000:>10.1f} ms"
+            if phase in previous:
+                old = previous[phase]["median"]
+                change = (median - old) / old * 100 if old else 0.0
+                line += f"  ({old * 1000:.1f} ms before, {change:+.1f}%)"
+            lines.append(line)
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Benchmark indastructa on synthetic trees."
+    )
+    parser.add_argument(
+        "--scenario",
+        action="append",
+        choices=sorted(SCENARIOS),
+        help="Scenario to run (repeatable). Default: all.",
+    )
+    parser.add_argument(
+        "--entries",
+        type=int,
+        default=10_000,
+        help="Approximate number of entries per tree (default: 10000).",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=3, help="Runs per phase (default: 3)."
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Seed for file names.")
+    parser.add_argument(
+        "--workdir",
+        type=Path,
+        default=Path(tempfile.gettempdir()) / "indastructa-benchmark",
+        help="Where the synthetic trees are generated and kept between runs.",
+    )
+    parser.add_argument("-o", "--output", type=Path, help="Write results as JSON.")
+    parser.add_argument(
+        "--compare", type=Path, help="Earlier results file to compare against."
+    )
+    args = parser.parse_args()
+
+    if args.entries < 1 or args.repeat < 1:
+        print("Error: --entries and --repeat must be at least 1")
+        sys.exit(1)
+
+    baseline = None
+    if args.compare:
+        try:
+            baseline = json.loads(args.compare.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as e:
+            print(f"Error: cannot read {args.compare}: {e}")
+            sys.exit(1)
+
+    report = run(
+        args.scenario or list(SCENARIOS),
+        args.entries,
+        args.repeat,
+        args.workdir,
+        args.seed,
+    )
+    print(format_report(report, baseline))
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"\nResults written to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
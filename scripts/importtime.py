@@ -0,0 +1,136 @@
+"""
+Checks what starting `indastructa` costs in imports.
+
+Runs the command line's startup (importing the CLI and parsing the
+arguments of a plain run) under ``python -X importtime`` and adds up the
+self time of every module it imports beyond a bare interpreter. Modules that
+only optional features need must not be imported at all, whatever the
+timing:
+
+- the optional subsystems (cache, watch, git index, stats, formats, ...),
+  which are imported when their flags are used;
+- asyncio, tempfile, hashlib, json and concurrent.futures, which those
+  subsystems, or only some runs, need.
+
+That check is deterministic and fails the run (exit status 1). The fastest
+of several runs is also compared with a time budget, but timings vary too
+much between machines for that to fail by default: going over it prints a
+warning, unless ``--strict`` is given. Runs with the standard library only:
+
+    python -m scripts.importtime
+    python -m scripts.importtime --budget-ms 40 --strict
+"""
+
+import argparse
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+# indastructa_pkg is imported from the checkout, whatever the caller's cwd.
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+STARTUP = (
+    "import sys; sys.argv = ['indastructa']; "
+    "from indastructa_pkg.cli import parse_cli_args; parse_cli_args()"
+)
+
+DEFERRED = (
+    "asyncio",
+    "concurrent.futures",
+    "hashlib",
+    "json",
+    "tempfile",
+    "indastructa_pkg.asyncscan",
+    "indastructa_pkg.batch",
+    "indastructa_pkg.cache",
+    "indastructa_pkg.diff",
+    "indastructa_pkg.formats",
+    "indastructa_pkg.gitindex",
+    "indastructa_pkg.sizes",
+    "indastructa_pkg.snapshot",
+    "indastructa_pkg.stats",
+    "indastructa_pkg.tree",
+    "indastructa_pkg.watch",
+)
+
+
+def parse_importtime(output: str) -> Dict[str, int]:
+    """Returns the self time in microseconds of each module in the output."""
+    modules = {}
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        self_us, _, name = line[len("import time:") :].split("|")
+        if self_us.strip().isdigit():
+            modules[name.strip()] = int(self_us)
+    return modules
+
+
+def measure(code: str) -> Dict[str, int]:
+    """Runs ``code`` in a fresh interpreter under -X importtime."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=REPO_ROOT,
+    )
+    return parse_importtime(result.stderr)
+
+
+def startup_imports(repeat: int = 5) -> Tuple[int, List[str]]:
+    """
+    Returns the lowest total import time of the startup, in microseconds,
+    and the modules it imports that a bare interpreter does not.
+    """
+    baseline = set(measure("pass"))
+    best = None
+    for _ in range(repeat):
+        modules = measure(STARTUP)
+        added = {name: us for name, us in modules.items() if name not in baseline}
+        total = sum(added.values())
+        if best is None or total < best[0]:
+            best = (total, sorted(added))
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Check the import time of the indastructa command line."
+    )
+    parser.add_argument(
+        "--budget-ms",
+        type=float,
+        default=60.0,
+        help="Most the startup imports should take, in ms (default: 60).",
+    )
+    parser.add_argument(
+        "--strict",
+        action="store_true",
+        help="Fail, instead of warning, when the budget is exceeded.",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=5, help="Runs to take the best of (default: 5)."
+    )
+    args = parser.parse_args()
+
+    if args.repeat < 1:
+        print("Error: --repeat must be at least 1", file=sys.stderr)
+        sys.exit(1)
+
+    total_us, modules = startup_imports(args.repeat)
+    deferred = [name for name in DEFERRED if name in modules]
+    print(f"Startup imports: {len(modules)} modules in {total_us / 1000:.1f} ms")
+    failed = False
+    if deferred:
+        print(f"Imported at startup but only needed later: {', '.join(deferred)}")
+        failed = True
+    if total_us > args.budget_ms * 1000:
+        print(f"Over the budget of {args.budget_ms:g} ms")
+        failed = failed or args.strict
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
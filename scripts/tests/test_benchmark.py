@@ -0,0 +1,57 @@
+import json
+from pathlib import Path
+
+from scripts import benchmark as b
+
+
+def snapshot(root: Path) -> list:
+    return sorted(p.relative_to(root).as_posix() for p in root.rglob("*"))
+
+
+def test_generate_tree_is_repeatable(tmp_path):
+    """The same arguments produce the same tree, and a second call reuses it."""
+    first = b.generate_tree(tmp_path / "a", 200, 3, 2, gitignore=20, seed=7)
+    second = b.generate_tree(tmp_path / "b", 200, 3, 2, gitignore=20, seed=7)
+
+    assert snapshot(first) == snapshot(second)
+    assert 190 <= len(snapshot(first)) <= 210
+    assert len((first / ".gitignore").read_text().splitlines()) == 20
+
+    marker = first / "d0" / "marker"
+    marker.touch()
+    b.generate_tree(first, 200, 3, 2, gitignore=20, seed=7)
+    assert marker.exists()
+
+    b.generate_tree(first, 100, 3, 2, seed=7)
+    assert not marker.exists()
+
+
+def test_run_times_every_phase(tmp_path):
+    """Every scenario reports every phase, and the report is valid JSON."""
+    report = b.run(list(b.SCENARIOS), entries=60, repeat=2, workdir=tmp_path)
+
+    assert set(report["scenarios"]) == set(b.SCENARIOS)
+    for phases in report["scenarios"].values():
+        assert set(phases) == set(b.PHASES)
+        for timing in phases.values():
+            assert len(timing["runs"]) == 2
+            assert timing["min"] <= timing["median"]
+    json.dumps(report)
+
+
+def test_format_report_compares_with_baseline():
+    """The comparison shows the previous median and the relative change."""
+    timing = {"min": 0.002, "median": 0.002, "runs": [0.002]}
+    report = {
+        "entries": 10,
+        "scenarios": {"wide": {phase: timing for phase in b.PHASES}},
+    }
+    baseline = {
+        "scenarios": {"wide": {"main": {"min": 0.001, "median": 0.001, "runs": []}}}
+    }
+
+    text = b.format_report(report, baseline)
+
+    assert "wide (10 entries)" in text
+    assert "(1.0 ms before, +100.0%)" in text
+    assert text.count("before") == 1
@@ -0,0 +1,62 @@
+import sys
+
+import pytest
+
+from scripts import importtime as it
+
+SAMPLE = """\
+import time: self [us] | cumulative | imported package
+import time:       120 |        120 |   _io
+import time:       850 |       1300 |     fnmatch
+import time:      2400 |       3700 | indastructa_pkg.cli
+"""
+
+
+def test_parse_importtime_reads_self_times():
+    assert it.parse_importtime(SAMPLE) == {
+        "_io": 120,
+        "fnmatch": 850,
+        "indastructa_pkg.cli": 2400,
+    }
+
+
+def test_startup_does_not_import_deferred_modules():
+    """A plain run imports none of the optional subsystems."""
+    total_us, modules = it.startup_imports(repeat=1)
+
+    assert "indastructa_pkg.cli" in modules
+    assert "argparse" in modules
+    assert not set(it.DEFERRED) & set(modules)
+    assert total_us > 0
+
+
+def run_main(monkeypatch, argv, total_us, modules):
+    """Runs main() on a made-up measurement and returns its exit status."""
+    monkeypatch.setattr(sys, "argv", ["importtime", *argv])
+    monkeypatch.setattr(it, "startup_imports", lambda repeat: (total_us, modules))
+    with pytest.raises(SystemExit) as exc:
+        it.main()
+    return exc.value.code
+
+
+def test_main_passes_within_the_budget(monkeypatch, capsys):
+    assert run_main(monkeypatch, [], 20_000, ["argparse"]) == 0
+    assert "1 modules in 20.0 ms" in capsys.readouterr().out
+
+
+def test_main_fails_on_a_deferred_import(monkeypatch, capsys):
+    """Test a deferred module fails the check, however fast the startup is."""
+    assert run_main(monkeypatch, [], 1_000, ["argparse", "json"]) == 1
+    assert "only needed later: json" in capsys.readouterr().out
+
+
+def test_main_only_warns_over_the_budget_unless_strict(monkeypatch, capsys):
+    """Test going over the budget is a warning, and a failure with --strict."""
+    assert run_main(monkeypatch, ["--budget-ms", "40"], 45_000, ["argparse"]) == 0
+    assert "Over the budget of 40 ms" in capsys.readouterr().out
+    assert run_main(monkeypatch, ["--budget-ms", "40", "--strict"], 45_000, []) == 1
+
+
+def test_main_rejects_a_repeat_below_one(monkeypatch, capsys):
+    assert run_main(monkeypatch, ["--repeat", "0"], 0, []) == 1
+    assert "--repeat must be at least 1" in capsys.readouterr().err
@@ -0,0 +1,204 @@
+"""
+Tests for the asyncio scanner: awalk_dir_structure() and scan_async().
+"""
+
+import asyncio
+import os
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+import indastructa_pkg
+from indastructa_pkg.asyncscan import awalk_dir_structure, scan_async
+from indastructa_pkg.cli import (
+    EXCLUDE_SET,
+    ScanBudget,
+    _get_sorted_directory_items,
+    _iter_tree_lines,
+    walk_dir_structure,
+)
+from indastructa_pkg.matcher import PatternMatcher
+from indastructa_pkg.tree import render_text, scan
+
+
+@pytest.fixture
+def project(tmp_path: Path) -> Path:
+    root = tmp_path / "project"
+    (root / "src" / "pkg").mkdir(parents=True)
+    (root / "docs").mkdir()
+    (root / "empty").mkdir()
+    (root / "src" / "main.py").write_text("")
+    (root / "src" / "pkg" / "__init__.py").write_text("")
+    (root / "src" / "pkg" / "loop").symlink_to("..")
+    (root / "docs" / "index.md").write_text("")
+    (root / "debug.log").write_text("")
+    (root / ".gitignore").write_text("*.log\n")
+    (root / "link").symlink_to("src")
+    return root
+
+
+async def collect(*args, **kwargs) -> list:
+    return [item async for item in awalk_dir_structure(*args, **kwargs)]
+
+
+@pytest.mark.parametrize(
+    "options",
+    [{}, {"follow_symlinks": True}, {"depth": 2}, {"max_entries_per_dir": 2}],
+)
+def test_scan_async_matches_scan(project, options):
+    """Test the async scanner builds the same tree as scan()."""
+    tree = asyncio.run(scan_async(project, concurrency=4, **options))
+
+    assert render_text(tree) == render_text(scan(project, **options))
+
+
+def test_walk_renders_like_the_serial_walk(project):
+    """Test the tuples render to the same lines, with a budget too."""
+    matcher = PatternMatcher(EXCLUDE_SET)
+    expected = list(_iter_tree_lines(walk_dir_structure(project, matcher)))
+    budget = ScanBudget(max_entries=3)
+    serial = list(_iter_tree_lines(walk_dir_structure(project, matcher, budget=budget)))
+
+    walk = asyncio.run(collect(project, matcher, concurrency=2))
+    stopped = asyncio.run(collect(project, matcher, budget=ScanBudget(max_entries=3)))
+
+    assert list(_iter_tree_lines(walk)) == expected
+    assert list(_iter_tree_lines(stopped)) == serial
+
+
+@pytest.mark.parametrize("max_depth", [0, 1, 2])
+def test_walk_stops_at_max_depth(project, max_depth):
+    matcher = PatternMatcher(EXCLUDE_SET)
+
+    walk = asyncio.run(collect(project, matcher, max_depth, concurrency=2))
+
+    assert list(_iter_tree_lines(walk)) == list(
+        _iter_tree_lines(walk_dir_structure(project, matcher, max_depth))
+    )
+
+
+def test_walk_one_file_system(project, monkeypatch):
+    """Test a mount point is shown like the serial walk shows it, not listed."""
+    root = os.fspath(project)
+    path_stat = Path.stat
+    listed = []
+
+    def stat(self, *args, **kwargs):
+        st = path_stat(self, *args, **kwargs)
+        if os.fspath(self) != root:
+            return st
+        # The root is on another device than everything below it.
+        fields = list(st)
+        fields[2] = st.st_dev + 1
+        return os.stat_result(fields)
+
+    def lister(path, matcher):
+        listed.append(os.fspath(path))
+        return _get_sorted_directory_items(path, matcher)
+
+    monkeypatch.setattr(Path, "stat", stat)
+    matcher = PatternMatcher(EXCLUDE_SET)
+
+    walk = asyncio.run(collect(project, matcher, lister=lister, one_file_system=True))
+
+    assert list(_iter_tree_lines(walk)) == list(
+        _iter_tree_lines(walk_dir_structure(project, matcher, one_file_system=True))
+    )
+    assert listed == [root]
+
+
+def test_walk_raises_the_error_of_a_listing(project):
+    """Test a listing that fails ends the walk with its error, once reached."""
+
+    def lister(path, matcher):
+        if os.path.basename(path) == "src":
+            raise PermissionError(f"cannot list {path}")
+        return _get_sorted_directory_items(path, matcher)
+
+    async def main():
+        walked = []
+        with pytest.raises(PermissionError):
+            async for _, entry, _, _ in awalk_dir_structure(
+                project, PatternMatcher(EXCLUDE_SET), lister=lister
+            ):
+                walked.append(entry.name)
+        return walked
+
+    assert asyncio.run(main()) == ["docs", "index.md", "empty", "link", "src"]
+
+
+def test_walk_closed_early_cancels_pending_listings(project):
+    """Test closing the walk leaves the listings it queued unfinished."""
+    release = threading.Event()
+    listed = []
+
+    def lister(path, matcher):
+        if os.fspath(path) != os.fspath(project):
+            release.wait(5)
+        listed.append(os.path.basename(path))
+        return _get_sorted_directory_items(path, matcher)
+
+    async def main():
+        walk = awalk_dir_structure(
+            project, PatternMatcher(EXCLUDE_SET), lister=lister, concurrency=1
+        )
+        first = await walk.__anext__()
+        await walk.aclose()
+        return first
+
+    try:
+        depth, entry, is_dir, _ = asyncio.run(main())
+        assert listed == ["project"]
+    finally:
+        release.set()
+
+    assert (depth, entry.name, is_dir) == (0, "docs", True)
+
+
+def test_listings_run_concurrently_without_blocking_the_loop(tmp_path):
+    """Test slow listings overlap while the event loop keeps running."""
+    root = tmp_path / "root"
+    for i in range(8):
+        (root / f"dir_{i}" / "sub").mkdir(parents=True)
+    lock = threading.Lock()
+    running = [0, 0]  # in flight now, most in flight at once
+
+    def slow_lister(path, matcher):
+        with lock:
+            running[0] += 1
+            running[1] = max(running[1], running[0])
+        time.sleep(0.02)
+        with lock:
+            running[0] -= 1
+        return _get_sorted_directory_items(path, matcher)
+
+    async def main():
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.001)
+                ticks += 1
+
+        ticker = asyncio.create_task(tick())
+        walk = await collect(root, PatternMatcher(), lister=slow_lister, concurrency=8)
+        ticker.cancel()
+        return walk, ticks
+
+    walk, ticks = asyncio.run(main())
+
+    assert len(walk) == 16
+    assert running[1] > 1
+    assert ticks > 0
+
+
+def test_invalid_concurrency(project):
+    with pytest.raises(ValueError):
+        asyncio.run(collect(project, PatternMatcher(), concurrency=0))
+
+
+def test_package_exports_scan_async():
+    assert indastructa_pkg.scan_async is scan_async
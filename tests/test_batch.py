@@ -0,0 +1,141 @@
+"""
+Tests for batch mode: several roots scanned in one run.
+"""
+
+import io
+from pathlib import Path
+
+import pytest
+
+from indastructa_pkg.cli import main
+
+
+@pytest.fixture
+def roots(tmp_path: Path) -> list:
+    result = []
+    for name in ("alpha", "beta", "gamma"):
+        root = tmp_path / name
+        (root / "src").mkdir(parents=True)
+        (root / "src" / f"{name}.py").write_text("")
+        (root / "debug.log").write_text("")
+        (root / "notes.md").write_text("")
+        (root / ".gitignore").write_text("*.log\n")
+        result.append(root)
+    (result[1] / ".dockerignore").write_text("notes.md\n")
+    return result
+
+
+def run(monkeypatch, *argv: str) -> int:
+    monkeypatch.setattr("sys.argv", ["indastructa", *argv])
+    with pytest.raises(SystemExit) as exc:
+        main()
+    return exc.value.code
+
+
+def standalone_output(
+    root: Path, monkeypatch, *options: str, name: str = "project_structure.txt"
+) -> bytes:
+    output = root / name
+    output.unlink(missing_ok=True)
+    monkeypatch.setattr("sys.argv", ["indastructa", str(root), "-q", *options])
+    main()
+    return output.read_bytes()
+
+
+@pytest.mark.parametrize("jobs", ["1", "2"])
+def test_batch_output_matches_standalone_runs(roots, monkeypatch, capsys, jobs):
+    """Test every root gets the file a standalone run writes, serially or not."""
+    options = ("--exclude", "*.cfg", "--depth", "2")
+    expected = [standalone_output(root, monkeypatch, *options) for root in roots]
+
+    code = run(monkeypatch, *map(str, roots), "--jobs", jobs, *options)
+
+    assert code == 0
+    assert [(r / "project_structure.txt").read_bytes() for r in roots] == expected
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[0] == f"ok     {roots[0]}: 4 entries in " + lines[0].split(" in ")[1]
+    assert "notes.md" not in (roots[1] / "project_structure.txt").read_text()
+    assert lines[-1].startswith("Scanned 3 roots (12 entries) in ")
+
+
+def test_failed_root_does_not_stop_the_others(roots, tmp_path, monkeypatch, capsys):
+    """Test a missing root is reported, the rest are scanned, the exit is 1."""
+    roots_file = tmp_path / "roots.txt"
+    roots_file.write_text(f"# nightly\n{roots[0]}\n\n{tmp_path / 'missing'}\n")
+
+    code = run(monkeypatch, "--roots-from", str(roots_file), str(roots[2]), "-q")
+
+    assert code == 1
+    captured = capsys.readouterr()
+    assert captured.out == ""
+    assert captured.err.startswith(f"FAILED {tmp_path / 'missing'}: ")
+    assert (roots[0] / "project_structure.txt").exists()
+    assert (roots[2] / "project_structure.txt").exists()
+
+
+def test_partial_roots_are_reported(roots, monkeypatch, capsys):
+    """Test each root has its own budget and a partial batch exits with 3."""
+    code = run(monkeypatch, *map(str, roots), "--max-total-entries", "2", "-j", "1")
+
+    assert code == 3
+    captured = capsys.readouterr()
+    assert captured.err.startswith(f"partial {roots[0]}: ")
+    assert captured.err.count("(stopped by --max-total-entries)") == 3
+    assert captured.out.rstrip().endswith("0 failed, 3 partial")
+    for root in roots:
+        assert "not scanned" in (root / "project_structure.txt").read_text()
+
+
+def test_batch_writes_machine_readable_formats(roots, monkeypatch):
+    """Test the output name and contents follow --format as in a standalone run."""
+    expected = standalone_output(
+        roots[0], monkeypatch, "--format", "ndjson", name="project_structure.ndjson"
+    )
+
+    run(monkeypatch, str(roots[0]), str(roots[1]), "--format", "ndjson", "-q")
+
+    assert (roots[0] / "project_structure.ndjson").read_bytes() == expected
+
+
+def test_batch_rejects_single_root_options(roots, monkeypatch, capsys):
+    """Test options that only make sense for one root are refused."""
+    assert run(monkeypatch, str(roots[0]), str(roots[1]), "--watch") == 1
+    assert "batch mode" in capsys.readouterr().err
+    assert not (roots[0] / "project_structure.txt").exists()
+
+
+def test_roots_are_read_from_stdin(roots, monkeypatch, capsys):
+    monkeypatch.setattr("sys.stdin", io.StringIO(f"{roots[0]}\n{roots[1]}\n"))
+
+    assert run(monkeypatch, "--roots-from", "-", "-j", "1") == 0
+    assert capsys.readouterr().out.count("ok     ") == 2
+    assert (roots[1] / "project_structure.txt").exists()
+
+
+def test_unexpected_error_is_reported_for_its_root(roots, monkeypatch, capsys):
+    """Test an exception that is not an OSError fails only the root it hit."""
+
+    def broken(args, project_dir, *rest, **options):
+        if project_dir.name == "beta":
+            raise ValueError("bad pattern")
+        return iter(["ok"])
+
+    monkeypatch.setattr("indastructa_pkg.batch.iter_selected_output", broken)
+
+    assert run(monkeypatch, *map(str, roots), "-j", "1") == 1
+    assert f"FAILED {roots[1]}: ValueError: bad pattern" in capsys.readouterr().err
+    assert (roots[2] / "project_structure.txt").read_text() == "ok\n"
+
+
+@pytest.mark.parametrize(
+    "options, message",
+    [
+        (["--source", "git-index"], "only supports --source filesystem"),
+        (["-o", "-"], "only supports --source filesystem and an output file"),
+        (["--roots-from", "missing.txt"], "cannot read missing.txt"),
+        (["--jobs", "0"], "--jobs must be at least 1, got 0"),
+    ],
+)
+def test_batch_rejects_bad_options(roots, monkeypatch, capsys, options, message):
+    assert run(monkeypatch, str(roots[0]), str(roots[1]), *options) == 1
+    assert message in capsys.readouterr().err
@@ -0,0 +1,178 @@
+"""
+Tests for the persistent incremental scan cache (--cache).
+"""
+
+import os
+from functools import partial
+from pathlib import Path
+
+import pytest
+
+from indastructa_pkg.cache import ScanCache
+from indastructa_pkg.cli import (
+    _get_sorted_directory_items,
+    format_dir_structure,
+    iter_dir_structure,
+    main,
+)
+from indastructa_pkg.matcher import PatternMatcher
+
+# Well outside the racy window, so listings are always stored.
+OLD_MTIME = 1_600_000_000
+
+
+def age_directories(root: Path, mtime: int = OLD_MTIME) -> None:
+    """Moves every directory's mtime into the past."""
+    for dirpath, _, _ in os.walk(root):
+        os.utime(dirpath, (mtime, mtime))
+
+
+@pytest.fixture
+def cached_project(tmp_path: Path) -> Path:
+    project = tmp_path / "cached_project"
+    (project / "src" / "pkg").mkdir(parents=True)
+    (project / "src" / "pkg" / "module.py").touch()
+    (project / "docs").mkdir()
+    (project / "docs" / "index.md").touch()
+    (project / "README.md").touch()
+    age_directories(project)
+    return project
+
+
+def scan(project: Path, cache_file: Path, matcher: PatternMatcher, depth: int = -1):
+    """Runs one cached scan, checks it against an uncached one and saves it."""
+    cache = ScanCache.load(cache_file, project, matcher, depth)
+    lines = iter_dir_structure(
+        project, matcher, max_depth=depth, lister=cache.list_directory
+    )
+
+    assert "\n".join(lines) == format_dir_structure(
+        project, max_depth=depth, matcher=matcher
+    )
+
+    cache.save()
+    return cache
+
+
+def test_second_run_is_served_from_cache(cached_project: Path, tmp_path: Path):
+    """Test that unchanged directories are not listed again."""
+    cache_file = tmp_path / "cache.json"
+    matcher = PatternMatcher()
+
+    first = scan(cached_project, cache_file, matcher)
+    second = scan(cached_project, cache_file, matcher)
+
+    assert (first.hits, first.misses) == (0, 4)
+    assert (second.hits, second.misses) == (4, 0)
+
+
+def test_changed_directory_is_listed_again(cached_project: Path, tmp_path: Path):
+    """Test that only the directory whose mtime changed is a miss."""
+    cache_file = tmp_path / "cache.json"
+    matcher = PatternMatcher()
+    scan(cached_project, cache_file, matcher)
+
+    (cached_project / "docs" / "new.md").touch()
+    os.utime(cached_project / "docs", (OLD_MTIME + 10, OLD_MTIME + 10))
+
+    cache = scan(cached_project, cache_file, matcher)
+
+    assert (cache.hits, cache.misses) == (3, 1)
+
+
+def test_pattern_or_depth_change_invalidates_cache(
+    cached_project: Path, tmp_path: Path
+):
+    """Test that a different pattern set or depth ignores the stored listings."""
+    cache_file = tmp_path / "cache.json"
+    scan(cached_project, cache_file, PatternMatcher())
+
+    other_patterns = scan(cached_project, cache_file, PatternMatcher({"*.md"}))
+    assert other_patterns.hits == 0
+
+    other_depth = scan(cached_project, cache_file, PatternMatcher({"*.md"}), depth=1)
+    assert other_depth.hits == 0
+
+
+def test_capped_listings_are_cached_with_their_summary(
+    cached_project: Path, tmp_path: Path
+):
+    """Test that --max-entries-per-dir summaries survive a cache round trip."""
+    cache_file = tmp_path / "cache.json"
+    matcher = PatternMatcher()
+    lister = partial(_get_sorted_directory_items, max_entries=1)
+    expected = list(iter_dir_structure(cached_project, matcher, lister=lister))
+
+    for _ in range(2):
+        cache = ScanCache.load(cache_file, cached_project, matcher, -1, lister, 1)
+        lines = list(
+            iter_dir_structure(cached_project, matcher, lister=cache.list_directory)
+        )
+        cache.save()
+        assert lines == expected
+
+    assert expected[-1] == "  +-- ... 1 more directory and 1 more file"
+    assert (cache.hits, cache.misses) == (2, 0)
+    assert ScanCache.load(cache_file, cached_project, matcher, -1, lister).hits == 0
+
+
+def test_corrupt_cache_file_is_ignored(cached_project: Path, tmp_path: Path):
+    """Test that an unreadable cache file behaves like an empty cache."""
+    cache_file = tmp_path / "cache.json"
+    cache_file.write_text("{not json", encoding="utf-8")
+
+    cache = scan(cached_project, cache_file, PatternMatcher())
+
+    assert cache.hits == 0
+
+
+def test_main_with_cache_reports_hits_and_misses(
+    cached_project: Path, monkeypatch, capsys
+):
+    """Test --cache end to end: the cache file is written and excluded."""
+    monkeypatch.setattr("sys.argv", ["indastructa", str(cached_project), "--cache"])
+
+    main()
+
+    out = capsys.readouterr().out
+    assert "Scan cache: 0 hits, 4 misses" in out
+    assert (cached_project / ".indastructa_cache.json").is_file()
+
+    content = (cached_project / "project_structure.txt").read_text(encoding="utf-8")
+    assert ".indastructa_cache.json" not in content
+
+
+def test_main_without_cache_still_excludes_the_cache_file(
+    cached_project: Path, monkeypatch
+):
+    """Test a plain run after a cached one does not list the cache file."""
+    (cached_project / ".indastructa_cache.json").write_text("{}", encoding="utf-8")
+    monkeypatch.setattr("sys.argv", ["indastructa", str(cached_project), "-q"])
+
+    main()
+
+    content = (cached_project / "project_structure.txt").read_text(encoding="utf-8")
+    assert ".indastructa_cache.json" not in content
+
+
+@pytest.mark.parametrize("output_format", ["json", "ndjson"])
+def test_warm_cache_keeps_summaries_in_records(
+    cached_project: Path, monkeypatch, capsys, output_format
+):
+    """Test a cached --max-entries-per-dir summary is an omitted record, not a file."""
+    argv = ["indastructa", str(cached_project), "--format", output_format]
+    argv += ["--max-entries-per-dir", "1", "-o", "-"]
+    monkeypatch.setattr("sys.argv", argv)
+    main()
+    expected = capsys.readouterr().out
+
+    monkeypatch.setattr("sys.argv", argv + ["--cache"])
+    main()
+    age_directories(cached_project)
+    main()
+    capsys.readouterr()
+    main()
+
+    assert capsys.readouterr().out == expected
+    assert '"type":"omitted"' in expected
+    assert "... 1 more" not in expected
@@ -7,7 +7,16 @@ import pytest
 from pathlib import Path
 import sys
 import os
-from indastructa_pkg.cli import main, format_dir_structure
+from indastructa_pkg.cli import (
+    PARTIAL_EXIT_STATUS,
+    ScanBudget,
+    _get_sorted_directory_items,
+    main,
+    format_dir_structure,
+    iter_dir_structure,
+    write_structure_to_file,
+)
+from indastructa_pkg.matcher import PatternMatcher
 
 # Add the project root to the path
 project_root = Path(__file__).parent.parent
@@ -210,6 +219,192 @@ def test_format_dir_structure_with_patterns(project_structure: Path):
     assert "module.pyc" not in result
 
 
+def test_format_dir_structure_exact_output(simple_structure: Path):
+    """Test the exact rendering: directories first, then files, by name."""
+    (simple_structure / "Alpha.txt").touch()
+    (simple_structure / "empty_dir").mkdir()
+
+    result = format_dir_structure(
+        simple_structure, exclude_patterns=set(), include_patterns=set()
+    )
+
+    assert result == (
+        "  |-- empty_dir/\n"
+        "\n"
+        "  |-- subdir/\n"
+        "  |     +-- file3.txt\n"
+        "  |-- Alpha.txt\n"
+        "  |-- file1.txt\n"
+        "  +-- file2.txt"
+    )
+
+
+def test_format_dir_structure_symlinked_directory(simple_structure: Path):
+    """Test that a symlink to a directory is sorted with the directories and
+    shown with its target, without descending into it."""
+    if os.name != "posix":
+        pytest.skip("Symlink tests only work on Unix-like systems")
+
+    (simple_structure / "link_to_subdir").symlink_to("subdir")
+
+    result = format_dir_structure(
+        simple_structure, exclude_patterns=set(), include_patterns=set()
+    )
+    lines = result.split("\n")
+
+    assert lines[0] == "  |-- link_to_subdir -> subdir"
+    assert lines[1] == "  |-- subdir/"
+    assert lines[2] == "  |     +-- file3.txt"
+
+
+def test_format_dir_structure_follows_symlinks(simple_structure: Path):
+    """Test --follow-symlinks walks a linked directory once and stops at loops."""
+    if os.name != "posix":
+        pytest.skip("Symlink tests only work on Unix-like systems")
+
+    (simple_structure / "link_to_subdir").symlink_to("subdir")
+    (simple_structure / "subdir" / "loop").symlink_to("..")
+
+    result = format_dir_structure(
+        simple_structure,
+        exclude_patterns=set(),
+        include_patterns=set(),
+        follow_symlinks=True,
+    )
+
+    assert result.split("\n") == [
+        "  |-- link_to_subdir -> subdir/",
+        "  |     |-- loop -> .. (already shown)",
+        "  |     +-- file3.txt",
+        "  |-- subdir/ (already shown)",
+        "  |-- file1.txt",
+        "  +-- file2.txt",
+    ]
+
+
+def test_format_dir_structure_one_file_system(simple_structure: Path, monkeypatch):
+    """Test --one-file-system shows a mount point without descending into it."""
+    root = os.fspath(simple_structure)
+    path_stat = Path.stat
+
+    def stat(self, *args, **kwargs):
+        st = path_stat(self, *args, **kwargs)
+        if os.fspath(self) != root:
+            return st
+        # The root is on another device than everything below it.
+        fields = list(st)
+        fields[2] = st.st_dev + 1
+        return os.stat_result(fields)
+
+    monkeypatch.setattr(Path, "stat", stat)
+
+    result = format_dir_structure(
+        simple_structure,
+        exclude_patterns=set(),
+        include_patterns=set(),
+        one_file_system=True,
+    )
+
+    assert result.split("\n") == [
+        "  |-- subdir/ (mount point)",
+        "  |-- file1.txt",
+        "  +-- file2.txt",
+    ]
+
+
+def test_iter_dir_structure_is_lazy(simple_structure: Path):
+    """Test that the streaming renderer yields the same lines one by one."""
+    lines = iter_dir_structure(simple_structure, PatternMatcher())
+
+    assert next(lines) == "  |-- subdir/"
+    assert list(lines) == format_dir_structure(simple_structure).split("\n")[1:]
+
+
+def test_format_dir_structure_deeper_than_recursion_limit(tmp_path: Path):
+    """Test that trees deeper than the recursion limit are rendered."""
+    depth = 300
+    deepest = tmp_path
+    for _ in range(depth):
+        deepest = deepest / "d"
+        deepest.mkdir()
+    (deepest / "leaf.txt").touch()
+
+    original_limit = sys.getrecursionlimit()
+    sys.setrecursionlimit(150)
+    try:
+        lines = format_dir_structure(tmp_path).split("\n")
+    finally:
+        sys.setrecursionlimit(original_limit)
+
+    assert len(lines) == depth + 1
+    assert lines[0] == "  +-- d/"
+    assert lines[-1] == "      " * depth + "  +-- leaf.txt"
+
+
+def test_write_structure_to_file_streams_lines(tmp_path: Path):
+    """Test writing an iterable of lines to the file and an echo stream."""
+    import io
+
+    output_file = tmp_path / "out.txt"
+    echo = io.StringIO()
+
+    write_structure_to_file(output_file, iter(["root/", "  +-- a.txt"]), echo=echo)
+
+    assert output_file.read_text(encoding="utf-8") == "root/\n  +-- a.txt\n"
+    assert echo.getvalue() == "root/\n  +-- a.txt\n"
+
+
+def test_write_structure_to_file_leaves_unchanged_file_alone(tmp_path: Path):
+    """Test identical content neither rewrites the file nor touches its directory."""
+    output_file = tmp_path / "out.txt"
+    assert write_structure_to_file(output_file, iter(["root/", "  +-- a.txt"]))
+    os.utime(output_file, ns=(0, 0))
+
+    def state():
+        st = output_file.stat()
+        return st.st_ino, st.st_mtime_ns, st.st_ctime_ns, tmp_path.stat().st_mtime_ns
+
+    before = state()
+    changed = write_structure_to_file(output_file, iter(["root/", "  +-- a.txt"]))
+
+    assert not changed
+    assert state() == before
+
+
+@pytest.mark.parametrize(
+    "lines", [["root/", "  +-- b.txt"], ["root/"], ["root/", "  +-- a.txt", "x"]]
+)
+def test_write_structure_to_file_replaces_changed_file(tmp_path: Path, lines):
+    """Test new content replaces the file, keeping its mode and no temp files."""
+    output_file = tmp_path / "out.txt"
+    output_file.write_text("root/\n  +-- a.txt\n", encoding="utf-8")
+    output_file.chmod(0o640)
+
+    assert write_structure_to_file(output_file, iter(lines))
+
+    assert output_file.read_text(encoding="utf-8") == "".join(
+        f"{line}\n" for line in lines
+    )
+    assert output_file.stat().st_mode & 0o777 == 0o640
+    assert os.listdir(tmp_path) == ["out.txt"]
+
+
+def test_interrupted_write_keeps_the_old_file(tmp_path: Path):
+    """Test a failure while streaming leaves the previous file intact."""
+    output_file = tmp_path / "out.txt"
+    output_file.write_text("old\n", encoding="utf-8")
+
+    def lines():
+        yield "new"
+        raise RuntimeError("scan failed")
+
+    with pytest.raises(RuntimeError):
+        write_structure_to_file(output_file, lines())
+
+    assert output_file.read_text(encoding="utf-8") == "old\n"
+    assert os.listdir(tmp_path) == ["out.txt"]
+
+
 # ============================================================================
 # TESTS - main() function with default behavior
 # ============================================================================
@@ -490,6 +685,18 @@ def test_main_with_custom_output_file(simple_structure: Path, monkeypatch):
     assert custom_file.stat().st_size > 0
 
 
+def test_main_console_output_matches_file(simple_structure: Path, monkeypatch, capsys):
+    """Test that the tree streamed to stdout is the same as the saved file."""
+    monkeypatch.setattr("sys.argv", ["indastructa", str(simple_structure)])
+
+    main()
+
+    content = (simple_structure / "project_structure.txt").read_text(encoding="utf-8")
+    captured = capsys.readouterr()
+    assert f"--- Project Structure ---\n{content}\n" in captured.out
+    assert "successfully saved" in captured.out.splitlines()[-1]
+
+
 def test_main_with_quiet_flag(project_structure: Path, monkeypatch, capsys):
     """Test that --quiet suppresses all console output on success."""
     output_file = project_structure / "project_structure.txt"
@@ -514,6 +721,167 @@ def test_main_with_quiet_short_form(project_structure: Path, monkeypatch, capsys
     assert captured.err == ""
 
 
+def test_main_with_jobs_matches_serial_output(project_structure: Path, monkeypatch):
+    """Test that --jobs produces exactly the same output as the serial scan."""
+    output_file = project_structure / "project_structure.txt"
+
+    monkeypatch.setattr(
+        "sys.argv", ["indastructa", str(project_structure), "--jobs", "1", "-q"]
+    )
+    main()
+    serial = output_file.read_text(encoding="utf-8")
+
+    monkeypatch.setattr(
+        "sys.argv",
+        ["indastructa", str(project_structure), "--jobs", "4", "--depth", "2", "-q"],
+    )
+    main()
+    parallel_limited = output_file.read_text(encoding="utf-8")
+
+    monkeypatch.setattr(
+        "sys.argv", ["indastructa", str(project_structure), "--jobs", "4", "-q"]
+    )
+    main()
+    parallel = output_file.read_text(encoding="utf-8")
+
+    assert parallel == serial
+    assert "helpers.py" not in parallel_limited
+    assert "main.py" in parallel_limited
+
+
+def test_main_with_invalid_jobs(simple_structure: Path, monkeypatch, capsys):
+    """Test that --jobs below 1 is rejected."""
+    monkeypatch.setattr(
+        "sys.argv", ["indastructa", str(simple_structure), "--jobs", "0"]
+    )
+
+    with pytest.raises(SystemExit):
+        main()
+
+    assert "--jobs" in capsys.readouterr().err
+
+
+def test_max_entries_per_dir_summarizes_the_rest(tmp_path: Path):
+    """Test that a capped directory shows its first entries and a summary line."""
+    frames = tmp_path / "frames"
+    frames.mkdir()
+    for i in range(25):
+        (frames / f"frame_{i:03d}.png").touch()
+    (frames / "sub_a").mkdir()
+    (frames / "sub_b").mkdir()
+    matcher = PatternMatcher()
+
+    capped = _get_sorted_directory_items(frames, matcher, max_entries=3)
+    full = _get_sorted_directory_items(frames, matcher)
+
+    assert [e.name for e in capped[:3]] == [e.name for e in full[:3]]
+    assert capped[3].name == "... 24 more files"
+    single = _get_sorted_directory_items(frames, matcher, max_entries=1)
+    assert single[1].name == "... 1 more directory and 25 more files"
+    assert len(_get_sorted_directory_items(frames, matcher, max_entries=27)) == 27
+
+
+def test_main_with_max_entries_per_dir(simple_structure: Path, monkeypatch):
+    """Test --max-entries-per-dir end to end, including the output format."""
+    many = simple_structure / "many"
+    many.mkdir()
+    for i in range(10):
+        (many / f"item_{i}.txt").touch()
+    monkeypatch.setattr(
+        "sys.argv",
+        ["indastructa", str(simple_structure), "--max-entries-per-dir", "4", "-q"],
+    )
+
+    main()
+
+    content = (simple_structure / "project_structure.txt").read_text(encoding="utf-8")
+    assert "|-- item_3.txt" in content
+    assert "item_4.txt" not in content
+    assert "+-- ... 6 more files" in content
+
+
+def test_main_with_invalid_max_entries_per_dir(
+    simple_structure: Path, monkeypatch, capsys
+):
+    """Test that --max-entries-per-dir below 1 is rejected."""
+    monkeypatch.setattr(
+        "sys.argv",
+        ["indastructa", str(simple_structure), "--max-entries-per-dir", "0"],
+    )
+
+    with pytest.raises(SystemExit):
+        main()
+
+    assert "--max-entries-per-dir" in capsys.readouterr().err
+
+
+def test_scan_budget_marks_where_the_walk_stopped(simple_structure: Path):
+    """Test a walk out of budget ends every unfinished directory with a marker."""
+    (simple_structure / "subdir" / "file4.txt").touch()
+    budget = ScanBudget(max_entries=2)
+
+    lines = list(iter_dir_structure(simple_structure, PatternMatcher(), budget=budget))
+
+    assert lines == [
+        "  |-- subdir/",
+        "  |     |-- file3.txt",
+        "  |     +-- ... 1 more file not scanned (--max-total-entries reached)",
+        "  +-- ... 2 more files not scanned (--max-total-entries reached)",
+    ]
+    assert budget.exceeded == "--max-total-entries"
+
+
+def test_scan_budget_is_not_exceeded_by_a_complete_scan(simple_structure: Path):
+    budget = ScanBudget(max_entries=4, seconds=60)
+
+    lines = list(iter_dir_structure(simple_structure, PatternMatcher(), budget=budget))
+
+    assert lines == format_dir_structure(simple_structure).split("\n")
+    assert budget.exceeded is None
+
+
+@pytest.mark.parametrize(
+    "option, value", [("--max-total-entries", "1"), ("--time-budget", "0.000001")]
+)
+def test_main_with_scan_budget_writes_partial_output(
+    simple_structure: Path, monkeypatch, capsys, option, value
+):
+    """Test the partial tree is written and the exit status says it is partial."""
+    monkeypatch.setattr(
+        "sys.argv", ["indastructa", str(simple_structure), option, value, "-q"]
+    )
+
+    with pytest.raises(SystemExit) as exc:
+        main()
+
+    assert exc.value.code == PARTIAL_EXIT_STATUS
+    content = (simple_structure / "project_structure.txt").read_text(encoding="utf-8")
+    assert content.rstrip("\n").endswith(f"not scanned ({option} reached)")
+    assert f"scan stopped by {option}" in capsys.readouterr().err
+
+
+@pytest.mark.parametrize(
+    "options, message",
+    [
+        (["--max-total-entries", "0"], "--max-total-entries must be at least 1"),
+        (["--time-budget", "0"], "--time-budget must be greater than 0"),
+        (["--max-total-entries", "5", "--watch"], "with --watch or --diff"),
+        (["--time-budget", "5", "--diff", "old.txt"], "with --watch or --diff"),
+    ],
+)
+def test_main_with_invalid_scan_budget(
+    simple_structure: Path, monkeypatch, capsys, options, message
+):
+    """Test budgets below the minimum, or with --watch or --diff, are rejected."""
+    monkeypatch.setattr("sys.argv", ["indastructa", str(simple_structure), *options])
+
+    with pytest.raises(SystemExit) as exc:
+        main()
+
+    assert exc.value.code == 1
+    assert message in capsys.readouterr().err
+
+
 # ============================================================================
 # TESTS - CLI arguments: --include
 # ============================================================================
@@ -876,6 +1244,7 @@ def test_main_with_help_flag(monkeypatch, capsys):
 
     captured = capsys.readouterr()
     assert "usage:" in captured.out.lower() or "indastructa" in captured.out.lower()
+    assert "Examples:" in captured.out  # built only when the help is shown
 
 
 def test_main_without_arguments(monkeypatch, tmp_path):
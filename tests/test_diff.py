@@ -0,0 +1,195 @@
+"""
+Tests for --diff: changes between saved structures and the current tree.
+"""
+
+import shutil
+from pathlib import Path
+
+import pytest
+
+from indastructa_pkg.cli import main
+from indastructa_pkg.diff import Change, diff_structures, parse_structure
+
+OLD = """\
+project/
+  |-- docs/
+  |     +-- index.md
+  |-- out/
+  |     +-- report.html
+  |-- src/
+  |     |-- empty/
+
+  |     +-- main.py
+  +-- README.md
+"""
+
+
+def test_parse_structure_reads_paths_and_kinds():
+    """Test depth, kind and sort rank come from the connectors and labels."""
+    lines = [
+        "project/",
+        "  |-- docs -> site/",
+        "  |     +-- index.md (1.0 KiB)",
+        "  |-- src/ (2 files, 3 B)",
+        "  |     +-- ... 2 more files",
+        "  |-- loop -> .. (already shown)",
+        "  |-- mnt/ (mount point)",
+        "  +-- notes.md",
+    ]
+
+    entries = [(e.keys[-1], e.kind) for e in parse_structure(lines)]
+
+    assert entries == [
+        ((0, "docs", "docs"), "symlink"),
+        ((1, "index.md", "index.md"), "file"),
+        ((0, "src", "src"), "directory"),
+        ((0, "loop", "loop"), "symlink"),
+        ((0, "mnt", "mnt"), "directory"),
+        ((1, "notes.md", "notes.md"), "file"),
+    ]
+
+
+def test_diff_reports_added_removed_and_type_changes():
+    """Test a directory replaced by a file is one change, listed in order."""
+    new = OLD.replace("  |-- out/\n  |     +-- report.html\n", "").replace(
+        "  +-- README.md", "  |-- out\n  +-- README.md"
+    )
+    new = new.replace("  |     +-- index.md", "  |     +-- guide.md")
+
+    changes = diff_structures(OLD.splitlines(), new.splitlines())
+
+    assert changes == [
+        Change("+", "docs/guide.md", "file"),
+        Change("-", "docs/index.md", "file"),
+        Change("~", "out", "file", "directory"),
+        Change("-", "out/report.html", "file"),
+    ]
+    assert [str(c) for c in changes[2:]] == [
+        "~ out (directory -> file)",
+        "- out/report.html",
+    ]
+
+
+def test_identical_structures_have_no_changes():
+    assert diff_structures(OLD.splitlines(), OLD.splitlines()) == []
+
+
+def test_added_directory_lists_its_contents():
+    """Test a whole new subtree is reported entry by entry, parents first."""
+    new = OLD.replace(
+        "  |     |-- empty/\n\n",
+        "  |     |-- empty/\n\n  |     |-- lib/\n  |     |     +-- util.py\n",
+    )
+
+    changes = diff_structures(OLD.splitlines(), new.splitlines())
+
+    assert [str(c) for c in changes] == ["+ src/lib/", "+ src/lib/util.py"]
+
+
+@pytest.fixture
+def project(tmp_path: Path) -> Path:
+    root = tmp_path / "project"
+    (root / "docs").mkdir(parents=True)
+    (root / "src").mkdir()
+    (root / "docs" / "index.md").write_text("")
+    (root / "src" / "main.py").write_text("")
+    return root
+
+
+def test_main_diff_against_the_current_tree(project, tmp_path, monkeypatch, capsys):
+    """Test --diff prints the changes since the saved file and writes nothing."""
+    snapshot = tmp_path / "old.txt"
+    monkeypatch.setattr("sys.argv", ["indastructa", str(project), "-q"])
+    main()
+    shutil.move(project / "project_structure.txt", snapshot)
+    (project / "src" / "main.py").unlink()
+    (project / "src" / "main.py").mkdir()
+    (project / "setup.cfg").write_text("")
+
+    monkeypatch.setattr(
+        "sys.argv", ["indastructa", str(project), "--diff", str(snapshot)]
+    )
+    main()
+
+    assert capsys.readouterr().out == (
+        "~ src/main.py (file -> directory)\n"
+        "+ setup.cfg\n"
+        "1 added, 0 removed, 1 changed type\n"
+    )
+    assert not (project / "project_structure.txt").exists()
+
+
+def test_main_diff_between_two_files(tmp_path, monkeypatch, capsys):
+    """Test two files are compared without scanning anything."""
+    old, new = tmp_path / "old.txt", tmp_path / "new.txt"
+    old.write_text(OLD, encoding="utf-8")
+    new.write_text(OLD.replace("  +-- README.md\n", ""), encoding="utf-8")
+    monkeypatch.setattr("sys.argv", ["indastructa", "--diff", str(old), str(new)])
+
+    main()
+
+    assert capsys.readouterr().out.splitlines() == [
+        "- README.md",
+        "0 added, 1 removed, 0 changed type",
+    ]
+
+
+def test_main_diff_with_missing_file(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(
+        "sys.argv", ["indastructa", str(tmp_path), "--diff", str(tmp_path / "no")]
+    )
+
+    with pytest.raises(SystemExit) as exc:
+        main()
+
+    assert exc.value.code == 1
+    assert "cannot read" in capsys.readouterr().err
+
+
+def test_main_diff_with_undecodable_file(tmp_path, monkeypatch, capsys):
+    """Test a file that is not UTF-8 text is reported, not raised."""
+    old, new = tmp_path / "old.txt", tmp_path / "new.bin"
+    old.write_text(OLD, encoding="utf-8")
+    new.write_bytes(b"project/\n  +-- \xff\xfe\n")
+    monkeypatch.setattr("sys.argv", ["indastructa", "--diff", str(old), str(new)])
+
+    with pytest.raises(SystemExit) as exc:
+        main()
+
+    assert exc.value.code == 1
+    assert "cannot read" in capsys.readouterr().err
+
+
+def test_main_diff_with_corrupt_snapshot(tmp_path, monkeypatch, capsys):
+    """Test a file with the snapshot header but no body is reported."""
+    old, new = tmp_path / "old.txt", tmp_path / "new.snap"
+    old.write_text(OLD, encoding="utf-8")
+    new.write_bytes(b"IDXSNAP\0")
+    monkeypatch.setattr("sys.argv", ["indastructa", "--diff", str(old), str(new)])
+
+    with pytest.raises(SystemExit) as exc:
+        main()
+
+    assert exc.value.code == 1
+    assert f"cannot read {new}" in capsys.readouterr().err
+
+
+@pytest.mark.parametrize(
+    "options, message",
+    [
+        (["--diff", "a", "b", "c"], "--diff takes one or two files"),
+        (["--diff", "a", "--format", "json"], "--diff cannot be used"),
+        (["--diff", "a", "--sizes"], "--diff cannot be used"),
+        (["--diff", "a", "--watch"], "--diff cannot be used"),
+        ([".", "--diff", "a"], "--diff cannot be used"),
+    ],
+)
+def test_main_diff_rejects_bad_options(tmp_path, monkeypatch, capsys, options, message):
+    """Test --diff refuses what it cannot compare, before reading any file."""
+    monkeypatch.setattr("sys.argv", ["indastructa", str(tmp_path), *options])
+
+    with pytest.raises(SystemExit) as exc:
+        main()
+
+    assert exc.value.code == 1
+    assert message in capsys.readouterr().err
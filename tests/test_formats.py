@@ -0,0 +1,195 @@
+"""
+Tests for the JSON and NDJSON output formats.
+"""
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from indastructa_pkg.cli import _get_sorted_directory_items, iter_output_lines, main
+from indastructa_pkg.formats import iter_formatted_lines, iter_records
+from indastructa_pkg.matcher import PatternMatcher
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+
+@pytest.fixture
+def project(tmp_path: Path) -> Path:
+    root = tmp_path / "project"
+    (root / "src" / "pkg").mkdir(parents=True)
+    (root / "docs").mkdir()
+    (root / "src" / "main.py").write_text("print()")
+    (root / "src" / "pkg" / "__init__.py").write_text("")
+    (root / "README.md").write_text("readme")
+    return root
+
+
+def test_records_follow_the_tree_order(project: Path):
+    """Test there is one record per tree line, in the same order."""
+    records = list(iter_records(project, PatternMatcher()))
+    tree_names = [
+        line.split("-- ", 1)[1].rstrip("/")
+        for line in iter_output_lines(project, PatternMatcher())
+        if "-- " in line
+    ]
+
+    assert [r["path"].rsplit("/", 1)[-1] for r in records] == tree_names
+    assert records[:3] == [
+        {"path": "docs", "type": "directory", "depth": 1},
+        {"path": "src", "type": "directory", "depth": 1},
+        {"path": "src/pkg", "type": "directory", "depth": 2},
+    ]
+
+
+def test_ndjson_is_one_document_per_line(project: Path):
+    """Test every NDJSON line parses on its own."""
+    lines = list(iter_formatted_lines("ndjson", project, PatternMatcher()))
+
+    assert [json.loads(line) for line in lines] == list(
+        iter_records(project, PatternMatcher())
+    )
+
+
+def test_json_is_a_single_document(project: Path):
+    """Test the JSON lines join into one document, including an empty tree."""
+    document = json.loads(
+        "\n".join(iter_formatted_lines("json", project, PatternMatcher()))
+    )
+
+    assert document["root"] == "project"
+    assert document["entries"] == list(iter_records(project, PatternMatcher()))
+
+    empty = project / "docs"
+    assert json.loads(
+        "".join(iter_formatted_lines("json", empty, PatternMatcher()))
+    ) == {"root": "docs", "entries": []}
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="POSIX file names")
+def test_unusual_names_round_trip(tmp_path: Path):
+    """Test newlines and non-UTF-8 bytes in names survive as escaped JSON."""
+    (tmp_path / "line\nbreak.txt").write_text("")
+    try:
+        (tmp_path / os.fsdecode(b"caf\xe9.txt")).write_text("")
+    except OSError:
+        pytest.skip("filesystem rejects non-UTF-8 names")
+
+    lines = list(iter_formatted_lines("ndjson", tmp_path, PatternMatcher()))
+
+    assert len(lines) == 2
+    assert all(line.isascii() for line in lines)
+    paths = {json.loads(line)["path"] for line in lines}
+    assert paths == {"line\nbreak.txt", os.fsdecode(b"caf\xe9.txt")}
+
+
+def test_metadata_adds_size_and_mtime(project: Path):
+    """Test --metadata fields: size for files only, mtime for everything."""
+    records = {
+        r["path"]: r for r in iter_records(project, PatternMatcher(), metadata=True)
+    }
+
+    assert records["README.md"]["size"] == 6
+    assert records["README.md"]["mtime"] == (project / "README.md").stat().st_mtime
+    assert "size" not in records["docs"]
+    assert "mtime" in records["docs"]
+
+
+def test_omitted_entries_become_a_record(project: Path):
+    """Test a capped directory ends with a record counting what was left out."""
+    for i in range(4):
+        (project / "docs" / f"page{i}.md").write_text("")
+    lister = lambda path, matcher: _get_sorted_directory_items(  # noqa: E731
+        path, matcher, max_entries=2
+    )
+
+    records = list(iter_records(project / "docs", PatternMatcher(), lister=lister))
+
+    assert records[-1] == {
+        "path": "",
+        "type": "omitted",
+        "depth": 1,
+        "directories": 0,
+        "files": 2,
+    }
+
+
+def test_main_writes_default_file_per_format(project: Path, monkeypatch):
+    """Test each format gets its own default output file name."""
+    monkeypatch.setattr(
+        "sys.argv", ["indastructa", str(project), "--format", "ndjson", "-q"]
+    )
+    main()
+    monkeypatch.setattr(
+        "sys.argv", ["indastructa", str(project), "--format", "json", "-q"]
+    )
+    main()
+
+    ndjson_lines = (project / "project_structure.ndjson").read_text().splitlines()
+    assert {"path": "README.md", "type": "file", "depth": 1} in map(
+        json.loads, ndjson_lines
+    )
+    document = json.loads((project / "project_structure.json").read_text())
+    paths = [record["path"] for record in document["entries"]]
+    assert "project_structure.json" not in paths  # the output file is excluded
+    assert not (project / "project_structure.txt").exists()
+
+
+def test_main_streams_to_stdout(project: Path, monkeypatch, capsys):
+    """Test -o - prints only the records, and writes no file."""
+    monkeypatch.setattr(
+        "sys.argv",
+        ["indastructa", str(project), "--format", "ndjson", "--metadata", "-o", "-"],
+    )
+
+    main()
+
+    lines = capsys.readouterr().out.splitlines()
+    assert all("mtime" in json.loads(line) for line in lines)
+    assert len(lines) == 6
+    assert not list(project.glob("project_structure.*"))
+
+
+def test_main_rejects_metadata_for_text(project: Path, monkeypatch, capsys):
+    """Test --metadata needs a machine-readable format."""
+    monkeypatch.setattr("sys.argv", ["indastructa", str(project), "--metadata"])
+
+    with pytest.raises(SystemExit) as exc:
+        main()
+
+    assert exc.value.code == 1
+    assert "--metadata requires" in capsys.readouterr().err
+
+
+@pytest.mark.parametrize("module", ["indastructa_pkg", "indastructa_pkg.cli"])
+def test_main_run_as_a_module(project: Path, module: str):
+    """Test python -m still turns capped directories into omitted records."""
+    (project / "docs" / "a.md").write_text("")
+    (project / "docs" / "b.md").write_text("")
+    argv = [str(project), "--format", "ndjson", "--max-entries-per-dir", "1"]
+    result = subprocess.run(
+        [sys.executable, "-m", module, *argv, "-o", "-"],
+        cwd=REPO_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    records = [json.loads(line) for line in result.stdout.splitlines()]
+
+    assert [record["type"] for record in records] == [
+        "directory",
+        "file",
+        "omitted",
+        "omitted",
+    ]
+    assert records[-1] == {
+        "path": "",
+        "type": "omitted",
+        "depth": 1,
+        "directories": 1,
+        "files": 1,
+    }
@@ -0,0 +1,145 @@
+"""
+Tests for the gitignore engine: pattern semantics and nested .gitignore files.
+"""
+
+from pathlib import Path
+
+import pytest
+
+from indastructa_pkg.cli import format_dir_structure, main
+from indastructa_pkg.gitignore import GitIgnoreMatcher, IgnoreFile
+from indastructa_pkg.matcher import PatternMatcher
+
+
+def ignored(lines, path, is_dir=False):
+    """Evaluates .gitignore lines in /repo against /repo/<path>."""
+    return IgnoreFile("/repo", [f"{line}\n" for line in lines]).match(
+        f"/repo/{path}", is_dir
+    )
+
+
+@pytest.mark.parametrize(
+    "lines, path, is_dir, expected",
+    [
+        # Patterns without a slash match at any level.
+        (["*.log"], "app.log", False, True),
+        (["*.log"], "deep/nested/app.log", False, True),
+        (["*.log"], "app.txt", False, None),
+        # A leading or middle slash anchors the pattern.
+        (["/build"], "build", True, True),
+        (["/build"], "src/build", True, None),
+        (["docs/api"], "docs/api", True, True),
+        (["docs/api"], "src/docs/api", True, None),
+        # A trailing slash only matches directories.
+        (["cache/"], "cache", True, True),
+        (["cache/"], "cache", False, None),
+        # Wildcards do not cross directories.
+        (["src/*.py"], "src/main.py", False, True),
+        (["src/*.py"], "src/pkg/main.py", False, None),
+        # "**" in leading, middle and trailing position.
+        (["**/logs"], "logs", True, True),
+        (["**/logs"], "a/b/logs", True, True),
+        (["a/**/b"], "a/b", True, True),
+        (["a/**/b"], "a/x/y/b", True, True),
+        (["vendor/**"], "vendor/lib/x.c", False, True),
+        (["vendor/**"], "vendor", True, None),
+        # The last matching rule wins; "!" re-includes.
+        (["*.log", "!keep.log"], "keep.log", False, False),
+        (["!keep.log", "*.log"], "keep.log", False, True),
+        # Escapes, comments and character classes.
+        (["\\#notes"], "#notes", False, True),
+        (["# comment"], "# comment", False, None),
+        (["\\!important"], "!important", False, True),
+        (["file[0-9].txt"], "file7.txt", False, True),
+        (["file[!0-9].txt"], "file7.txt", False, None),
+        (["trailing   "], "trailing", False, True),
+        # Precedence holds across name, extension and path rules.
+        (["!keep.log", "/keep.log"], "keep.log", False, True),
+        (["/keep.log", "!*.log"], "keep.log", False, False),
+        (["docs/**/draft.md", "!draft.md"], "docs/a/draft.md", False, False),
+        (["!draft.md", "docs/**/draft.md"], "docs/a/draft.md", False, True),
+        (["*/tmp", "!a/tmp"], "a/tmp", True, False),
+    ],
+)
+def test_gitignore_pattern_semantics(lines, path, is_dir, expected):
+    """Test gitignore pattern rules against relative paths."""
+    assert ignored(lines, path, is_dir) is expected
+
+
+@pytest.fixture
+def monorepo(tmp_path: Path) -> Path:
+    root = tmp_path / "monorepo"
+    (root / "services" / "api" / "generated" / "big").mkdir(parents=True)
+    (root / "services" / "api" / "generated" / "big" / "blob.bin").touch()
+    (root / "services" / "api" / "main.py").touch()
+    (root / "services" / "api" / "debug.tmp").touch()
+    (root / "services" / "api" / "keep.log").touch()
+    (root / "services" / "web").mkdir()
+    (root / "services" / "web" / "debug.tmp").touch()
+    (root / "services" / "web" / "error.log").touch()
+    (root / "build").mkdir()
+    (root / "services" / "build").mkdir()
+
+    (root / ".gitignore").write_text("*.log\n/build/\n")
+    (root / "services" / "api" / ".gitignore").write_text(
+        "generated/\n*.tmp\n!keep.log\n"
+    )
+    return root
+
+
+def test_nested_gitignore_files(monorepo: Path):
+    """Test that each .gitignore applies to its own directory and below."""
+    matcher = GitIgnoreMatcher.for_root(monorepo, PatternMatcher())
+
+    result = format_dir_structure(monorepo, matcher=matcher)
+
+    assert "generated" not in result
+    assert "main.py" in result
+    assert "keep.log" in result
+    assert "error.log" not in result
+    # *.tmp only applies below services/api
+    assert result.count("debug.tmp") == 1
+    # /build is anchored to the root
+    assert "  |-- services/" in result
+    assert result.count("build/") == 1
+
+
+def test_ignored_directory_is_never_listed(monorepo: Path, monkeypatch):
+    """Test that ignored subtrees are pruned before they are scanned."""
+    import indastructa_pkg.cli as cli
+
+    listed = []
+    original = cli._get_sorted_directory_items
+
+    def recording_lister(root_path, matcher):
+        listed.append(Path(root_path).name)
+        return original(root_path, matcher)
+
+    matcher = GitIgnoreMatcher.for_root(monorepo, PatternMatcher())
+    list(cli.iter_dir_structure(monorepo, matcher, lister=recording_lister))
+
+    assert "generated" not in listed
+    assert "big" not in listed
+
+
+def test_include_overrides_gitignore_negation_order(monorepo: Path):
+    """Test that --include wins and --exclude cannot be undone by '!'."""
+    base = PatternMatcher({"keep.log"}, {"error.log"})
+    matcher = GitIgnoreMatcher.for_root(monorepo, base)
+
+    result = format_dir_structure(monorepo, matcher=matcher)
+
+    assert "error.log" in result
+    assert "keep.log" not in result
+
+
+def test_main_applies_nested_gitignore(monorepo: Path, monkeypatch):
+    """Test nested .gitignore files end to end."""
+    monkeypatch.setattr("sys.argv", ["indastructa", str(monorepo), "--quiet"])
+
+    main()
+
+    content = (monorepo / "project_structure.txt").read_text(encoding="utf-8")
+    assert "generated" not in content
+    assert content.count("debug.tmp") == 1
+    assert ".gitignore" in content
@@ -0,0 +1,266 @@
+"""
+Tests for building the tree from a repository's git index.
+"""
+
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from indastructa_pkg.cli import iter_output_lines, main
+from indastructa_pkg.gitindex import (
+    GitIndexError,
+    GitIndexTree,
+    read_index_paths,
+)
+from indastructa_pkg.matcher import PatternMatcher
+
+pytestmark = pytest.mark.skipif(shutil.which("git") is None, reason="needs git")
+
+
+def git(repo: Path, *args: str) -> str:
+    return subprocess.run(
+        ["git", "-c", "core.autocrlf=false", *args],
+        cwd=repo,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+
+
+@pytest.fixture
+def repo(tmp_path: Path) -> Path:
+    """A repository with tracked, untracked and ignored files."""
+    root = tmp_path / "repo"
+    (root / "src" / "pkg").mkdir(parents=True)
+    (root / "docs").mkdir()
+    (root / "README.md").write_text("readme")
+    (root / "src" / "main.py").write_text("main")
+    (root / "src" / "pkg" / "__init__.py").write_text("")
+    (root / "src" / "pkg" / "Util.py").write_text("util")
+    (root / "docs" / "index.md").write_text("docs")
+    (root / ".gitignore").write_text("*.log\n")
+    git(root, "init", "-q")
+    git(root, "add", ".")
+    # Neither of these is tracked.
+    (root / "untracked.txt").write_text("new")
+    (root / "src" / "debug.log").write_text("log")
+    return root
+
+
+@pytest.mark.parametrize("version", ["2", "3", "4"])
+def test_read_index_paths_matches_git(repo: Path, version: str):
+    """Test every index version parses to the paths git reports."""
+    git(repo, "update-index", "--index-version", version)
+
+    paths = [path for path, _ in read_index_paths(repo / ".git" / "index")]
+
+    assert paths == git(repo, "ls-files").splitlines()
+
+
+def test_index_tree_matches_filesystem_for_tracked_files(repo: Path):
+    """Test the index tree renders like a walk of the same files."""
+    (repo / "untracked.txt").unlink()
+    (repo / "src" / "debug.log").unlink()
+    matcher = PatternMatcher({".git"})
+    tree = GitIndexTree.from_repository(repo)
+
+    from_index = list(iter_output_lines(repo, matcher, lister=tree.list_directory))
+
+    assert from_index == list(iter_output_lines(repo, matcher))
+
+
+def test_index_tree_applies_patterns_and_depth(repo: Path):
+    """Test include/exclude patterns and depth limits on index entries."""
+    tree = GitIndexTree.from_repository(repo)
+    matcher = PatternMatcher({"*.py", "docs"}, {"main.py"})
+
+    lines = list(iter_output_lines(repo, matcher, 2, lister=tree.list_directory))
+
+    assert lines == [
+        "repo/",
+        "  |-- src/",
+        "  |     |-- pkg/",
+        "",
+        "  |     +-- main.py",
+        "  |-- .gitignore",
+        "  +-- README.md",
+    ]
+
+
+def test_index_tree_for_subdirectory(repo: Path):
+    """Test scanning a subdirectory lists only the tracked files under it."""
+    tree = GitIndexTree.from_repository(repo / "src")
+
+    lines = list(
+        iter_output_lines(repo / "src", PatternMatcher(), lister=tree.list_directory)
+    )
+
+    assert lines == [
+        "src/",
+        "  |-- pkg/",
+        "  |     |-- __init__.py",
+        "  |     +-- Util.py",
+        "  +-- main.py",
+    ]
+
+
+def commit(repo: Path) -> None:
+    git(
+        repo,
+        "-c",
+        "user.name=test",
+        "-c",
+        "user.email=test@example.com",
+        "commit",
+        "-qm",
+        "init",
+    )
+
+
+def test_sparse_index_directories_have_no_children(repo: Path):
+    """Test a directory a sparse index leaves out is shown, and empty."""
+    commit(repo)
+    try:
+        git(repo, "sparse-checkout", "set", "--sparse-index", "docs")
+    except subprocess.CalledProcessError:
+        pytest.skip("git does not support sparse indexes")
+    assert ("src/", 0o040000) in read_index_paths(repo / ".git" / "index")
+    tree = GitIndexTree.from_repository(repo)
+
+    lines = list(iter_output_lines(repo, PatternMatcher(), lister=tree.list_directory))
+
+    assert lines == [
+        "repo/",
+        "  |-- docs/",
+        "  |     +-- index.md",
+        "  |-- src/",
+        "",
+        "  |-- .gitignore",
+        "  +-- README.md",
+    ]
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="needs symlinks")
+def test_symlinks_are_shown_with_their_target(repo: Path):
+    """Test a tracked symlink is shown like a walk shows it, and not followed."""
+    (repo / "link").symlink_to("src")
+    (repo / "dangling").symlink_to("missing")
+    git(repo, "add", "link", "dangling")
+    (repo / "dangling").unlink()
+    tree = GitIndexTree.from_repository(repo)
+
+    lines = list(iter_output_lines(repo, PatternMatcher(), lister=tree.list_directory))
+
+    assert "  |-- link -> src" in lines
+    assert "  |-- dangling -> ?" in lines
+    assert not any("link/" in line for line in lines)
+
+
+def test_worktree_git_file_is_followed(repo: Path, tmp_path: Path):
+    """Test a linked worktree's .git file leads to the index of that worktree."""
+    commit(repo)
+    worktree = tmp_path / "worktree"
+    git(repo, "worktree", "add", "-q", str(worktree))
+
+    tree = GitIndexTree.from_repository(worktree)
+
+    assert [
+        entry.name for entry in tree.list_directory(worktree, PatternMatcher())
+    ] == [
+        "docs",
+        "src",
+        ".gitignore",
+        "README.md",
+    ]
+
+
+def test_sha256_repository(tmp_path: Path):
+    """Test the longer object ids of a SHA-256 repository are skipped over."""
+    try:
+        git(tmp_path, "init", "-q", "--object-format=sha256")
+    except subprocess.CalledProcessError:
+        pytest.skip("git does not support SHA-256 repositories")
+    long_name = "a" * 200  # long enough for a multi-byte prefix length in v4
+    (tmp_path / long_name).write_text("")
+    (tmp_path / "b.txt").write_text("")
+    git(tmp_path, "add", ".")
+    git(tmp_path, "update-index", "--index-version", "4")
+
+    tree = GitIndexTree.from_repository(tmp_path)
+
+    assert [
+        entry.name for entry in tree.list_directory(tmp_path, PatternMatcher())
+    ] == [
+        long_name,
+        "b.txt",
+    ]
+
+
+def test_invalid_git_file(tmp_path: Path):
+    (tmp_path / ".git").write_text("not a gitdir line")
+
+    with pytest.raises(GitIndexError, match="Invalid .git file"):
+        GitIndexTree.from_repository(tmp_path)
+
+
+def test_missing_index_means_nothing_is_tracked(tmp_path: Path):
+    git(tmp_path, "init", "-q")
+
+    tree = GitIndexTree.from_repository(tmp_path)
+
+    assert tree.list_directory(tmp_path, PatternMatcher()) == []
+
+
+def test_unsupported_index_version(repo: Path):
+    index = repo / ".git" / "index"
+    data = bytearray(index.read_bytes())
+    data[4:8] = (5).to_bytes(4, "big")
+    index.write_bytes(bytes(data))
+
+    with pytest.raises(GitIndexError, match="Unsupported git index version 5"):
+        read_index_paths(index)
+
+
+def test_not_a_repository(tmp_path: Path):
+    """Test a directory outside any repository raises GitIndexError."""
+    with pytest.raises(GitIndexError):
+        GitIndexTree.from_repository(tmp_path)
+
+
+def test_corrupt_index(repo: Path):
+    """Test a damaged index raises GitIndexError."""
+    index = repo / ".git" / "index"
+    index.write_bytes(index.read_bytes()[:40])
+
+    with pytest.raises(GitIndexError):
+        read_index_paths(index)
+
+
+def test_main_with_git_index_source(repo: Path, monkeypatch):
+    """Test --source git-index end to end."""
+    monkeypatch.setattr(
+        "sys.argv", ["indastructa", str(repo), "--source", "git-index", "--quiet"]
+    )
+
+    main()
+
+    content = (repo / "project_structure.txt").read_text(encoding="utf-8")
+    assert "Util.py" in content
+    assert "untracked.txt" not in content
+    assert "debug.log" not in content
+
+
+def test_main_git_index_outside_repository(tmp_path: Path, monkeypatch, capsys):
+    """Test --source git-index fails cleanly outside a repository."""
+    monkeypatch.setattr(
+        "sys.argv", ["indastructa", str(tmp_path), "--source", "git-index"]
+    )
+
+    with pytest.raises(SystemExit) as e:
+        main()
+
+    assert e.value.code == 1
+    assert "Not a git repository" in capsys.readouterr().err
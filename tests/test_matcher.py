@@ -0,0 +1,73 @@
+"""
+Tests for the compiled PatternMatcher.
+Checks that it matches exactly like the per-pattern fnmatch loop it replaces.
+"""
+
+import fnmatch
+
+import pytest
+
+from indastructa_pkg.cli import EXCLUDE_SET
+from indastructa_pkg.matcher import PatternMatcher
+
+
+def fnmatch_reference(name, exclude_patterns, include_patterns):
+    """The original is_excluded() logic, used as the reference behavior."""
+    if any(fnmatch.fnmatch(name, pattern) for pattern in include_patterns):
+        return False
+    return any(fnmatch.fnmatch(name, pattern) for pattern in exclude_patterns)
+
+
+@pytest.mark.parametrize(
+    "name",
+    [
+        ".git",
+        "main.py",
+        "module.pyc",
+        ".pyc",
+        "pyc",
+        "my_project.egg-info",
+        "archive.tar.gz",
+        "node_modules",
+        "app.log",
+        "notes.LOG",
+        "file.pyo",
+        "data[1].csv",
+        "README.md",
+    ],
+)
+def test_matches_like_fnmatch(name: str):
+    """Test literal, extension and wildcard patterns against fnmatch."""
+    exclude = EXCLUDE_SET | {"*.log", "*.py[co]", "*.tar.gz", "data?1?.csv", "READ*"}
+    include = {"README.md", "*.pyo"}
+
+    matcher = PatternMatcher(exclude, include)
+
+    assert matcher.is_excluded(name) == fnmatch_reference(name, exclude, include)
+
+
+def test_include_has_priority():
+    """Test that include patterns win over exclude patterns."""
+    matcher = PatternMatcher({"*.log"}, {"app.log"})
+
+    assert not matcher.is_excluded("app.log")
+    assert matcher.is_excluded("debug.log")
+
+
+def test_empty_matcher_excludes_nothing():
+    """Test that a matcher without patterns keeps every name."""
+    matcher = PatternMatcher()
+
+    assert not matcher.is_excluded("anything")
+    assert not matcher.is_excluded("")
+
+
+def test_many_patterns():
+    """Test a large number of patterns, as from a big .gitignore."""
+    exclude = {f"generated_{i}_*.txt" for i in range(500)}
+    exclude |= {f"literal_{i}" for i in range(500)}
+    matcher = PatternMatcher(exclude)
+
+    assert matcher.is_excluded("generated_499_x.txt")
+    assert matcher.is_excluded("literal_0")
+    assert not matcher.is_excluded("generated_500_x.txt")
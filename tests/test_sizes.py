@@ -0,0 +1,126 @@
+"""
+Tests for --sizes: file sizes and per-directory totals.
+"""
+
+import os
+from pathlib import Path
+
+import pytest
+
+from indastructa_pkg.cli import iter_output_lines, main
+from indastructa_pkg.matcher import PatternMatcher
+from indastructa_pkg.sizes import DirectoryTotals, format_size, iter_sized_output_lines
+
+
+@pytest.fixture
+def project(tmp_path: Path) -> Path:
+    root = tmp_path / "project"
+    (root / "src" / "pkg").mkdir(parents=True)
+    (root / "empty").mkdir()
+    (root / "src" / "pkg" / "core.py").write_bytes(b"x" * 3000)
+    (root / "src" / "main.py").write_bytes(b"x" * 100)
+    (root / "README.md").write_bytes(b"x" * 10)
+    return root
+
+
+def test_format_size():
+    assert format_size(0) == "0 B"
+    assert format_size(1023) == "1023 B"
+    assert format_size(1536) == "1.5 KiB"
+    assert format_size(38 * 1024**2 + 200 * 1024) == "38.2 MiB"
+    assert format_size(3 * 1024**6) == "3072.0 PiB"
+
+
+def test_sized_tree_annotates_files_and_directories(project: Path):
+    """Test directory totals include every file below them."""
+    totals = DirectoryTotals()
+
+    lines = list(iter_sized_output_lines(project, PatternMatcher(), totals=totals))
+
+    assert lines == [
+        "project/",
+        "  |-- empty/ (0 files, 0 B)",
+        "",
+        "  |-- src/ (2 files, 3.0 KiB)",
+        "  |     |-- pkg/ (1 file, 2.9 KiB)",
+        "  |     |     +-- core.py (2.9 KiB)",
+        "  |     +-- main.py (100 B)",
+        "  +-- README.md (10 B)",
+    ]
+    assert (totals.files, totals.size) == (3, 3110)
+
+
+def test_sized_tree_keeps_the_plain_layout(project: Path):
+    """Test --sizes only adds annotations to the usual lines."""
+    for depth in (-1, 0, 1, 2):
+        sized = iter_sized_output_lines(project, PatternMatcher(), depth)
+        plain = iter_output_lines(project, PatternMatcher(), depth)
+
+        assert [line.split(" (")[0] for line in sized] == list(plain)
+
+
+def test_depth_limit_still_counts_everything_below(project: Path):
+    """Test directories at the depth limit show their full totals."""
+    lines = list(iter_sized_output_lines(project, PatternMatcher(), max_depth=1))
+
+    assert "  |-- src/ (2 files, 3.0 KiB)" in lines
+    assert not any("core.py" in line for line in lines)
+
+
+@pytest.mark.skipif(not hasattr(os, "link"), reason="needs hard links")
+def test_hard_links_and_symlinks_are_counted_once(project: Path):
+    """Test a second hard link shows its size but is not counted again."""
+    try:
+        os.link(project / "src" / "main.py", project / "empty" / "main-link.py")
+        (project / "empty" / "symlink").symlink_to(project / "README.md")
+    except OSError:
+        pytest.skip("filesystem does not support links")
+    totals = DirectoryTotals()
+
+    lines = list(iter_sized_output_lines(project, PatternMatcher(), totals=totals))
+
+    # The first link in output order is the one counted.
+    assert "  |-- empty/ (1 file, 100 B)" in lines
+    assert "  |     +-- symlink -> " in "\n".join(lines)
+    assert "  |-- src/ (1 file, 2.9 KiB)" in lines
+    assert "  |     +-- main.py (100 B)" in lines
+    assert (totals.files, totals.size) == (3, 3110)
+
+
+def test_main_with_sizes(project: Path, monkeypatch, capsys):
+    """Test --sizes writes the annotated tree and prints the total."""
+    monkeypatch.setattr("sys.argv", ["indastructa", str(project), "--sizes"])
+
+    main()
+
+    output = (project / "project_structure.txt").read_text(encoding="utf-8")
+    assert "  |-- src/ (2 files, 3.0 KiB)\n" in output
+    assert "Total: 3 files, 3.0 KiB" in capsys.readouterr().out
+
+
+def test_main_rejects_sizes_with_json(project: Path, monkeypatch, capsys):
+    monkeypatch.setattr(
+        "sys.argv", ["indastructa", str(project), "--sizes", "--format", "json"]
+    )
+
+    with pytest.raises(SystemExit):
+        main()
+
+    assert "--sizes requires --format text" in capsys.readouterr().err
+
+
+def test_main_rejects_sizes_with_max_entries_per_dir(
+    project: Path, monkeypatch, capsys
+):
+    """Test --sizes is refused where totals would miss the summarized entries."""
+    monkeypatch.setattr(
+        "sys.argv",
+        ["indastructa", str(project), "--sizes", "--max-entries-per-dir", "3"],
+    )
+
+    with pytest.raises(SystemExit):
+        main()
+
+    assert "--sizes cannot be used with --max-entries-per-dir" in (
+        capsys.readouterr().err
+    )
@@ -0,0 +1,300 @@
+"""
+Tests for binary snapshots: saving a scan and rendering it back.
+"""
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+import indastructa_pkg
+from indastructa_pkg.cli import (
+    EXCLUDE_SET,
+    ScanBudget,
+    _get_sorted_directory_items,
+    iter_output_lines,
+    main,
+    walk_dir_structure,
+)
+from indastructa_pkg.formats import iter_formatted_lines, iter_records
+from indastructa_pkg.matcher import PatternMatcher
+from indastructa_pkg.snapshot import (
+    Snapshot,
+    SnapshotError,
+    is_snapshot,
+    write_snapshot,
+)
+
+
+@pytest.fixture
+def project(tmp_path: Path) -> Path:
+    root = tmp_path / "project"
+    (root / "src" / "pkg").mkdir(parents=True)
+    (root / "empty").mkdir()
+    for name in ("module_a.py", "module_b.py", "café.py"):
+        (root / "src" / name).write_text("x = 1\n")
+    (root / "src" / "pkg" / "__init__.py").write_text("")
+    (root / "README.md").write_text("readme")
+    (root / "link").symlink_to("src")
+    return root
+
+
+def save(project: Path, path: Path, metadata: bool = False, **options) -> Snapshot:
+    matcher = PatternMatcher(EXCLUDE_SET)
+    walk = walk_dir_structure(project, matcher, **options)
+    write_snapshot(path, project.name, walk, metadata)
+    return Snapshot.open(path)
+
+
+@pytest.mark.parametrize("follow_symlinks", [False, True])
+def test_snapshot_renders_like_a_scan(project, tmp_path, follow_symlinks):
+    """Test text and NDJSON from a snapshot match a scan byte for byte."""
+    matcher = PatternMatcher(EXCLUDE_SET)
+    options = {"follow_symlinks": follow_symlinks}
+
+    with save(project, tmp_path / "s.idx", True, **options) as snapshot:
+        text = list(snapshot.iter_lines("text"))
+        ndjson = list(snapshot.iter_lines("ndjson", metadata=True))
+
+    assert text == list(iter_output_lines(project, matcher, **options))
+    assert ndjson == list(
+        iter_formatted_lines("ndjson", project, matcher, metadata=True, **options)
+    )
+
+
+def test_snapshot_does_not_touch_the_filesystem(project, tmp_path):
+    """Test a snapshot still renders after the tree is gone."""
+    expected = list(iter_output_lines(project, PatternMatcher(EXCLUDE_SET)))
+    snapshot = save(project, tmp_path / "s.idx")
+    shutil.rmtree(project)
+
+    with snapshot:
+        assert list(snapshot.iter_lines()) == expected
+
+
+@pytest.mark.parametrize("max_total_entries", [None, 5])
+def test_snapshot_keeps_omitted_and_unscanned_entries(
+    project, tmp_path, max_total_entries
+):
+    """Test capped directories and a stopped scan come back as the same records."""
+    lister = lambda path, matcher: _get_sorted_directory_items(  # noqa: E731
+        path, matcher, max_entries=3
+    )
+
+    def budget():
+        return max_total_entries and ScanBudget(max_entries=max_total_entries)
+
+    with save(project, tmp_path / "s.idx", lister=lister, budget=budget()) as snapshot:
+        records = list(snapshot.records())
+
+    matcher = PatternMatcher(EXCLUDE_SET)
+    assert records == list(
+        iter_records(project, matcher, lister=lister, budget=budget())
+    )
+    assert records[-1]["type"] == "omitted"
+    assert records[-1]["files"] == 1
+    assert ("stopped" in records[-1]) == (max_total_entries is not None)
+
+
+def test_snapshot_on_a_big_endian_host(project, tmp_path, monkeypatch):
+    """Test columns are byte-swapped on write and back on read off little-endian."""
+    expected = list(iter_output_lines(project, PatternMatcher(EXCLUDE_SET)))
+    with save(project, tmp_path / "little.idx", True) as snapshot:
+        little = list(snapshot.records(metadata=True))
+    monkeypatch.setattr(
+        "indastructa_pkg.snapshot.sys", SimpleNamespace(byteorder="big")
+    )
+
+    with save(project, tmp_path / "big.idx", True) as snapshot:
+        assert list(snapshot.iter_lines()) == expected
+        assert list(snapshot.records(metadata=True)) == little
+    assert (tmp_path / "big.idx").read_bytes() != (tmp_path / "little.idx").read_bytes()
+
+
+def test_metadata_of_a_dangling_symlink(project, tmp_path):
+    """Test an entry that cannot be stat'ed is saved without size or mtime."""
+    (project / "dangling").symlink_to("missing")
+
+    with save(project, tmp_path / "s.idx", True) as snapshot:
+        entries = {entry.name: entry for _, entry, _, _ in snapshot.walk()}
+
+    assert repr(entries["dangling"]) == "<SnapshotEntry symlink 'dangling'>"
+    assert entries["dangling"].size is None
+    assert entries["dangling"].mtime is None
+    assert entries["README.md"].size == 6
+
+
+def test_names_share_prefixes(project, tmp_path):
+    """Test front coding stores only the part of a name that differs."""
+    with save(project, tmp_path / "s.idx") as snapshot:
+        names = [
+            (entry.name, shared)
+            for (_, entry, _, _), shared in zip(snapshot.walk(), snapshot.shared)
+        ]
+        assert len(snapshot) == len(names)
+
+    assert ("module_b.py", len("module_")) in names
+    assert ("café.py", 0) in names
+
+
+def test_empty_tree(tmp_path):
+    root = tmp_path / "root"
+    root.mkdir()
+
+    with save(root, tmp_path / "s.idx") as snapshot:
+        assert list(snapshot.iter_lines()) == ["root/", ""]
+        assert list(snapshot.iter_lines("json")) == ['{"root":"root","entries":[', "]}"]
+
+
+def test_rejects_other_files(project, tmp_path):
+    """Test text files, empty files and truncated snapshots are refused."""
+    text = tmp_path / "structure.txt"
+    text.write_text("root/\n")
+    empty = tmp_path / "empty.idx"
+    empty.write_bytes(b"")
+    truncated = tmp_path / "truncated.idx"
+    save(project, truncated).close()
+    truncated.write_bytes(truncated.read_bytes()[:100])
+
+    assert not is_snapshot(text)
+    assert is_snapshot(truncated)
+    for path in (text, empty, truncated):
+        with pytest.raises(SnapshotError):
+            Snapshot.open(path)
+
+
+def test_rejects_other_versions(project, tmp_path):
+    path = tmp_path / "s.idx"
+    save(project, path).close()
+    data = bytearray(path.read_bytes())
+    data[8:10] = (2).to_bytes(2, "little")
+    path.write_bytes(bytes(data))
+
+    with pytest.raises(SnapshotError, match="unsupported snapshot version 2"):
+        Snapshot.open(path)
+
+
+def test_main_saves_renders_and_diffs_snapshots(project, tmp_path, monkeypatch, capsys):
+    """Test --snapshot, --from-snapshot and --diff against a snapshot."""
+    snapshot = tmp_path / "build.idx"
+    monkeypatch.setattr(
+        "sys.argv", ["indastructa", str(project), "--snapshot", str(snapshot), "-q"]
+    )
+    main()
+    assert not (project / "project_structure.txt").exists()
+    assert is_snapshot(snapshot)
+
+    monkeypatch.setattr("sys.argv", ["indastructa", "--from-snapshot", str(snapshot)])
+    main()
+    expected = list(iter_output_lines(project, PatternMatcher(EXCLUDE_SET)))
+    assert capsys.readouterr().out.splitlines() == expected
+
+    os.remove(project / "README.md")
+    monkeypatch.setattr(
+        "sys.argv", ["indastructa", str(project), "--diff", str(snapshot), "-q"]
+    )
+    main()
+    assert capsys.readouterr().out == "- README.md\n"
+
+
+def test_main_renders_a_snapshot_to_a_file(project, tmp_path, monkeypatch, capsys):
+    """Test --from-snapshot writes to -o instead of stdout."""
+    snapshot, output = tmp_path / "build.idx", tmp_path / "out.ndjson"
+    save(project, snapshot).close()
+    monkeypatch.setattr(
+        "sys.argv",
+        ["indastructa", "--from-snapshot", str(snapshot), "--format", "ndjson"]
+        + ["-o", str(output)],
+    )
+
+    main()
+
+    assert capsys.readouterr().out == ""
+    assert output.read_text(encoding="utf-8").splitlines() == list(
+        iter_formatted_lines("ndjson", project, PatternMatcher(EXCLUDE_SET))
+    )
+
+
+@pytest.mark.parametrize("content", [None, b"IDXSNAP\0"])
+def test_main_from_snapshot_that_cannot_be_read(tmp_path, monkeypatch, capsys, content):
+    """Test a missing or truncated --from-snapshot file is reported, not raised."""
+    snapshot = tmp_path / "build.idx"
+    if content is not None:
+        snapshot.write_bytes(content)
+    monkeypatch.setattr("sys.argv", ["indastructa", "--from-snapshot", str(snapshot)])
+
+    with pytest.raises(SystemExit) as exc:
+        main()
+
+    assert exc.value.code == 1
+    assert f"cannot read {snapshot}" in capsys.readouterr().err
+
+
+def test_main_snapshot_that_cannot_be_written(project, tmp_path, monkeypatch, capsys):
+    snapshot = tmp_path / "missing" / "build.idx"
+    monkeypatch.setattr(
+        "sys.argv", ["indastructa", str(project), "--snapshot", str(snapshot)]
+    )
+
+    with pytest.raises(SystemExit) as exc:
+        main()
+
+    assert exc.value.code == 1
+    assert f"Error writing snapshot {snapshot}" in capsys.readouterr().err
+
+
+@pytest.mark.parametrize(
+    "options, message",
+    [
+        (["--snapshot", "s.idx", "--sizes"], "cannot be used with several roots"),
+        (["--snapshot", "s.idx", "--watch"], "cannot be used with several roots"),
+        ([".", "--snapshot", "s.idx"], "cannot be used with several roots"),
+        (["--from-snapshot", "s.idx", "--watch"], "cannot be used with several roots"),
+        (
+            ["--snapshot", "s.idx", "--from-snapshot", "s.idx"],
+            "cannot be used together",
+        ),
+    ],
+)
+def test_main_snapshot_rejects_bad_options(
+    tmp_path, monkeypatch, capsys, options, message
+):
+    """Test snapshot options refuse what they cannot save or render."""
+    monkeypatch.setattr("sys.argv", ["indastructa", str(tmp_path), *options])
+
+    with pytest.raises(SystemExit) as exc:
+        main()
+
+    assert exc.value.code == 1
+    assert message in capsys.readouterr().err
+
+
+def test_snapshot_saved_by_python_m_keeps_symlinks(
+    project, tmp_path, monkeypatch, capsys
+):
+    """Test a snapshot saved by ``python -m indastructa_pkg.cli`` records links."""
+    snapshot = tmp_path / "s.idx"
+    subprocess.run(
+        [sys.executable, "-m", "indastructa_pkg.cli", str(project)]
+        + ["--snapshot", str(snapshot), "-q"],
+        cwd=Path(__file__).resolve().parent.parent,
+        check=True,
+    )
+    monkeypatch.setattr(
+        "sys.argv",
+        ["indastructa", "--from-snapshot", str(snapshot), "--format", "ndjson"],
+    )
+
+    main()
+
+    records = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert {"path": "link", "type": "symlink", "depth": 1, "target": "src"} in records
+
+
+def test_package_exports_snapshot():
+    assert indastructa_pkg.Snapshot is Snapshot
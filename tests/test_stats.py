@@ -0,0 +1,149 @@
+"""
+Tests for --stats: counters, exclusion sources and phase timings.
+"""
+
+from functools import partial
+from pathlib import Path
+
+import pytest
+
+from indastructa_pkg.cli import (
+    _get_sorted_directory_items,
+    is_excluded,
+    iter_output_lines,
+    main,
+    write_structure_to_file,
+)
+from indastructa_pkg.gitignore import GitIgnoreMatcher
+from indastructa_pkg.matcher import PatternMatcher
+from indastructa_pkg.stats import PHASES, ScanStats
+
+
+@pytest.fixture
+def project(tmp_path: Path) -> Path:
+    root = tmp_path / "project"
+    (root / "src").mkdir(parents=True)
+    (root / "node_modules").mkdir()
+    (root / "src" / "main.py").write_text("print()")
+    (root / "src" / "notes.md").write_text("notes")
+    (root / "debug.log").write_text("log")
+    (root / "README.md").write_text("readme")
+    (root / ".gitignore").write_text("*.log\n")
+    return root
+
+
+def test_listing_counts_entries_and_exclusions(project: Path):
+    """Test the instrumented listing returns the same items and counts them."""
+    matcher = PatternMatcher({"node_modules", "*.md"})
+    stats = ScanStats([("defaults", PatternMatcher({"node_modules"}))])
+
+    items = _get_sorted_directory_items(project, matcher, stats)
+
+    assert [item.name for item in items] == [
+        item.name for item in _get_sorted_directory_items(project, matcher)
+    ]
+    assert stats.directories_listed == 1
+    assert stats.entries_seen == 5
+    assert stats.pattern_evaluations == 5
+    # README.md is not explained by "defaults", so it is credited to .gitignore.
+    assert stats.excluded == {"defaults": 1, ".gitignore": 1}
+
+
+def test_missing_directory_is_not_a_permission_error(tmp_path: Path):
+    """Test a vanished directory lists as empty without counting an error."""
+    stats = ScanStats()
+
+    assert _get_sorted_directory_items(tmp_path / "gone", PatternMatcher(), stats) == []
+    assert stats.permission_errors == 0
+    assert stats.directories_listed == 1
+
+
+def test_write_counts_bytes_and_keeps_output(project: Path, tmp_path: Path):
+    """Test the stats path writes exactly what the plain path writes."""
+    plain = tmp_path / "plain.txt"
+    counted = tmp_path / "counted.txt"
+    stats = ScanStats()
+    matcher = PatternMatcher()
+
+    write_structure_to_file(plain, iter_output_lines(project, matcher))
+    write_structure_to_file(counted, iter_output_lines(project, matcher), stats=stats)
+
+    assert counted.read_bytes() == plain.read_bytes()
+    assert stats.bytes_written == counted.stat().st_size
+    assert stats.wall["rendering"] > 0
+    assert stats.wall["writing"] > 0
+
+
+def test_pattern_evaluations_count_every_gitignore_in_effect(project: Path):
+    """Test entries below a nested .gitignore are checked against both files."""
+    (project / "src" / ".gitignore").write_text("*.md\n")
+    stats = ScanStats()
+    matcher = GitIgnoreMatcher.for_root(project, PatternMatcher(), stats)
+    lister = partial(_get_sorted_directory_items, stats=stats)
+
+    list(iter_output_lines(project, matcher, lister=lister))
+
+    # The root's 5 entries with its .gitignore, then src's 3 with both files.
+    assert stats.pattern_evaluations == 5 * 2 + 3 * 3
+    assert stats.wall["ignore_files"] > 0
+
+
+def test_nested_gitignore_loads_are_timed_as_ignore_files(project: Path):
+    """Test loading a .gitignore found during the walk is not counted as rendering."""
+    stats = ScanStats()
+    matcher = GitIgnoreMatcher.for_root(project, PatternMatcher(), stats)
+    loaded = stats.wall["ignore_files"]
+
+    child = matcher.for_directory(project / "src")
+    (project / "src" / ".gitignore").write_text("*.md\n")
+    nested = matcher.for_directory(project / "src")
+
+    assert child is matcher
+    assert nested.stats is stats
+    assert stats.wall["ignore_files"] > loaded
+    assert stats.wall["rendering"] == 0
+
+
+def test_is_excluded_counts_evaluations():
+    """Test the legacy helper counts its evaluations when given stats."""
+    stats = ScanStats()
+
+    is_excluded(Path("a.pyc"), {"*.pyc"}, set(), stats)
+    is_excluded(Path("a.py"), {"*.pyc"}, set(), stats)
+
+    assert stats.pattern_evaluations == 2
+
+
+def test_main_prints_stats_to_stderr(project: Path, monkeypatch, capsys):
+    """Test --stats attributes exclusions to their source and times each phase."""
+    monkeypatch.setattr(
+        "sys.argv",
+        ["indastructa", str(project), "--stats", "--quiet", "--exclude", "*.md"],
+    )
+
+    main()
+
+    captured = capsys.readouterr()
+    assert captured.out == ""
+    report = captured.err
+    assert "Directories listed:   2" in report
+    # node_modules; the output file does not exist until the tree is written.
+    assert "defaults:           1" in report
+    assert "--exclude:          2" in report  # README.md, notes.md
+    assert ".gitignore:         1" in report  # debug.log
+    assert "Pattern evaluations:  14" in report  # 5 and 2 entries, 2 sets each
+    output = project / "project_structure.txt"
+    assert f"Bytes written:        {output.stat().st_size:,}" in report
+    for phase in PHASES:
+        assert f"  {phase} " in report
+
+
+def test_main_without_stats_prints_nothing_to_stderr(
+    project: Path, monkeypatch, capsys
+):
+    """Test the summary only appears with --stats."""
+    monkeypatch.setattr("sys.argv", ["indastructa", str(project), "--quiet"])
+
+    main()
+
+    assert capsys.readouterr().err == ""
@@ -0,0 +1,174 @@
+"""
+Tests for the library API: scan() and the renderers.
+"""
+
+import json
+from pathlib import Path
+
+import pytest
+
+import indastructa_pkg
+from indastructa_pkg.cli import EXCLUDE_SET, iter_output_lines
+from indastructa_pkg.gitignore import GitIgnoreMatcher
+from indastructa_pkg.matcher import PatternMatcher
+from indastructa_pkg.tree import (
+    DIRECTORY,
+    OMITTED,
+    Node,
+    NodeTable,
+    compile_patterns,
+    render_json,
+    render_text,
+    scan,
+    scan_table,
+)
+
+
+@pytest.fixture
+def project(tmp_path: Path) -> Path:
+    root = tmp_path / "project"
+    (root / "src" / "pkg").mkdir(parents=True)
+    (root / "src" / "__pycache__").mkdir()
+    (root / "empty").mkdir()
+    (root / "src" / "main.py").write_text("print()")
+    (root / "src" / "pkg" / "__init__.py").write_text("")
+    (root / "debug.log").write_text("")
+    (root / "README.md").write_text("readme")
+    (root / ".gitignore").write_text("*.log\n")
+    return root
+
+
+def test_scan_builds_sorted_nodes(project: Path):
+    """Test the tree holds the filtered entries, directories first."""
+    tree = scan(project)
+
+    assert tree.name == "project" and tree.is_dir
+    assert [node.name for node in tree] == ["empty", "src", ".gitignore", "README.md"]
+    src = tree.children[1]
+    assert [node.name for node in src] == ["pkg", "main.py"]
+    assert src.children[1].children is None
+    assert tree.children[0].children == []
+
+
+def test_render_text_matches_the_output_file(project: Path):
+    """Test render_text is byte-for-byte what the command line writes."""
+    for depth in (-1, 1, 2):
+        matcher = GitIgnoreMatcher.for_root(project, PatternMatcher(EXCLUDE_SET))
+        expected = "".join(
+            f"{line}\n" for line in iter_output_lines(project, matcher, depth)
+        )
+
+        assert render_text(scan(project, depth=depth)) == expected
+
+
+def test_render_text_of_an_empty_directory(tmp_path: Path):
+    """Test an empty root renders like the command line output."""
+    assert render_text(scan(tmp_path)) == f"{tmp_path.name}/\n\n"
+
+
+def test_patterns_and_gitignore_options(project: Path):
+    """Test exclude replaces the defaults, include wins, gitignore can be off."""
+    tree = scan(project, exclude={"*.md"}, include={"debug.log"}, gitignore=False)
+    names = {node.name for node in tree}
+
+    assert "README.md" not in names
+    assert "debug.log" in names
+    assert "__pycache__" in {node.name for node in tree.children[1]}
+
+
+def test_compiled_patterns_are_reused():
+    """Test equal pattern sets share one compiled matcher."""
+    first = compile_patterns({"*.log", "tmp"}, ["keep.log"])
+    second = compile_patterns(["tmp", "*.log"], {"keep.log"})
+
+    assert first is second
+    assert compile_patterns().exclude_patterns == frozenset(EXCLUDE_SET)
+
+
+def test_max_entries_per_dir_marks_omitted_nodes(project: Path):
+    """Test the summary of a capped directory is an omitted node."""
+    tree = scan(project, max_entries_per_dir=2)
+
+    last = tree.children[-1]
+    assert last.omitted
+    assert last.name == "... 2 more files"
+
+
+def test_render_json_nests_children(project: Path):
+    """Test the JSON document mirrors the tree."""
+    document = json.loads(render_json(scan(project, depth=2)))
+
+    assert document["name"] == "project"
+    src = document["children"][1]
+    assert src == {
+        "name": "src",
+        "type": "directory",
+        "children": [
+            {"name": "pkg", "type": "directory", "children": []},
+            {"name": "main.py", "type": "file"},
+        ],
+    }
+
+
+def test_scan_rejects_missing_directory(tmp_path: Path):
+    with pytest.raises(NotADirectoryError):
+        scan(tmp_path / "missing")
+
+
+def test_package_exports_the_api():
+    """Test the API is importable from the package itself."""
+    assert indastructa_pkg.scan is scan
+    assert indastructa_pkg.Node is Node
+    with pytest.raises(AttributeError):
+        indastructa_pkg.missing
+
+
+def test_node_table_matches_the_node_tree(project: Path):
+    """Test the table renders and converts exactly like the Node tree."""
+    tree = scan(project, max_entries_per_dir=3)
+    table = scan_table(project, max_entries_per_dir=3)
+
+    assert render_text(table) == render_text(tree)
+    assert render_json(table) == render_json(tree)
+    assert render_text(NodeTable.from_tree(tree)) == render_text(tree)
+    assert render_text(table.to_tree()) == render_text(tree)
+
+
+def test_node_table_columns(project: Path):
+    """Test parent, depth and kind of each row, in depth-first order."""
+    table = scan_table(project)
+
+    rows = [(e.name, e.depth, e.parent, e.is_dir) for e in table]
+    assert rows[:4] == [
+        ("empty", 0, -1, True),
+        ("src", 0, -1, True),
+        ("pkg", 1, 1, True),
+        ("__init__.py", 2, 2, False),
+    ]
+    assert table.kind(1) == DIRECTORY
+    assert table[-1].name == "README.md"
+    with pytest.raises(IndexError):
+        table[len(table)]
+
+
+def test_node_table_keeps_odd_names_and_omitted_rows(tmp_path: Path):
+    """Test names that are not valid UTF-8 and summary rows survive."""
+    table = NodeTable("root")
+    table.append("caf\udce9.txt", OMITTED, 0, -1, True)
+
+    assert table[0].name == "caf\udce9.txt"
+    assert table[0].omitted
+
+
+def test_node_table_is_compact(tmp_path: Path):
+    """Test a row costs well under 40 bytes with ordinary names."""
+    for d in range(20):
+        directory = tmp_path / f"dir{d:02}"
+        directory.mkdir()
+        for f in range(50):
+            (directory / f"module_{f:03}.py").touch()
+
+    table = scan_table(tmp_path)
+
+    assert len(table) == 20 * 51
+    assert table.nbytes / len(table) < 40
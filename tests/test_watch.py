@@ -0,0 +1,232 @@
+"""
+Tests for watch mode (--watch).
+"""
+
+import os
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from indastructa_pkg.cli import _get_sorted_directory_items, iter_dir_structure, main
+from indastructa_pkg.gitignore import GitIgnoreMatcher
+from indastructa_pkg.matcher import PatternMatcher
+from indastructa_pkg.watch import RACY_WINDOW_NS, DirectoryWatcher, watch_directory
+
+OLD_MTIME = 1_600_000_000
+
+
+class CountingLister:
+    """Wraps _get_sorted_directory_items and records which paths it lists."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, root_path, matcher):
+        self.calls.append(os.fspath(root_path))
+        return _get_sorted_directory_items(root_path, matcher)
+
+
+def make_tree(root: Path) -> Path:
+    (root / "a" / "b").mkdir(parents=True)
+    (root / "a" / "b" / "x.txt").touch()
+    (root / "c").mkdir()
+    for dirpath, _, _ in os.walk(root):
+        os.utime(dirpath, (OLD_MTIME, OLD_MTIME))
+    return root
+
+
+def rescan(watcher: DirectoryWatcher, root: Path, matcher: PatternMatcher) -> str:
+    watcher.begin_scan()
+    text = "\n".join(iter_dir_structure(root, matcher, lister=watcher.list_directory))
+    watcher.end_scan()
+    return text
+
+
+def test_only_changed_directories_are_listed_again(tmp_path: Path):
+    """Test that a rescan lists just the directories whose mtime changed."""
+    root = make_tree(tmp_path / "tree")
+    matcher = PatternMatcher()
+    lister = CountingLister()
+    watcher = DirectoryWatcher(lister)
+
+    rescan(watcher, root, matcher)
+    assert len(lister.calls) == 4
+    assert watcher.changed_directories() == []
+
+    (root / "a" / "b" / "y.txt").touch()
+    os.utime(root / "a" / "b", (OLD_MTIME + 5, OLD_MTIME + 5))
+    assert watcher.changed_directories() == [str(root / "a" / "b")]
+
+    lister.calls.clear()
+    text = rescan(watcher, root, matcher)
+
+    assert lister.calls == [str(root / "a" / "b")]
+    assert "y.txt" in text
+
+
+def test_removed_directory_stops_being_watched(tmp_path: Path):
+    """Test that directories that disappear are reported once and then dropped."""
+    root = make_tree(tmp_path / "tree")
+    matcher = PatternMatcher()
+    watcher = DirectoryWatcher()
+    rescan(watcher, root, matcher)
+
+    (root / "c").rmdir()
+
+    assert str(root / "c") in watcher.changed_directories()
+    rescan(watcher, root, matcher)
+    assert str(root / "c") not in watcher.snapshot()
+
+
+def test_nested_gitignore_is_applied_when_checking_and_reusing(tmp_path: Path):
+    """Test listings are checked with their own rules and redone when those change."""
+    root = tmp_path / "tree"
+    (root / "a").mkdir(parents=True)
+    (root / "a" / ".gitignore").write_text("*.log\n")
+    (root / "a" / "debug.log").touch()
+    (root / "a" / "keep.txt").touch()
+    matcher = GitIgnoreMatcher.for_root(root, PatternMatcher())
+    watcher = DirectoryWatcher()
+
+    assert "debug.log" not in rescan(watcher, root, matcher)
+    # The directories were just modified, so their listings are checked again
+    # once the racy window has passed.
+    for listing in watcher._listings.values():
+        listing.listed_ns -= 2 * RACY_WINDOW_NS
+    assert watcher.changed_directories() == []
+
+    # Rewriting the file in place leaves the directory's mtime alone.
+    (root / "a" / ".gitignore").write_text("")
+    assert "debug.log" in rescan(watcher, root, matcher)
+
+
+class ScriptedPolls:
+    """
+    Stands in for the stop event and the clock of watch_directory: every
+    wait() runs the next step of the script, and the last one stops the loop.
+    """
+
+    def __init__(self, *steps):
+        self.steps = list(steps)
+        self.now = 0.0
+
+    def wait(self, timeout):
+        if not self.steps:
+            return True
+        self.steps.pop(0)()
+        return False
+
+    def monotonic(self):
+        return self.now
+
+
+def test_watch_directory_regenerates_after_change(tmp_path: Path, monkeypatch):
+    """Test the polling loop: one initial scan, then one per burst of changes."""
+    root = make_tree(tmp_path / "tree")
+    matcher = PatternMatcher()
+    outputs = []
+    updates = []
+
+    def regenerate(lister):
+        outputs.append("\n".join(iter_dir_structure(root, matcher, lister=lister)))
+
+    def add(name, mtime):
+        (root / "c" / name).touch()
+        os.utime(root / "c", (mtime, mtime))
+
+    def advance(seconds):
+        polls.now += seconds
+
+    polls = ScriptedPolls(
+        lambda: [add(f"burst_{i}.txt", OLD_MTIME + 5) for i in range(4)],
+        lambda: (advance(0.5), add("burst_4.txt", OLD_MTIME + 6)),
+        lambda: advance(0.5),  # quiet for only 0.5s of the 1s debounce
+        lambda: advance(0.5),
+    )
+    monkeypatch.setattr(
+        "indastructa_pkg.watch.time",
+        SimpleNamespace(monotonic=polls.monotonic, time_ns=time.time_ns),
+    )
+
+    watch_directory(regenerate, debounce=1, on_update=updates.append, stop_event=polls)
+
+    assert len(outputs) == 2
+    assert "burst_" not in outputs[0]
+    assert "burst_4.txt" in outputs[-1]
+    assert updates == [[str(root / "c")]]
+    assert not polls.steps
+
+
+def interrupt():
+    raise KeyboardInterrupt
+
+
+def test_main_watch_rewrites_the_output_until_interrupted(
+    tmp_path: Path, monkeypatch, capsys
+):
+    """Test --watch end to end: one report per real update, then Ctrl+C."""
+    root = make_tree(tmp_path / "tree")
+    output = tmp_path / "structure.txt"
+
+    def touch_c(name, mtime):
+        if name is not None:
+            (root / "c" / name).touch()
+        os.utime(root / "c", (mtime, mtime))
+
+    def advance(seconds):
+        polls.now += seconds
+
+    polls = ScriptedPolls(
+        lambda: touch_c("new.txt", OLD_MTIME + 5),
+        lambda: advance(1),  # quiet for the whole debounce (2 intervals)
+        lambda: touch_c(None, OLD_MTIME + 6),  # same entries, so no update
+        lambda: advance(1),
+        interrupt,
+    )
+    monkeypatch.setattr(
+        "indastructa_pkg.watch.time",
+        SimpleNamespace(monotonic=polls.monotonic, time_ns=time.time_ns),
+    )
+    monkeypatch.setattr(
+        "indastructa_pkg.watch.threading",
+        SimpleNamespace(Event=lambda: polls, Lock=threading.Lock),
+    )
+    monkeypatch.setattr(
+        "sys.argv",
+        ["indastructa", str(root), "--watch", "--watch-interval", "0.5"]
+        + ["-o", str(output)],
+    )
+
+    main()
+
+    out = capsys.readouterr().out
+    assert f"Watching {root} for changes" in out
+    assert out.count("Changes detected in 1 directories, structure updated.") == 1
+    assert out.rstrip().endswith("Stopped watching.")
+    assert "new.txt" in output.read_text(encoding="utf-8")
+    assert not polls.steps
+
+
+@pytest.mark.parametrize(
+    "options, message",
+    [
+        (["--watch-interval", "0"], "--watch-interval must be greater than 0"),
+        (
+            ["--source", "git-index"],
+            "--cache and --watch cannot be used with --source git-index",
+        ),
+    ],
+)
+def test_main_watch_rejects_bad_options(
+    tmp_path, monkeypatch, capsys, options, message
+):
+    monkeypatch.setattr("sys.argv", ["indastructa", str(tmp_path), "--watch", *options])
+
+    with pytest.raises(SystemExit) as exc:
+        main()
+
+    assert exc.value.code == 1
+    assert message in capsys.readouterr().err